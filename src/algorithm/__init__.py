@@ -0,0 +1,9 @@
+"""
+AI agents and game engines
+
+The modules import each other as `algorithm.<module>`, so run their
+self-tests as modules from the src directory:
+
+    cd src
+    python -m algorithm.q_learning
+"""
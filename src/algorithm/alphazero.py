@@ -0,0 +1,394 @@
+import math
+import os
+import pickle
+import random
+import time
+from collections import deque
+
+import numpy as np
+
+from algorithm.game_rules import get_game_state_class, state_from_board
+from algorithm.instrumentation import incr, instrumented, timer
+
+# AlphaZero: MCTS แบบ PUCT ที่ใช้ policy/value network แทน random rollout
+#
+# leaf จากหลาย simulation ถูกรวบรวมแล้วประเมินด้วย forward pass เดียว
+# (ใช้ virtual loss เพื่อให้ simulation ใน batch เดียวกันเลือกเส้นทางต่างกัน)
+
+VIRTUAL_LOSS = 1.0
+
+
+class PolicyValueNetwork:
+    """
+    Two-layer policy/value network in NumPy
+
+    Input: GameState.encode() features; outputs a softmax policy over
+    ACTION_SIZE moves and a tanh value for the player to move.
+    Trained with Adam on (z - v)^2 + cross-entropy(pi, p) + L2.
+    """
+
+    def __init__(self, input_size, action_size, hidden_size=64, learning_rate=0.001,
+                 weight_decay=1e-4, seed=None):
+        self.input_size = input_size
+        self.action_size = action_size
+        self.hidden_size = hidden_size
+        self.learning_rate = learning_rate
+        self.weight_decay = weight_decay
+        rng = np.random.default_rng(seed)
+        self.params = {
+            'w1': rng.standard_normal((input_size, hidden_size)) * np.sqrt(2.0 / input_size),
+            'b1': np.zeros(hidden_size),
+            'w2': rng.standard_normal((hidden_size, hidden_size)) * np.sqrt(2.0 / hidden_size),
+            'b2': np.zeros(hidden_size),
+            'wp': rng.standard_normal((hidden_size, action_size)) * np.sqrt(1.0 / hidden_size),
+            'bp': np.zeros(action_size),
+            'wv': rng.standard_normal((hidden_size, 1)) * np.sqrt(1.0 / hidden_size),
+            'bv': np.zeros(1),
+        }
+        self._adam_m = {name: np.zeros_like(value) for name, value in self.params.items()}
+        self._adam_v = {name: np.zeros_like(value) for name, value in self.params.items()}
+        self._adam_t = 0
+
+    def _forward(self, x):
+        p = self.params
+        h1 = np.maximum(x @ p['w1'] + p['b1'], 0.0)
+        h2 = np.maximum(h1 @ p['w2'] + p['b2'], 0.0)
+        logits = h2 @ p['wp'] + p['bp']
+        logits -= logits.max(axis=1, keepdims=True)
+        policy = np.exp(logits)
+        policy /= policy.sum(axis=1, keepdims=True)
+        value = np.tanh(h2 @ p['wv'] + p['bv'])[:, 0]
+        return h1, h2, policy, value
+
+    def predict(self, x):
+        """
+        Args:
+            x: (n, input_size) encoded positions
+
+        Returns:
+            (policy (n, action_size), value (n,))
+        """
+        with timer('alphazero.forward'):
+            _, _, policy, value = self._forward(np.asarray(x, dtype=np.float64))
+        return policy, value
+
+    def train_batch(self, x, target_policy, target_value):
+        """หนึ่งขั้นของ Adam บน minibatch แล้วคืนค่า loss"""
+        p = self.params
+        x = np.asarray(x, dtype=np.float64)
+        n = len(x)
+        h1, h2, policy, value = self._forward(x)
+
+        value_loss = np.mean((target_value - value) ** 2)
+        policy_loss = -np.mean(np.sum(target_policy * np.log(policy + 1e-12), axis=1))
+
+        d_logits = (policy - target_policy) / n
+        d_value = (-2.0 * (target_value - value) * (1.0 - value ** 2) / n)[:, None]
+        grads = {
+            'wp': h2.T @ d_logits, 'bp': d_logits.sum(axis=0),
+            'wv': h2.T @ d_value, 'bv': d_value.sum(axis=0),
+        }
+        d_h2 = (d_logits @ p['wp'].T + d_value @ p['wv'].T) * (h2 > 0)
+        grads['w2'] = h1.T @ d_h2
+        grads['b2'] = d_h2.sum(axis=0)
+        d_h1 = (d_h2 @ p['w2'].T) * (h1 > 0)
+        grads['w1'] = x.T @ d_h1
+        grads['b1'] = d_h1.sum(axis=0)
+
+        self._adam_t += 1
+        beta1, beta2 = 0.9, 0.999
+        for name, grad in grads.items():
+            if name[0] == 'w':
+                grad = grad + self.weight_decay * p[name]
+            self._adam_m[name] = beta1 * self._adam_m[name] + (1 - beta1) * grad
+            self._adam_v[name] = beta2 * self._adam_v[name] + (1 - beta2) * grad ** 2
+            m_hat = self._adam_m[name] / (1 - beta1 ** self._adam_t)
+            v_hat = self._adam_v[name] / (1 - beta2 ** self._adam_t)
+            p[name] -= self.learning_rate * m_hat / (np.sqrt(v_hat) + 1e-8)
+        return value_loss + policy_loss
+
+    def get_weights(self):
+        return {name: value.copy() for name, value in self.params.items()}
+
+    def set_weights(self, weights):
+        self.params = {name: np.array(value, dtype=np.float64) for name, value in weights.items()}
+
+    def save(self, path):
+        try:
+            with timer('alphazero.save'), open(path, 'wb') as f:
+                pickle.dump({'params': self.params, 'hidden_size': self.hidden_size}, f)
+                incr('alphazero.bytes_written', f.tell())
+        except Exception as e:
+            print(f"Error saving AlphaZero network: {e}")
+
+    def load(self, path):
+        try:
+            with open(path, 'rb') as f:
+                self.set_weights(pickle.load(f)['params'])
+            print("AlphaZero network loaded successfully.")
+            return True
+        except Exception as e:
+            print(f"Error loading AlphaZero network: {e}")
+            return False
+
+
+def create_network(game_type, **kwargs):
+    """สร้าง network ที่มีขนาด input/output ตรงกับเกม"""
+    state = get_game_state_class(game_type)()
+    if state.ACTION_SIZE is None:
+        raise ValueError(f"Game type {game_type} has no network encoding")
+    return PolicyValueNetwork(len(state.encode()), state.ACTION_SIZE, **kwargs)
+
+
+class PUCTNode:
+    """Search node: prior P, visit count N and value sum W for the player who moved into it"""
+
+    __slots__ = ('prior', 'visits', 'value_sum', 'children', 'player')
+
+    def __init__(self, prior, player):
+        self.prior = prior
+        self.visits = 0
+        self.value_sum = 0.0
+        self.children = {}  # action -> PUCTNode
+        self.player = player
+
+    def select_child(self, c_puct):
+        """เลือก child ที่มีค่า Q + c * P * sqrt(N) / (1 + n) สูงสุด"""
+        sqrt_visits = math.sqrt(self.visits)
+        best_score, best = -float('inf'), None
+        for action, child in self.children.items():
+            q = child.value_sum / child.visits if child.visits else 0.0
+            score = q + c_puct * child.prior * sqrt_visits / (1 + child.visits)
+            if score > best_score:
+                best_score, best = score, (action, child)
+        return best
+
+
+class PUCTSearch:
+    """
+    AlphaZero-style search
+
+    Up to batch_size simulations descend with virtual loss, their leaves
+    are evaluated in one forward pass, expanded with the policy priors
+    and the values are backed up.
+    """
+
+    def __init__(self, network, c_puct=1.5, simulations=200, batch_size=8,
+                 dirichlet_alpha=0.3, noise_fraction=0.25):
+        if simulations < 1 or batch_size < 1:
+            raise ValueError("PUCTSearch needs at least one simulation per search and per batch")
+        self.network = network
+        self.c_puct = c_puct
+        self.simulations = simulations
+        self.batch_size = batch_size
+        self.dirichlet_alpha = dirichlet_alpha
+        self.noise_fraction = noise_fraction
+        self.last_search_info = {}
+
+    def search(self, state, simulations=None, add_noise=False):
+        """
+        Returns:
+            (visit distribution over ACTION_SIZE moves, most visited move)
+            or (None, None) if the game is over
+
+        Raises:
+            ValueError: if simulations < 1
+        """
+        simulations = self.simulations if simulations is None else simulations
+        if simulations < 1:
+            raise ValueError(f"Search needs at least one simulation, got {simulations}")
+        state = state.copy()
+        if state.winner() is not None:
+            return None, None
+
+        start = time.perf_counter()
+        root = PUCTNode(1.0, -state.to_move)
+        policy, _ = self.network.predict([state.encode()])
+        self._expand(root, self._leaf_moves(state), policy[0])
+        if add_noise:
+            noise = np.random.dirichlet([self.dirichlet_alpha] * len(root.children))
+            for child, eta in zip(root.children.values(), noise):
+                child.prior = (1 - self.noise_fraction) * child.prior + self.noise_fraction * eta
+
+        done = 0
+        batches = 0
+        while done < simulations:
+            pending = []
+            for _ in range(min(self.batch_size, simulations - done)):
+                path, depth = self._descend(root, state)
+                leaf = path[-1]
+                winner = state.winner()
+                if winner is not None:
+                    # จบเกมแล้ว: ใช้ผลจริงแทนการประเมินจาก network
+                    value = 0.0 if winner == 0 else (1.0 if winner == leaf.player else -1.0)
+                    self._backup(path, value)
+                else:
+                    pending.append((path, self._leaf_moves(state), state.encode()))
+                for _ in range(depth):
+                    state.undo()
+                done += 1
+
+            if pending:
+                batches += 1
+                policy, values = self.network.predict([encoded for _, _, encoded in pending])
+                incr('alphazero.evaluations', len(pending))
+                for (path, leaf_moves, _), priors, value in zip(pending, policy, values):
+                    leaf = path[-1]
+                    # leaf เดียวกันอาจถูกเลือกซ้ำใน batch เดียวกัน: ขยายครั้งเดียว
+                    if not leaf.children:
+                        self._expand(leaf, leaf_moves, priors)
+                    # value ของ network มาจากมุมมองของฝ่ายที่จะเดินที่ leaf
+                    self._backup(path, -float(value))
+
+        incr('alphazero.simulations', simulations)
+        incr('alphazero.batches', batches)
+        visits = np.zeros(state.ACTION_SIZE)
+        for action, child in root.children.items():
+            visits[state.move_index(action)] = child.visits
+        best = max(root.children.items(), key=lambda item: item[1].visits)[0]
+        self.last_search_info = {
+            'simulations': simulations,
+            'batches': batches,
+            'time_used': time.perf_counter() - start,
+        }
+        return visits / visits.sum(), best
+
+    def _descend(self, root, state):
+        """เดินตาม PUCT จนถึง leaf พร้อมใส่ virtual loss ให้ทุก node บนเส้นทาง"""
+        node = root
+        path = [root]
+        depth = 0
+        while node.children:
+            action, node = node.select_child(self.c_puct)
+            state.play(action)
+            depth += 1
+            path.append(node)
+        for node in path:
+            node.visits += 1
+            node.value_sum -= VIRTUAL_LOSS
+        return path, depth
+
+    @staticmethod
+    def _backup(path, value):
+        """ย้อนค่าขึ้นต้นไม้ (value จากมุมมองของฝ่ายที่เดินเข้า leaf) และถอน virtual loss"""
+        for node in reversed(path):
+            node.value_sum += value + VIRTUAL_LOSS
+            value = -value
+
+    @staticmethod
+    def _leaf_moves(state):
+        """การเดินที่ทำได้, index ใน policy vector และฝ่ายที่จะเดิน (เก็บไว้ขยาย leaf หลังประเมิน)"""
+        moves = state.legal_moves()
+        return moves, [state.move_index(move) for move in moves], state.to_move
+
+    @staticmethod
+    def _expand(node, leaf_moves, priors):
+        moves, indices, to_move = leaf_moves
+        total = sum(priors[i] for i in indices)
+        for move, index in zip(moves, indices):
+            prior = priors[index] / total if total > 0 else 1.0 / len(moves)
+            node.children[move] = PUCTNode(prior, to_move)
+
+
+class AlphaZeroAgent:
+    """Plays with PUCT search guided by a trained PolicyValueNetwork"""
+
+    def __init__(self, game_type='TicTacToe', simulations=200, batch_size=8, model_path=None):
+        self.game_type = game_type
+        self.model_path = model_path or f"alphazero_{game_type.lower()}.pkl"
+        self.network = create_network(game_type)
+        if os.path.exists(self.model_path):
+            self.network.load(self.model_path)
+        self.search = PUCTSearch(self.network, simulations=simulations, batch_size=batch_size)
+
+    @instrumented('alphazero.choose_action')
+    def choose_action(self, board, to_move=None):
+        state = state_from_board(self.game_type, board, to_move)
+        return self.search.search(state)[1]
+
+
+class SelfPlayTrainer:
+    """
+    Self-play training loop
+
+    Each iteration plays games with PUCT search (Dirichlet noise at the
+    root, sampling by visit counts for the first temperature_moves plies),
+    stores (position, visit distribution, outcome) in a replay buffer and
+    trains the network on random minibatches.
+    """
+
+    def __init__(self, game_type='TicTacToe', network=None, simulations=64, batch_size=8,
+                 buffer_size=20000, train_batch_size=64, train_steps=100, temperature_moves=4,
+                 model_path=None):
+        self.game_type = game_type
+        self.state_class = get_game_state_class(game_type)
+        self.network = network or create_network(game_type)
+        self.search = PUCTSearch(self.network, simulations=simulations, batch_size=batch_size)
+        self.buffer = deque(maxlen=buffer_size)
+        self.train_batch_size = train_batch_size
+        self.train_steps = train_steps
+        self.temperature_moves = temperature_moves
+        self.model_path = model_path or f"alphazero_{game_type.lower()}.pkl"
+
+    def play_game(self):
+        """เล่นหนึ่งเกมกับตัวเอง แล้วคืนรายการ (encoded, pi, z)"""
+        state = self.state_class()
+        history = []
+        ply = 0
+        while state.winner() is None:
+            pi, best = self.search.search(state, add_noise=True)
+            history.append((state.encode(), pi, state.to_move))
+            if ply < self.temperature_moves:
+                index = np.random.choice(len(pi), p=pi)
+                move = state.index_move(int(index))
+            else:
+                move = best
+            state.play(move)
+            ply += 1
+        winner = state.winner()
+        return [(encoded, pi, 0.0 if winner == 0 else (1.0 if player == winner else -1.0))
+                for encoded, pi, player in history]
+
+    def train_network(self):
+        if len(self.buffer) < self.train_batch_size:
+            return None
+        losses = []
+        for _ in range(self.train_steps):
+            batch = random.sample(self.buffer, self.train_batch_size)
+            x = np.array([example[0] for example in batch])
+            pi = np.array([example[1] for example in batch])
+            z = np.array([example[2] for example in batch])
+            losses.append(self.network.train_batch(x, pi, z))
+        return float(np.mean(losses))
+
+    @instrumented('alphazero.train')
+    def train(self, iterations=10, games_per_iteration=10, save=True):
+        for iteration in range(iterations):
+            start = time.perf_counter()
+            for _ in range(games_per_iteration):
+                self.buffer.extend(self.play_game())
+            play_time = time.perf_counter() - start
+            loss = self.train_network()
+            incr('alphazero.selfplay_games', games_per_iteration)
+            loss_text = f"{loss:.3f}" if loss is not None else "-"
+            print(f"Iteration {iteration + 1}: {games_per_iteration / play_time:.1f} games/s, "
+                  f"buffer {len(self.buffer)}, loss {loss_text}")
+        if save:
+            self.network.save(self.model_path)
+
+
+# ทดสอบ AlphaZero
+if __name__ == "__main__":
+    trainer = SelfPlayTrainer('TicTacToe', simulations=48)
+    trainer.train(iterations=5, games_per_iteration=10, save=False)
+
+    search = PUCTSearch(trainer.network, simulations=200)
+    board = [
+        ['X', 'X', None],
+        ['O', 'O', None],
+        [None, None, None]
+    ]
+    pi, move = search.search(state_from_board('TicTacToe', board, 'X'))
+    print(f"Winning move for X: {move}, search info: {search.last_search_info}")
+
+    print("Test complete.")
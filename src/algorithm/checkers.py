@@ -0,0 +1,424 @@
+from algorithm.game_rules import GameState, zobrist_table
+from algorithm.instrumentation import instrumented
+
+# Checkers (American rules) engine แบบ bitboard 32 ช่อง
+#
+# ช่องที่เล่นได้คือช่องที่ (row + col) เป็นเลขคี่ (เหมือน checkers.js) ช่อง i อยู่ที่
+# row = i // 4, col = 2 * (i % 4) + (1 if row เป็นเลขคู่ else 0)
+#
+# ฝ่าย +1 = black (เดินก่อน, เดินขึ้น row ลดลง), ฝ่าย -1 = white (เดินลง row เพิ่มขึ้น)
+# รูปแบบกระดานของ frontend: 0 ว่าง, 1 white, 2 black, 3 white king, 4 black king
+# API ของ frontend ใช้สีของผู้เล่น (ค่าเริ่มต้น 'white' เหมือน checkers.js) และผลเป็น 'player' / 'ai' / 'draw'
+#
+# การเดินแทนด้วย tuple (from_square, to_square, captured_mask) โดย captured_mask คือ
+# bit ของหมากที่ถูกกินทั้งหมดในการกินต่อเนื่อง
+
+BLACK, WHITE = 0, 1
+SQUARES = 32
+FULL_MASK = (1 << SQUARES) - 1
+
+# ทิศทาง: (drow, dcol)
+DIRECTIONS = [(-1, -1), (-1, 1), (1, -1), (1, 1)]
+MAN_DIRECTIONS = {BLACK: (0, 1), WHITE: (2, 3)}
+
+# เสมอเมื่อเดินติดกัน 80 ply โดยไม่มีการกินหรือการเดินเบี้ย
+NO_PROGRESS_LIMIT = 80
+
+
+def square_to_coords(square):
+    row = square // 4
+    return row, 2 * (square % 4) + (1 if row % 2 == 0 else 0)
+
+
+def coords_to_square(row, col):
+    """คืนหมายเลขช่อง หรือ None ถ้าเป็นช่องที่เล่นไม่ได้/อยู่นอกกระดาน"""
+    if not (0 <= row < 8 and 0 <= col < 8) or (row + col) % 2 == 0:
+        return None
+    return row * 4 + col // 2
+
+
+def _build_tables():
+    """ตารางการเดินและการกินที่คำนวณไว้ล่วงหน้าสำหรับแต่ละช่อง แต่ละฝ่าย และชนิดหมาก"""
+    steps = [[[None] * SQUARES for _ in range(2)] for _ in range(2)]  # [side][king][sq]
+    jumps = [[[None] * SQUARES for _ in range(2)] for _ in range(2)]
+    for side in (BLACK, WHITE):
+        for king in (0, 1):
+            directions = range(4) if king else MAN_DIRECTIONS[side]
+            for square in range(SQUARES):
+                row, col = square_to_coords(square)
+                square_steps, square_jumps = [], []
+                for d in directions:
+                    drow, dcol = DIRECTIONS[d]
+                    target = coords_to_square(row + drow, col + dcol)
+                    if target is None:
+                        continue
+                    square_steps.append((1 << target, target))
+                    land = coords_to_square(row + 2 * drow, col + 2 * dcol)
+                    if land is not None:
+                        square_jumps.append((1 << target, 1 << land, land))
+                steps[side][king][square] = tuple(square_steps)
+                jumps[side][king][square] = tuple(square_jumps)
+    return steps, jumps
+
+
+STEPS, JUMPS = _build_tables()
+
+# แถวที่ทำให้เบี้ยกลายเป็นคิง
+PROMOTION_MASK = {
+    BLACK: sum(1 << sq for sq in range(SQUARES) if square_to_coords(sq)[0] == 0),
+    WHITE: sum(1 << sq for sq in range(SQUARES) if square_to_coords(sq)[0] == 7),
+}
+
+# คะแนนความก้าวหน้าของเบี้ยตามแถว (ใช้ใน evaluate)
+ROW_MASKS = [sum(1 << sq for sq in range(row * 4, row * 4 + 4)) for row in range(8)]
+
+# ค่าสุ่มสำหรับ (ช่อง, ชนิดหมาก 4 แบบ) และฝ่ายที่จะเดิน
+ZOBRIST = zobrist_table(SQUARES * 4 + 1, seed=32)
+ZOBRIST_SIDE = ZOBRIST[SQUARES * 4]
+
+
+def _bits(mask):
+    """วนตามหมายเลขช่องของ bit ที่เป็น 1"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def _piece_hash(square, side, king):
+    return ZOBRIST[square * 4 + side + 2 * king]
+
+
+class CheckersState(GameState):
+    """
+    Checkers position on three 32-bit bitboards (black, white, kings)
+
+    Captures are mandatory and multi-jump chains are generated depth-first
+    on the bitboards themselves, so no board copy is made per jump.
+    """
+
+    def __init__(self, black=None, white=None, kings=0, to_move=1):
+        if black is None:
+            black = sum(1 << sq for sq in range(20, 32))
+        if white is None:
+            white = sum(1 << sq for sq in range(0, 12))
+        self.pieces = [black, white]
+        self.kings = kings
+        self.to_move = to_move
+        self.no_progress = 0
+        self.history = []
+        self._moves = None  # legal moves ที่คำนวณไว้ของตำแหน่งปัจจุบัน
+        self.key = ZOBRIST_SIDE if to_move < 0 else 0
+        for side in (BLACK, WHITE):
+            for square in _bits(self.pieces[side]):
+                self.key ^= _piece_hash(square, side, bool(kings >> square & 1))
+
+    @classmethod
+    def from_board(cls, board, to_move=None):
+        """
+        Create a state from the frontend board
+
+        Args:
+            board: 8x8 list of 0 (empty), 1 (white), 2 (black), 3 (white king), 4 (black king)
+            to_move: 'black' or 'white' ('black' if None)
+        """
+        black = white = kings = 0
+        for row in range(8):
+            for col in range(8):
+                piece = board[row][col]
+                if not piece:
+                    continue
+                square = coords_to_square(row, col)
+                if square is None:
+                    raise ValueError(f"Piece on a light square: {row},{col}")
+                bit = 1 << square
+                if piece in (2, 4):
+                    black |= bit
+                else:
+                    white |= bit
+                if piece in (3, 4):
+                    kings |= bit
+        return cls(black, white, kings, -1 if to_move == 'white' else 1)
+
+    def to_board(self):
+        board = [[0] * 8 for _ in range(8)]
+        for side, man, king in ((BLACK, 2, 4), (WHITE, 1, 3)):
+            for square in _bits(self.pieces[side]):
+                row, col = square_to_coords(square)
+                board[row][col] = king if self.kings >> square & 1 else man
+        return board
+
+    def _side(self):
+        return BLACK if self.to_move > 0 else WHITE
+
+    def _generate_moves(self):
+        """การเดินทั้งหมดของฝ่ายที่จะเดิน (ถ้ากินได้ต้องกิน)"""
+        side = self._side()
+        own = self.pieces[side]
+        opponent = self.pieces[1 - side]
+        kings = self.kings
+        empty = ~(own | opponent) & FULL_MASK
+
+        captures = []
+        for square in _bits(own):
+            king = kings >> square & 1
+            self._add_jumps(captures, side, king, square, square, opponent,
+                            empty | (1 << square), 0)
+        if captures:
+            return captures
+
+        moves = []
+        for square in _bits(own):
+            for bit, target in STEPS[side][kings >> square & 1][square]:
+                if empty & bit:
+                    moves.append((square, target, 0))
+        return moves
+
+    def _add_jumps(self, out, side, king, origin, square, opponent, empty, captured):
+        """ค้นหาการกินต่อเนื่องแบบ depth-first บน bitboard (ไม่คัดลอกกระดาน)"""
+        extended = False
+        for over_bit, land_bit, land in JUMPS[side][king][square]:
+            if opponent & over_bit and not captured & over_bit and empty & land_bit:
+                extended = True
+                now_captured = captured | over_bit
+                if not king and land_bit & PROMOTION_MASK[side]:
+                    # เบี้ยที่กลายเป็นคิงจบการกินทันที
+                    out.append((origin, land, now_captured))
+                else:
+                    self._add_jumps(out, side, king, origin, land, opponent,
+                                    empty & ~land_bit, now_captured)
+        if not extended and captured:
+            out.append((origin, square, captured))
+
+    def legal_moves(self):
+        if self._moves is None:
+            self._moves = self._generate_moves()
+        if self.no_progress >= NO_PROGRESS_LIMIT:
+            return []
+        return self._moves
+
+    def moves_from(self, square):
+        """การเดินที่ถูกต้องของหมากในช่องที่ระบุ"""
+        return [move for move in self.legal_moves() if move[0] == square]
+
+    def play(self, move):
+        origin, target, captured = move
+        side = self._side()
+        from_bit, to_bit = 1 << origin, 1 << target
+        was_king = bool(self.kings & from_bit)
+        captured_kings = self.kings & captured
+        promoted = not was_king and bool(to_bit & PROMOTION_MASK[side])
+
+        self.history.append((move, captured_kings, promoted, self.no_progress, self._moves))
+
+        # คิงที่กินวนกลับมาช่องเดิมได้ (origin == target) จึงลบแล้วค่อยเพิ่ม bit แทนการ xor
+        self.pieces[side] = self.pieces[side] & ~from_bit | to_bit
+        self.key ^= _piece_hash(origin, side, was_king) ^ _piece_hash(target, side, was_king or promoted)
+        if was_king:
+            self.kings = self.kings & ~from_bit | to_bit
+        elif promoted:
+            self.kings |= to_bit
+        if captured:
+            opponent = 1 - side
+            self.pieces[opponent] ^= captured
+            for square in _bits(captured):
+                self.key ^= _piece_hash(square, opponent, bool(captured_kings >> square & 1))
+            self.kings &= ~captured
+
+        self.no_progress = 0 if captured or not was_king else self.no_progress + 1
+        self.to_move = -self.to_move
+        self.key ^= ZOBRIST_SIDE
+        self._moves = None
+
+    def undo(self):
+        move, captured_kings, promoted, no_progress, moves = self.history.pop()
+        origin, target, captured = move
+        self.to_move = -self.to_move
+        self.key ^= ZOBRIST_SIDE
+        side = self._side()
+        from_bit, to_bit = 1 << origin, 1 << target
+        is_king = bool(self.kings & to_bit)
+        was_king = is_king and not promoted
+
+        self.pieces[side] = self.pieces[side] & ~to_bit | from_bit
+        self.key ^= _piece_hash(origin, side, was_king) ^ _piece_hash(target, side, is_king)
+        if was_king:
+            self.kings = self.kings & ~to_bit | from_bit
+        elif promoted:
+            self.kings &= ~to_bit
+        if captured:
+            opponent = 1 - side
+            self.pieces[opponent] |= captured
+            self.kings |= captured_kings
+            for square in _bits(captured):
+                self.key ^= _piece_hash(square, opponent, bool(captured_kings >> square & 1))
+
+        self.no_progress = no_progress
+        self._moves = moves
+
+    def winner(self):
+        if self.no_progress >= NO_PROGRESS_LIMIT:
+            return 0
+        if self._moves is None:
+            self._moves = self._generate_moves()
+        if not self._moves:
+            # เดินไม่ได้ (หรือไม่มีหมากเหลือ) ถือว่าแพ้
+            return -self.to_move
+        return None
+
+    def hash_key(self):
+        return self.key
+
+    def evaluate(self):
+        """วัสดุ (เบี้ย 100, คิง 160) + ความก้าวหน้าของเบี้ย จากมุมมองของฝ่ายที่จะเดิน"""
+        kings = self.kings
+        black, white = self.pieces
+        score = 100 * ((black & ~kings).bit_count() - (white & ~kings).bit_count())
+        score += 160 * ((black & kings).bit_count() - (white & kings).bit_count())
+        black_men, white_men = black & ~kings, white & ~kings
+        for row in range(1, 7):
+            score += 3 * (7 - row) * (black_men & ROW_MASKS[row]).bit_count()
+            score -= 3 * row * (white_men & ROW_MASKS[row]).bit_count()
+        return score * self.to_move
+
+    def copy(self):
+        state = CheckersState.__new__(CheckersState)
+        state.pieces = list(self.pieces)
+        state.kings = self.kings
+        state.to_move = self.to_move
+        state.no_progress = self.no_progress
+        state.history = list(self.history)
+        state._moves = self._moves
+        state.key = self.key
+        return state
+
+
+def _move_info(move):
+    origin, target, captured = move
+    return {
+        'from': list(square_to_coords(origin)),
+        'to': list(square_to_coords(target)),
+        'captured': [list(square_to_coords(square)) for square in _bits(captured)],
+    }
+
+
+def _check_color(player_color):
+    if player_color not in ('white', 'black'):
+        raise ValueError(f"Unknown player color: {player_color}")
+    return player_color
+
+
+def _opponent_color(player_color):
+    return 'black' if _check_color(player_color) == 'white' else 'white'
+
+
+def _result_for_player(winner, player_color):
+    """แปลงผลของ engine (+1 black, -1 white, 0 เสมอ) เป็นผลที่ checkers.js ใช้"""
+    if winner is None:
+        return None
+    if winner == 0:
+        return 'draw'
+    return 'player' if (winner > 0) == (player_color == 'black') else 'ai'
+
+
+def get_valid_moves(board, row, col, player_color='white'):
+    """
+    Valid moves of the player's piece at (row, col) for /api/checkers/valid_moves
+
+    Args:
+        player_color: the human player's color, 'white' or 'black' (checkers.js playerColor)
+
+    Returns:
+        dict: {"row,col": {"captured": [[row, col], ...]}} as expected by checkers.js
+    """
+    square = coords_to_square(row, col)
+    if square is None:
+        return {}
+    state = CheckersState.from_board(board, _check_color(player_color))
+    result = {}
+    for move in state.moves_from(square):
+        to_row, to_col = square_to_coords(move[1])
+        result[f"{to_row},{to_col}"] = {'captured': _move_info(move)['captured']}
+    return result
+
+
+def apply_move(board, from_row, from_col, to_row, to_col, player_color='white'):
+    """
+    Apply the player's move given as start/end coordinates (for /api/checkers/move)
+
+    Args:
+        player_color: the human player's color, 'white' or 'black' (checkers.js playerColor)
+
+    Raises:
+        ValueError: if the move is not legal in the given position
+
+    Returns:
+        dict: new board, captured squares, whether the piece was promoted,
+        player_turn (always False: the AI moves next) and the result,
+        winner being 'player', 'ai' or 'draw' as checkers.js expects
+    """
+    state = CheckersState.from_board(board, _check_color(player_color))
+    origin = coords_to_square(from_row, from_col)
+    target = coords_to_square(to_row, to_col)
+    candidates = [move for move in state.legal_moves() if move[0] == origin and move[1] == target]
+    if not candidates:
+        raise ValueError("Illegal move")
+    # หากมีหลายเส้นทางไปยังช่องเดียวกัน เลือกเส้นทางที่กินได้มากที่สุด
+    move = max(candidates, key=lambda m: m[2].bit_count())
+    was_king = bool(state.kings >> origin & 1)
+    state.play(move)
+    winner = state.winner()
+    return {
+        'board': state.to_board(),
+        'captured': _move_info(move)['captured'],
+        'promoted': not was_king and bool(state.kings >> target & 1),
+        'player_turn': False,
+        'game_over': winner is not None,
+        'winner': _result_for_player(winner, player_color),
+    }
+
+
+class CheckersAgent:
+    """Checkers AI for /api/checkers/ai_move (alpha-beta search over CheckersState)"""
+
+    def __init__(self, time_limit=1.0):
+        from algorithm.minimax import MinimaxAgent
+
+        self.search = MinimaxAgent(game_type='Checkers', time_limit=time_limit)
+
+    def reset_for_new_game(self):
+        self.search.reset_for_new_game()
+
+    @instrumented('checkers.choose_action')
+    def choose_action(self, board, player_color='white'):
+        """
+        Args:
+            player_color: the human player's color; the AI moves the other color
+
+        Returns:
+            dict: {"from": [row, col], "to": [row, col], "captured": [[row, col], ...]}
+            or None if there is no legal move
+        """
+        move = self.search.search(CheckersState.from_board(board, _opponent_color(player_color)))
+        return _move_info(move) if move is not None else None
+
+
+# ทดสอบ Checkers engine
+if __name__ == "__main__":
+    import time
+
+    state = CheckersState()
+    board = state.to_board()
+    print(f"Opening moves for black: {len(state.legal_moves())}")
+    print(f"Valid moves from (5, 0): {get_valid_moves(board, 5, 0, 'black')}")
+
+    start = time.perf_counter()
+    for _ in range(10000):
+        get_valid_moves(board, 5, 2, 'black')
+    print(f"valid_moves query: {(time.perf_counter() - start) / 10000 * 1e6:.1f} us")
+
+    agent = CheckersAgent(time_limit=1.0)
+    print(f"AI move (black): {agent.choose_action(board, 'white')}")
+    print(f"Search info: {agent.search.last_search_info}")
+
+    print("Test complete.")
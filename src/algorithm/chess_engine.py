@@ -0,0 +1,806 @@
+import time
+
+from algorithm.game_rules import GameState, zobrist_table
+from algorithm.instrumentation import incr, instrumented
+from algorithm.minimax import EXACT, LOWER, UPPER, WIN_SCORE, MinimaxAgent, _SearchTimeout
+
+# Chess engine บนกระดานแบบ 0x88
+#
+# ช่อง = row * 16 + col โดย row 0 คือแถวที่ 8 (ฝั่งดำ) เหมือนกระดานใน chess.js
+# ช่องที่ (square & 0x88) != 0 อยู่นอกกระดาน ทำให้ตรวจขอบได้ด้วย and ครั้งเดียว
+#
+# หมากแทนด้วยจำนวนเต็ม: บวก = ขาว, ลบ = ดำ, ค่าสัมบูรณ์ 1-6 = P N B R Q K
+# การเดินแทนด้วย tuple (from, to, promotion, flag)
+
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = 1, 2, 3, 4, 5, 6
+PIECE_LETTERS = {PAWN: 'P', KNIGHT: 'N', BISHOP: 'B', ROOK: 'R', QUEEN: 'Q', KING: 'K'}
+LETTER_PIECES = {letter: piece for piece, letter in PIECE_LETTERS.items()}
+
+# flag ของการเดิน
+NORMAL, DOUBLE_PUSH, EN_PASSANT, CASTLE = 0, 1, 2, 3
+
+# สิทธิ์ castling
+WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE = 1, 2, 4, 8
+
+KNIGHT_OFFSETS = (33, 31, 18, 14, -33, -31, -18, -14)
+BISHOP_OFFSETS = (15, 17, -15, -17)
+ROOK_OFFSETS = (1, -1, 16, -16)
+KING_OFFSETS = BISHOP_OFFSETS + ROOK_OFFSETS
+
+VALID_SQUARES = [sq for sq in range(128) if not sq & 0x88]
+
+PIECE_VALUES = {PAWN: 100, KNIGHT: 320, BISHOP: 330, ROOK: 500, QUEEN: 900, KING: 20000}
+PAWN_VALUE = PIECE_VALUES[PAWN]
+
+# ตาราง piece-square จากมุมมองของขาว (แถวแรกคือแถวที่ 8)
+PIECE_SQUARE_TABLES = {
+    PAWN: [
+        0, 0, 0, 0, 0, 0, 0, 0,
+        50, 50, 50, 50, 50, 50, 50, 50,
+        10, 10, 20, 30, 30, 20, 10, 10,
+        5, 5, 10, 25, 25, 10, 5, 5,
+        0, 0, 0, 20, 20, 0, 0, 0,
+        5, -5, -10, 0, 0, -10, -5, 5,
+        5, 10, 10, -20, -20, 10, 10, 5,
+        0, 0, 0, 0, 0, 0, 0, 0],
+    KNIGHT: [
+        -50, -40, -30, -30, -30, -30, -40, -50,
+        -40, -20, 0, 0, 0, 0, -20, -40,
+        -30, 0, 10, 15, 15, 10, 0, -30,
+        -30, 5, 15, 20, 20, 15, 5, -30,
+        -30, 0, 15, 20, 20, 15, 0, -30,
+        -30, 5, 10, 15, 15, 10, 5, -30,
+        -40, -20, 0, 5, 5, 0, -20, -40,
+        -50, -40, -30, -30, -30, -30, -40, -50],
+    BISHOP: [
+        -20, -10, -10, -10, -10, -10, -10, -20,
+        -10, 0, 0, 0, 0, 0, 0, -10,
+        -10, 0, 5, 10, 10, 5, 0, -10,
+        -10, 5, 5, 10, 10, 5, 5, -10,
+        -10, 0, 10, 10, 10, 10, 0, -10,
+        -10, 10, 10, 10, 10, 10, 10, -10,
+        -10, 5, 0, 0, 0, 0, 5, -10,
+        -20, -10, -10, -10, -10, -10, -10, -20],
+    ROOK: [
+        0, 0, 0, 0, 0, 0, 0, 0,
+        5, 10, 10, 10, 10, 10, 10, 5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        0, 0, 0, 5, 5, 0, 0, 0],
+    QUEEN: [
+        -20, -10, -10, -5, -5, -10, -10, -20,
+        -10, 0, 0, 0, 0, 0, 0, -10,
+        -10, 0, 5, 5, 5, 5, 0, -10,
+        -5, 0, 5, 5, 5, 5, 0, -5,
+        0, 0, 5, 5, 5, 5, 0, -5,
+        -10, 5, 5, 5, 5, 5, 0, -10,
+        -10, 0, 5, 0, 0, 0, 0, -10,
+        -20, -10, -10, -5, -5, -10, -10, -20],
+    KING: [
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -20, -30, -30, -40, -40, -30, -30, -20,
+        -10, -20, -20, -20, -20, -20, -20, -10,
+        20, 20, 0, 0, 0, 0, 20, 20,
+        20, 30, 10, 0, 0, 10, 30, 20],
+}
+
+
+def _build_square_values():
+    """ค่า (วัสดุ + piece-square) ของหมากแต่ละตัวในแต่ละช่อง จากมุมมองของขาว"""
+    values = {}
+    for piece, table in PIECE_SQUARE_TABLES.items():
+        white = [0] * 128
+        black = [0] * 128
+        for square in VALID_SQUARES:
+            row, col = square >> 4, square & 7
+            white[square] = PIECE_VALUES[piece] + table[row * 8 + col]
+            black[square] = -(PIECE_VALUES[piece] + table[(7 - row) * 8 + col])
+        values[piece] = white
+        values[-piece] = black
+    return values
+
+
+SQUARE_VALUES = _build_square_values()
+
+# สิทธิ์ castling ที่เหลือหลังจากมีการเดินจาก/ไปยังช่องนั้น
+CASTLING_MASKS = [15] * 128
+CASTLING_MASKS[0x74] = 15 & ~(WHITE_KINGSIDE | WHITE_QUEENSIDE)
+CASTLING_MASKS[0x77] = 15 & ~WHITE_KINGSIDE
+CASTLING_MASKS[0x70] = 15 & ~WHITE_QUEENSIDE
+CASTLING_MASKS[0x04] = 15 & ~(BLACK_KINGSIDE | BLACK_QUEENSIDE)
+CASTLING_MASKS[0x07] = 15 & ~BLACK_KINGSIDE
+CASTLING_MASKS[0x00] = 15 & ~BLACK_QUEENSIDE
+
+# Zobrist: หมาก 12 ชนิด x 128 ช่อง, สิทธิ์ castling 16 แบบ, คอลัมน์ en passant 8 แบบ, ฝ่ายที่จะเดิน
+ZOBRIST = zobrist_table(13 * 128 + 16 + 8 + 1, seed=88)
+ZOBRIST_CASTLING = 13 * 128
+ZOBRIST_EP = ZOBRIST_CASTLING + 16
+ZOBRIST_SIDE = ZOBRIST[ZOBRIST_EP + 8]
+
+
+def _piece_key(piece, square):
+    return ZOBRIST[(piece + 6) * 128 + square]
+
+
+def square_name(square):
+    return 'abcdefgh'[square & 7] + str(8 - (square >> 4))
+
+
+START_FEN = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
+
+
+class ChessState(GameState):
+    """
+    Chess position on a 0x88 board with make/unmake
+
+    Material + piece-square score and the Zobrist key are updated
+    incrementally in play()/undo(); nothing is recomputed per node.
+    Move generation is pseudo-legal; legal_moves() filters moves that
+    leave the own king in check.
+    """
+
+    def __init__(self, fen=START_FEN):
+        self.board = [0] * 128
+        self.history = []
+        self._load_fen(fen)
+
+    def _load_fen(self, fen):
+        fields = fen.split()
+        for row, rank in enumerate(fields[0].split('/')):
+            col = 0
+            for char in rank:
+                if char.isdigit():
+                    col += int(char)
+                    continue
+                piece = LETTER_PIECES[char.upper()]
+                self.board[row * 16 + col] = piece if char.isupper() else -piece
+                col += 1
+        self.to_move = 1 if fields[1] == 'w' else -1
+        self.castling = 0
+        for char, right in (('K', WHITE_KINGSIDE), ('Q', WHITE_QUEENSIDE),
+                            ('k', BLACK_KINGSIDE), ('q', BLACK_QUEENSIDE)):
+            if char in fields[2]:
+                self.castling |= right
+        self.ep_square = None
+        if len(fields) > 3 and fields[3] != '-':
+            self.ep_square = (8 - int(fields[3][1])) * 16 + 'abcdefgh'.index(fields[3][0])
+        self.halfmove = int(fields[4]) if len(fields) > 4 else 0
+        self._refresh()
+
+    def _refresh(self):
+        """คำนวณ key, คะแนน และตำแหน่งคิงใหม่ทั้งหมด (ใช้ตอนสร้างตำแหน่งเท่านั้น)"""
+        self.score = 0
+        self.key = 0
+        self.king_squares = {1: None, -1: None}
+        for square in VALID_SQUARES:
+            piece = self.board[square]
+            if piece:
+                self.score += SQUARE_VALUES[piece][square]
+                self.key ^= _piece_key(piece, square)
+                if abs(piece) == KING:
+                    self.king_squares[1 if piece > 0 else -1] = square
+        self.key ^= ZOBRIST[ZOBRIST_CASTLING + self.castling]
+        if self.ep_square is not None:
+            self.key ^= ZOBRIST[ZOBRIST_EP + (self.ep_square & 7)]
+        if self.to_move < 0:
+            self.key ^= ZOBRIST_SIDE
+        self.repetitions = {self.key: 1}
+        self._legal = None
+
+    @classmethod
+    def from_fen(cls, fen):
+        return cls(fen)
+
+    @classmethod
+    def from_board(cls, board, to_move=None):
+        """
+        Create a state from the chess.js board
+
+        Args:
+            board: 8x8 list of {"type": "P", "color": "white"} or None (row 0 = rank 8)
+            to_move: 'white' or 'black' ('white' if None)
+
+        Castling rights are assumed for every king/rook still on its
+        starting square; the en passant square is not known from a bare board.
+        """
+        rows = []
+        for row in board:
+            fen_row, empty = '', 0
+            for cell in row:
+                if not cell:
+                    empty += 1
+                    continue
+                if empty:
+                    fen_row += str(empty)
+                    empty = 0
+                letter = cell['type'].upper()
+                fen_row += letter if cell['color'] == 'white' else letter.lower()
+            rows.append(fen_row + (str(empty) if empty else ''))
+        castling = ''
+        for char, king_sq, rook_sq, row, king_char, rook_char in (
+                ('K', 4, 7, 7, 'K', 'R'), ('Q', 4, 0, 7, 'K', 'R'),
+                ('k', 4, 7, 0, 'k', 'r'), ('q', 4, 0, 0, 'k', 'r')):
+            king = board[row][king_sq]
+            rook = board[row][rook_sq]
+            color = 'white' if row == 7 else 'black'
+            if (king and king['type'].upper() == 'K' and king['color'] == color and
+                    rook and rook['type'].upper() == 'R' and rook['color'] == color):
+                castling += char
+        side = 'b' if to_move == 'black' else 'w'
+        return cls(f"{'/'.join(rows)} {side} {castling or '-'} - 0 1")
+
+    def to_board(self):
+        board = [[None] * 8 for _ in range(8)]
+        for square in VALID_SQUARES:
+            piece = self.board[square]
+            if piece:
+                board[square >> 4][square & 7] = {
+                    'type': PIECE_LETTERS[abs(piece)],
+                    'color': 'white' if piece > 0 else 'black',
+                }
+        return board
+
+    # ------------------------------------------------------------------
+    # การตรวจการโจมตี
+
+    def is_attacked(self, square, by):
+        """ช่อง `square` ถูกโจมตีโดยฝ่าย `by` (+1 ขาว / -1 ดำ) หรือไม่"""
+        board = self.board
+        # เบี้ย: เบี้ยขาวโจมตีขึ้นด้านบน (row ลดลง) จึงอยู่ใต้ช่องเป้าหมาย
+        pawn = PAWN * by
+        for offset in ((15, 17) if by > 0 else (-15, -17)):
+            source = square + offset
+            if not source & 0x88 and board[source] == pawn:
+                return True
+        knight = KNIGHT * by
+        for offset in KNIGHT_OFFSETS:
+            source = square + offset
+            if not source & 0x88 and board[source] == knight:
+                return True
+        king = KING * by
+        for offset in KING_OFFSETS:
+            source = square + offset
+            if not source & 0x88 and board[source] == king:
+                return True
+        bishop, rook, queen = BISHOP * by, ROOK * by, QUEEN * by
+        for offset in BISHOP_OFFSETS:
+            source = square + offset
+            while not source & 0x88:
+                piece = board[source]
+                if piece:
+                    if piece == bishop or piece == queen:
+                        return True
+                    break
+                source += offset
+        for offset in ROOK_OFFSETS:
+            source = square + offset
+            while not source & 0x88:
+                piece = board[source]
+                if piece:
+                    if piece == rook or piece == queen:
+                        return True
+                    break
+                source += offset
+        return False
+
+    def in_check(self, side=None):
+        side = self.to_move if side is None else side
+        king = self.king_squares[side]
+        return king is not None and self.is_attacked(king, -side)
+
+    # ------------------------------------------------------------------
+    # การสร้างการเดิน
+
+    def pseudo_legal_moves(self, captures_only=False):
+        """การเดินแบบ pseudo-legal (ยังไม่ตรวจว่าคิงตัวเองถูกรุกหรือไม่)"""
+        board = self.board
+        side = self.to_move
+        moves = []
+        append = moves.append
+        for square in VALID_SQUARES:
+            piece = board[square]
+            if not piece or (piece > 0) != (side > 0):
+                continue
+            kind = piece * side
+            if kind == PAWN:
+                self._pawn_moves(square, side, moves, captures_only)
+            elif kind == KNIGHT or kind == KING:
+                for offset in (KNIGHT_OFFSETS if kind == KNIGHT else KING_OFFSETS):
+                    target = square + offset
+                    if target & 0x88:
+                        continue
+                    occupant = board[target]
+                    if occupant:
+                        if (occupant > 0) != (side > 0):
+                            append((square, target, 0, NORMAL))
+                    elif not captures_only:
+                        append((square, target, 0, NORMAL))
+            else:
+                offsets = (BISHOP_OFFSETS if kind == BISHOP else
+                           ROOK_OFFSETS if kind == ROOK else KING_OFFSETS)
+                for offset in offsets:
+                    target = square + offset
+                    while not target & 0x88:
+                        occupant = board[target]
+                        if occupant:
+                            if (occupant > 0) != (side > 0):
+                                append((square, target, 0, NORMAL))
+                            break
+                        if not captures_only:
+                            append((square, target, 0, NORMAL))
+                        target += offset
+        if not captures_only:
+            self._castling_moves(side, moves)
+        return moves
+
+    def _pawn_moves(self, square, side, moves, captures_only):
+        board = self.board
+        forward = -16 if side > 0 else 16
+        start_row = 6 if side > 0 else 1
+        promotion_row = 0 if side > 0 else 7
+        target = square + forward
+        if not captures_only and not target & 0x88 and not board[target]:
+            if target >> 4 == promotion_row:
+                for promotion in (QUEEN, ROOK, BISHOP, KNIGHT):
+                    moves.append((square, target, promotion, NORMAL))
+            else:
+                moves.append((square, target, 0, NORMAL))
+                double = target + forward
+                if square >> 4 == start_row and not board[double]:
+                    moves.append((square, double, 0, DOUBLE_PUSH))
+        for offset in (forward - 1, forward + 1):
+            target = square + offset
+            if target & 0x88:
+                continue
+            occupant = board[target]
+            if occupant and (occupant > 0) != (side > 0):
+                if target >> 4 == promotion_row:
+                    for promotion in (QUEEN, ROOK, BISHOP, KNIGHT):
+                        moves.append((square, target, promotion, NORMAL))
+                else:
+                    moves.append((square, target, 0, NORMAL))
+            elif target == self.ep_square:
+                moves.append((square, target, 0, EN_PASSANT))
+
+    def _castling_moves(self, side, moves):
+        board = self.board
+        if side > 0:
+            king, kingside, queenside = 0x74, WHITE_KINGSIDE, WHITE_QUEENSIDE
+        else:
+            king, kingside, queenside = 0x04, BLACK_KINGSIDE, BLACK_QUEENSIDE
+        if board[king] != KING * side:
+            return
+        if self.castling & kingside and not board[king + 1] and not board[king + 2] \
+                and board[king + 3] == ROOK * side:
+            if not self.is_attacked(king, -side) and not self.is_attacked(king + 1, -side) \
+                    and not self.is_attacked(king + 2, -side):
+                moves.append((king, king + 2, 0, CASTLE))
+        if self.castling & queenside and not board[king - 1] and not board[king - 2] \
+                and not board[king - 3] and board[king - 4] == ROOK * side:
+            if not self.is_attacked(king, -side) and not self.is_attacked(king - 1, -side) \
+                    and not self.is_attacked(king - 2, -side):
+                moves.append((king, king - 2, 0, CASTLE))
+
+    def legal_moves(self):
+        if self._legal is None:
+            legal = []
+            side = self.to_move
+            for move in self.pseudo_legal_moves():
+                self.play(move)
+                if not self.in_check(side):
+                    legal.append(move)
+                self.undo()
+            self._legal = legal
+        if self.halfmove >= 100 or self.repetitions.get(self.key, 0) >= 3:
+            return []
+        return self._legal
+
+    # ------------------------------------------------------------------
+    # make / unmake
+
+    def play(self, move):
+        origin, target, promotion, flag = move
+        board = self.board
+        side = self.to_move
+        piece = board[origin]
+        captured = board[target]
+        values = SQUARE_VALUES
+
+        self.history.append((move, piece, captured, self.castling, self.ep_square,
+                             self.halfmove, self.key, self.score, self._legal))
+
+        key = self.key ^ ZOBRIST[ZOBRIST_CASTLING + self.castling]
+        if self.ep_square is not None:
+            key ^= ZOBRIST[ZOBRIST_EP + (self.ep_square & 7)]
+        score = self.score
+
+        # ยกหมากออกจากช่องเดิม
+        board[origin] = 0
+        key ^= _piece_key(piece, origin)
+        score -= values[piece][origin]
+
+        if captured:
+            key ^= _piece_key(captured, target)
+            score -= values[captured][target]
+        elif flag == EN_PASSANT:
+            victim = target + (16 if side > 0 else -16)
+            captured = board[victim]
+            board[victim] = 0
+            key ^= _piece_key(captured, victim)
+            score -= values[captured][victim]
+
+        placed = promotion * side if promotion else piece
+        board[target] = placed
+        key ^= _piece_key(placed, target)
+        score += values[placed][target]
+
+        if flag == CASTLE:
+            # ย้ายเรือตามคิง
+            rook_from, rook_to = (origin + 3, origin + 1) if target > origin else (origin - 4, origin - 1)
+            rook = board[rook_from]
+            board[rook_from] = 0
+            board[rook_to] = rook
+            key ^= _piece_key(rook, rook_from) ^ _piece_key(rook, rook_to)
+            score += values[rook][rook_to] - values[rook][rook_from]
+
+        if piece * side == KING:
+            self.king_squares[side] = target
+
+        self.castling &= CASTLING_MASKS[origin] & CASTLING_MASKS[target]
+        key ^= ZOBRIST[ZOBRIST_CASTLING + self.castling]
+        if flag == DOUBLE_PUSH:
+            self.ep_square = (origin + target) >> 1
+            key ^= ZOBRIST[ZOBRIST_EP + (self.ep_square & 7)]
+        else:
+            self.ep_square = None
+
+        self.halfmove = 0 if captured or piece * side == PAWN else self.halfmove + 1
+        self.to_move = -side
+        key ^= ZOBRIST_SIDE
+        self.key = key
+        self.score = score
+        self.repetitions[key] = self.repetitions.get(key, 0) + 1
+        self._legal = None
+
+    def undo(self):
+        (move, piece, captured, castling, ep_square,
+         halfmove, key, score, legal) = self.history.pop()
+        origin, target, promotion, flag = move
+        board = self.board
+
+        count = self.repetitions[self.key] - 1
+        if count:
+            self.repetitions[self.key] = count
+        else:
+            del self.repetitions[self.key]
+
+        side = -self.to_move
+        self.to_move = side
+        board[origin] = piece
+        if flag == EN_PASSANT:
+            board[target] = 0
+            board[target + (16 if side > 0 else -16)] = -PAWN * side
+        else:
+            board[target] = captured
+        if flag == CASTLE:
+            rook_from, rook_to = (origin + 3, origin + 1) if target > origin else (origin - 4, origin - 1)
+            board[rook_from] = board[rook_to]
+            board[rook_to] = 0
+        if piece * side == KING:
+            self.king_squares[side] = origin
+
+        self.castling = castling
+        self.ep_square = ep_square
+        self.halfmove = halfmove
+        self.key = key
+        self.score = score
+        self._legal = legal
+
+    def winner(self):
+        if self.halfmove >= 100 or self.repetitions.get(self.key, 0) >= 3:
+            return 0
+        if not self.legal_moves():
+            # ไม่มีการเดินที่ถูกต้อง: ถูกรุกจน = แพ้, ไม่ถูกรุก = เสมอ (stalemate)
+            return -self.to_move if self.in_check() else 0
+        return None
+
+    def hash_key(self):
+        return self.key
+
+    def evaluate(self):
+        """คะแนนวัสดุ + piece-square (อัปเดตแบบ incremental) จากมุมมองของฝ่ายที่จะเดิน"""
+        return self.score * self.to_move
+
+    def copy(self):
+        state = ChessState.__new__(ChessState)
+        state.board = list(self.board)
+        state.history = list(self.history)
+        state.to_move = self.to_move
+        state.castling = self.castling
+        state.ep_square = self.ep_square
+        state.halfmove = self.halfmove
+        state.score = self.score
+        state.key = self.key
+        state.king_squares = dict(self.king_squares)
+        state.repetitions = dict(self.repetitions)
+        state._legal = self._legal
+        return state
+
+    def perft(self, depth):
+        """นับจำนวนโหนดที่ความลึก `depth` (ใช้ตรวจความถูกต้องของการสร้างการเดิน)"""
+        if depth == 0:
+            return 1
+        nodes = 0
+        side = self.to_move
+        for move in self.pseudo_legal_moves():
+            self.play(move)
+            if not self.in_check(side):
+                nodes += self.perft(depth - 1)
+            self.undo()
+        return nodes
+
+
+class ChessSearch(MinimaxAgent):
+    """
+    Alpha-beta search for chess
+
+    Reuses MinimaxAgent's iterative deepening, transposition table and
+    killer/history bookkeeping, and adds:
+    - pseudo-legal move loop (illegal moves are rejected after make)
+    - quiescence search over captures with MVV-LVA ordering
+    - check extension, 50-move and repetition draws
+    """
+
+    def __init__(self, time_limit=1.0, max_depth=64, tt_size_bits=20):
+        super().__init__(game_type='Chess', time_limit=time_limit,
+                         max_depth=max_depth, tt_size_bits=tt_size_bits)
+
+    def _check_time(self):
+        self.nodes += 1
+        if self.nodes & 1023 == 0 and time.perf_counter() > self._deadline:
+            raise _SearchTimeout()
+
+    def _negamax(self, state, depth, alpha, beta, ply):
+        self._check_time()
+        # ตำแหน่งหมากรุกแทบไม่มีทางค้นจนจบเกม จึงถือว่าถึง horizon เสมอ
+        self._horizon_hit = True
+
+        # เสมอจากกฎ 50 ตาหรือตำแหน่งซ้ำ (ในการค้นหานับซ้ำครั้งเดียวก็พอ)
+        if state.halfmove >= 100 or state.repetitions.get(state.key, 0) >= 2:
+            return 0
+
+        side = state.to_move
+        in_check = state.in_check(side)
+        if in_check:
+            depth += 1
+        if depth <= 0:
+            return self._quiesce(state, alpha, beta)
+
+        alpha_orig = alpha
+        key = state.key
+        tt_move = None
+        entry = self.tt.probe(key)
+        if entry is not None:
+            incr('chess.tt_hits')
+            tt_move = entry[4]
+            if entry[1] >= depth:
+                score = self._score_from_tt(entry[2], ply)
+                flag = entry[3]
+                if flag == EXACT:
+                    return score
+                if flag == LOWER and score > alpha:
+                    alpha = score
+                elif flag == UPPER and score < beta:
+                    beta = score
+                if alpha >= beta:
+                    return score
+
+        best_score, best_move, legal = -WIN_SCORE - 1, None, 0
+        for move in self._ordered_moves(state, state.pseudo_legal_moves(), ply, tt_move):
+            state.play(move)
+            if state.in_check(side):
+                state.undo()
+                continue
+            legal += 1
+            try:
+                score = -self._negamax(state, depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                state.undo()
+            if score > best_score:
+                best_score, best_move = score, move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        # killer/history เก็บเฉพาะการเดินเงียบ
+                        if not state.board[move[1]] and not move[2] and move[3] != EN_PASSANT:
+                            self._record_cutoff(move, depth, ply)
+                        break
+
+        if not legal:
+            # ไม่มีการเดินที่ถูกต้อง: รุกจน หรือ stalemate
+            return -(WIN_SCORE - ply) if in_check else 0
+
+        if best_score <= alpha_orig:
+            flag = UPPER
+        elif best_score >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.tt.store(key, depth, self._score_to_tt(best_score, ply), flag, best_move)
+        return best_score
+
+    def _quiesce(self, state, alpha, beta):
+        """ค้นเฉพาะการกินจนตำแหน่งสงบ เพื่อลด horizon effect"""
+        self._check_time()
+        stand_pat = state.evaluate()
+        if stand_pat >= beta:
+            return stand_pat
+        if stand_pat > alpha:
+            alpha = stand_pat
+
+        side = state.to_move
+        for move in self._ordered_moves(state, state.pseudo_legal_moves(captures_only=True), -1):
+            state.play(move)
+            if state.in_check(side):
+                state.undo()
+                continue
+            try:
+                score = -self._quiesce(state, -beta, -alpha)
+            finally:
+                state.undo()
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+        return alpha
+
+    def _ordered_moves(self, state, moves, ply, tt_move=None):
+        """เรียงการเดิน: TT move, การกิน/โปรโมต (MVV-LVA), killer moves แล้วตาม history"""
+        board = state.board
+        if tt_move is None and ply == 0:
+            entry = self.tt.probe(state.key)
+            tt_move = entry[4] if entry is not None else None
+        killers = self.killers[ply] if 0 <= ply < len(self.killers) else ()
+        history = self.history
+
+        def priority(move):
+            if move == tt_move:
+                return 1 << 40
+            victim = board[move[1]]
+            if victim or move[2] or move[3] == EN_PASSANT:
+                # กินหมากที่มีค่ามากด้วยหมากที่มีค่าน้อยก่อน
+                return (1 << 30) + PIECE_VALUES.get(abs(victim), PAWN_VALUE) * 16 \
+                    - PIECE_VALUES[abs(board[move[0]])] // 100 + move[2] * 1000
+            if move in killers:
+                return 1 << 25
+            return history.get(move, 0)
+
+        return sorted(moves, key=priority, reverse=True)
+
+
+def _move_info(move):
+    origin, target, promotion, flag = move
+    return {
+        'from': [origin >> 4, origin & 7],
+        'to': [target >> 4, target & 7],
+        'promotion': PIECE_LETTERS[promotion] if promotion else None,
+        'castle': flag == CASTLE,
+        'en_passant': flag == EN_PASSANT,
+    }
+
+
+def get_valid_moves(state, row, col):
+    """
+    Legal moves of the piece at (row, col) for /api/get_valid_moves
+
+    Returns:
+        dict: {"row,col": {"capture": bool, "promotion": bool}} as used by chess.js
+    """
+    square = row * 16 + col
+    result = {}
+    for move in state.legal_moves():
+        if move[0] != square:
+            continue
+        key = f"{move[1] >> 4},{move[1] & 7}"
+        result[key] = {
+            'capture': bool(state.board[move[1]]) or move[3] == EN_PASSANT,
+            'promotion': bool(move[2]),
+        }
+    return result
+
+
+def _check_color(player_color):
+    if player_color not in ('white', 'black'):
+        raise ValueError(f"Unknown player color: {player_color}")
+    return player_color
+
+
+def _result_for_player(winner, player_color):
+    """แปลงผลของ engine (+1 white, -1 black, 0 เสมอ) เป็นผลที่ chess.js ใช้"""
+    if winner is None:
+        return None
+    if winner == 0:
+        return 'draw'
+    return 'player' if (winner > 0) == (player_color == 'white') else 'ai'
+
+
+def apply_move(state, from_row, from_col, to_row, to_col, promotion='Q', player_color='white'):
+    """
+    Play a move given by coordinates (for /api/make_move)
+
+    The state should be kept per session so castling and en passant
+    rights survive between requests.
+
+    Args:
+        player_color: the human player's color, 'white' or 'black' (chess.js playerColor)
+
+    Raises:
+        ValueError: if the move is not legal
+
+    Returns:
+        dict: new board, move, check, player_turn and the result, winner
+        being 'player', 'ai' or 'draw' as chess.js expects
+    """
+    _check_color(player_color)
+    origin, target = from_row * 16 + from_col, to_row * 16 + to_col
+    wanted = LETTER_PIECES.get((promotion or 'Q').upper(), QUEEN)
+    for move in state.legal_moves():
+        if move[0] == origin and move[1] == target and (not move[2] or move[2] == wanted):
+            state.play(move)
+            winner = state.winner()
+            return {
+                'board': state.to_board(),
+                'move': _move_info(move),
+                'check': state.in_check(),
+                'player_turn': winner is None and (state.to_move > 0) == (player_color == 'white'),
+                'game_over': winner is not None,
+                'winner': _result_for_player(winner, player_color),
+            }
+    raise ValueError("Illegal move")
+
+
+class ChessAgent:
+    """Chess AI for /api/ai_move"""
+
+    def __init__(self, time_limit=1.0):
+        self.search = ChessSearch(time_limit=time_limit)
+
+    def reset_for_new_game(self):
+        self.search.reset_for_new_game()
+
+    @instrumented('chess.choose_action')
+    def choose_action(self, state, player_color='white'):
+        """
+        Args:
+            state: ChessState of the session, or a chess.js board
+            player_color: the human player's color; with a bare board the AI moves the other color
+
+        Returns:
+            dict: move description (from, to, promotion ...) or None if the game is over
+        """
+        if not isinstance(state, ChessState):
+            state = ChessState.from_board(state, 'black' if _check_color(player_color) == 'white' else 'white')
+        move = self.search.search(state)
+        return _move_info(move) if move is not None else None
+
+
+# ทดสอบ Chess engine
+if __name__ == "__main__":
+    state = ChessState()
+    start = time.perf_counter()
+    print(f"perft(3) = {state.perft(3)} (expected 8902) in {time.perf_counter() - start:.2f}s")
+
+    kiwipete = ChessState('r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1')
+    print(f"kiwipete perft(2) = {kiwipete.perft(2)} (expected 2039)")
+
+    searcher = ChessSearch(time_limit=2.0)
+    move = searcher.search(ChessState('6k1/5ppp/8/8/8/8/5PPP/R5K1 w - - 0 1'))
+    print(f"Back-rank mate: {square_name(move[0])}{square_name(move[1])} {searcher.last_search_info}")
+
+    print("Test complete.")
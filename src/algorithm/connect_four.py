@@ -0,0 +1,483 @@
+import random
+import time
+from array import array
+
+from algorithm.game_rules import GameState
+from algorithm.instrumentation import incr, instrumented
+
+# Connect Four engine แบบ bitboard
+#
+# แต่ละคอลัมน์ใช้ 7 บิต (6 แถว + 1 บิตกันล้นด้านบน) เรียงคอลัมน์จากซ้ายไปขวา:
+#
+#   .  .  .  .  .  .  .
+#   5 12 19 26 33 40 47
+#   4 11 18 25 32 39 46
+#   3 10 17 24 31 38 45
+#   2  9 16 23 30 37 44
+#   1  8 15 22 29 36 43
+#   0  7 14 21 28 35 42
+#
+# ตำแหน่งเก็บเป็นจำนวนเต็มสองค่า: หมากของแต่ละฝ่าย (red, yellow) และ mask = หมากทั้งหมด
+# การเดินหนึ่งครั้งคือการบวก bit ล่างสุดของคอลัมน์เข้ากับ mask และการตรวจชนะคือ shift-and-mask
+
+WIDTH = 7
+HEIGHT = 6
+H1 = HEIGHT + 1
+CELLS = WIDTH * HEIGHT
+
+BOTTOM_MASK = sum(1 << (col * H1) for col in range(WIDTH))
+BOARD_MASK = BOTTOM_MASK * ((1 << HEIGHT) - 1)
+COLUMN_MASKS = [((1 << HEIGHT) - 1) << (col * H1) for col in range(WIDTH)]
+BOTTOM_BITS = [1 << (col * H1) for col in range(WIDTH)]
+TOP_BITS = [1 << (HEIGHT - 1 + col * H1) for col in range(WIDTH)]
+# ตำแหน่งบิตของช่องบนกระดานทั้ง 42 ช่อง (ไม่รวมบิตกันล้นของแต่ละคอลัมน์)
+CELL_BITS = [col * H1 + height for col in range(WIDTH) for height in range(HEIGHT)]
+
+# ลำดับคอลัมน์จากกลางออกไปด้านข้าง
+COLUMN_ORDER = [3, 2, 4, 1, 5, 0, 6]
+
+# ขอบเขตคะแนนของ solver: ชนะเร็วได้คะแนนมาก (คะแนน = จำนวนหมากที่เหลือของผู้ชนะ)
+MIN_SCORE = -(CELLS // 2) + 3
+MAX_SCORE = (CELLS + 1) // 2 - 3
+
+
+def has_four(bits):
+    """ตรวจว่ามีหมากเรียงกัน 4 ตัวในแนวใดแนวหนึ่งหรือไม่"""
+    # แนวนอน
+    m = bits & (bits >> H1)
+    if m & (m >> (2 * H1)):
+        return True
+    # แนวทแยง \
+    m = bits & (bits >> HEIGHT)
+    if m & (m >> (2 * HEIGHT)):
+        return True
+    # แนวทแยง /
+    m = bits & (bits >> (H1 + 1))
+    if m & (m >> (2 * (H1 + 1))):
+        return True
+    # แนวตั้ง
+    m = bits & (bits >> 1)
+    if m & (m >> 2):
+        return True
+    return False
+
+
+def winning_cells(position, mask):
+    """ช่องว่างทั้งหมดที่ถ้าฝ่าย `position` วางหมากแล้วจะต่อครบ 4 ตัว"""
+    # แนวตั้ง
+    r = (position << 1) & (position << 2) & (position << 3)
+    for p in (H1, H1 - 1, H1 + 1):
+        # แนวนอนและแนวทแยง
+        t = (position << p) & (position << (2 * p))
+        r |= t & (position << (3 * p))
+        r |= t & (position >> p)
+        t = (position >> p) & (position >> (2 * p))
+        r |= t & (position << p)
+        r |= t & (position >> (3 * p))
+    return r & (BOARD_MASK ^ mask)
+
+
+def _half(value):
+    """หารสองแบบปัดเข้าหาศูนย์"""
+    return value // 2 if value >= 0 else -((-value) // 2)
+
+
+def possible_moves(mask):
+    """bit ของช่องที่วางหมากได้ในแต่ละคอลัมน์"""
+    return (mask + BOTTOM_MASK) & BOARD_MASK
+
+
+class ConnectFourState(GameState):
+    """
+    Connect Four position on two bitboards
+
+    Moves are column indices; 'red' (+1) moves first as in connect_four.ts.
+    play(), undo() and the win check are O(1) bit operations.
+    """
+
+    SYMBOLS = {1: 'red', -1: 'yellow'}
+    ACTION_SIZE = WIDTH
+
+    def __init__(self, to_move=1):
+        self.boards = [0, 0]  # [หมากของ +1, หมากของ -1]
+        self.mask = 0
+        self.to_move = to_move
+        self.history = []  # คอลัมน์ที่เดิน
+        self._winner = None
+
+    @classmethod
+    def from_board(cls, board, to_move=None):
+        """
+        Create a state from the frontend board
+
+        Args:
+            board: 6x7 list (row 0 at the top) of 'red', 'yellow' or ''
+            to_move: 'red' / 'yellow'; inferred from the piece count if None
+        """
+        if to_move is None:
+            red = sum(cell == 'red' for row in board for cell in row)
+            yellow = sum(cell == 'yellow' for row in board for cell in row)
+            to_move = 'red' if red == yellow else 'yellow'
+        state = cls(1 if to_move == 'red' else -1)
+        for col in range(WIDTH):
+            # เติมจากแถวล่างสุดขึ้นไปจนเจอช่องว่าง
+            for height in range(HEIGHT):
+                cell = board[HEIGHT - 1 - height][col]
+                if not cell:
+                    break
+                bit = 1 << (col * H1 + height)
+                state.boards[0 if cell == 'red' else 1] |= bit
+                state.mask |= bit
+        if has_four(state.boards[0]):
+            state._winner = 1
+        elif has_four(state.boards[1]):
+            state._winner = -1
+        elif state.mask == BOARD_MASK:
+            state._winner = 0
+        return state
+
+    def to_board(self):
+        board = [[''] * WIDTH for _ in range(HEIGHT)]
+        for col in range(WIDTH):
+            for height in range(HEIGHT):
+                bit = 1 << (col * H1 + height)
+                if self.boards[0] & bit:
+                    board[HEIGHT - 1 - height][col] = 'red'
+                elif self.boards[1] & bit:
+                    board[HEIGHT - 1 - height][col] = 'yellow'
+        return board
+
+    @property
+    def moves_played(self):
+        return self.mask.bit_count()
+
+    def current_position(self):
+        """bitboard ของฝ่ายที่จะเดิน"""
+        return self.boards[0 if self.to_move > 0 else 1]
+
+    def can_play(self, col):
+        return not self.mask & TOP_BITS[col]
+
+    def legal_moves(self):
+        if self._winner is not None:
+            return []
+        mask = self.mask
+        return [col for col in COLUMN_ORDER if not mask & TOP_BITS[col]]
+
+    def play(self, move):
+        side = 0 if self.to_move > 0 else 1
+        bit = (self.mask + BOTTOM_BITS[move]) & COLUMN_MASKS[move]
+        self.mask |= bit
+        self.boards[side] |= bit
+        self.history.append(move)
+        if has_four(self.boards[side]):
+            self._winner = self.to_move
+        elif self.mask == BOARD_MASK:
+            self._winner = 0
+        self.to_move = -self.to_move
+
+    def undo(self):
+        col = self.history.pop()
+        column = self.mask & COLUMN_MASKS[col]
+        bit = 1 << (column.bit_length() - 1)  # หมากบนสุดของคอลัมน์
+        self.mask ^= bit
+        self.to_move = -self.to_move
+        self.boards[0 if self.to_move > 0 else 1] ^= bit
+        # ก่อนการเดินนี้เกมยังไม่จบ (ไม่มีการเดินต่อหลังเกมจบ)
+        self._winner = None
+
+    def winner(self):
+        return self._winner
+
+    def hash_key(self):
+        """position + mask ระบุตำแหน่งได้ไม่ซ้ำกัน (รวมฝ่ายที่จะเดินไว้แล้ว)"""
+        return self.current_position() + self.mask
+
+    def evaluate(self):
+        """ผลต่างจำนวนช่องที่จะทำให้ชนะ (threats) ระหว่างฝ่ายที่จะเดินกับฝ่ายตรงข้าม"""
+        own = self.current_position()
+        other = own ^ self.mask
+        return (winning_cells(own, self.mask).bit_count()
+                - winning_cells(other, self.mask).bit_count())
+
+    def copy(self):
+        state = ConnectFourState.__new__(ConnectFourState)
+        state.boards = list(self.boards)
+        state.mask = self.mask
+        state.to_move = self.to_move
+        state.history = list(self.history)
+        state._winner = self._winner
+        return state
+
+    def encode(self):
+        """หมากของฝ่ายที่จะเดิน 42 ช่อง ตามด้วยหมากของฝ่ายตรงข้าม 42 ช่อง (เรียงตามคอลัมน์)"""
+        own = self.current_position()
+        other = own ^ self.mask
+        return ([float(own >> bit & 1) for bit in CELL_BITS] +
+                [float(other >> bit & 1) for bit in CELL_BITS])
+
+    def move_index(self, move):
+        return move
+
+    def index_move(self, index):
+        return index
+
+    def random_playout(self, rng=random):
+        """
+        Random playout on local integers (no history, no undo needed)
+
+        The playout takes an immediate win when one exists, which keeps
+        random games far more realistic at almost no extra cost.
+        """
+        if self._winner is not None:
+            return self._winner
+        position = self.current_position()
+        mask = self.mask
+        player = self.to_move
+        choice = rng.choice
+        while True:
+            possible = possible_moves(mask)
+            if not possible:
+                return 0
+            win = winning_cells(position, mask) & possible
+            if win:
+                return player
+            columns = [col for col in COLUMN_ORDER if possible & COLUMN_MASKS[col]]
+            col = choice(columns)
+            bit = possible & COLUMN_MASKS[col]
+            position |= bit
+            mask |= bit
+            # สลับฝ่าย: position ของฝ่ายถัดไปคือหมากอีกฝ่าย
+            position ^= mask
+            player = -player
+
+
+class _SolverTimeout(Exception):
+    """หมดเวลาระหว่างการแก้ตำแหน่ง"""
+
+
+class ConnectFourSolver:
+    """
+    Exact Connect Four solver (negamax, alpha-beta, null-window search)
+
+    - Only non-losing moves are searched, ordered by the number of threats they create
+    - Transposition table of upper bounds in two flat arrays (key, value)
+    - solve() narrows the score with null-window searches
+
+    Scores follow the usual convention: positive if the player to move wins,
+    larger for faster wins; 0 for a draw.
+    """
+
+    def __init__(self, table_bits=21):
+        self.table_size = (1 << table_bits) + 1  # ขนาดคี่เพื่อกระจาย key ได้ดีขึ้น
+        self.keys = array('Q', bytes(8 * self.table_size))
+        self.values = array('b', bytes(self.table_size))
+        self.nodes = 0
+        self._deadline = None
+
+    def reset(self):
+        self.keys = array('Q', bytes(8 * self.table_size))
+        self.values = array('b', bytes(self.table_size))
+
+    def _negamax(self, position, mask, moves, alpha, beta):
+        self.nodes += 1
+        if self._deadline is not None and self.nodes & 4095 == 0 and time.perf_counter() > self._deadline:
+            raise _SolverTimeout()
+
+        # การเดินที่ไม่ทำให้แพ้ทันที (ฝ่ายที่จะเดินไม่มีทางชนะทันที ถูกตรวจก่อนเรียก)
+        possible = possible_moves(mask)
+        opponent_win = winning_cells(position ^ mask, mask)
+        forced = possible & opponent_win
+        if forced:
+            if forced & (forced - 1):
+                # ต้องกันสองจุดพร้อมกัน แพ้แน่นอน
+                return -((CELLS - moves) // 2)
+            possible = forced
+        next_moves = possible & ~(opponent_win >> 1)
+        if not next_moves:
+            return -((CELLS - moves) // 2)
+
+        if moves >= CELLS - 2:
+            return 0
+
+        # ขอบล่างของคะแนน: ฝ่ายตรงข้ามชนะได้เร็วที่สุดในตาถัดไป
+        lower = -((CELLS - 2 - moves) // 2)
+        if alpha < lower:
+            alpha = lower
+            if alpha >= beta:
+                return alpha
+
+        # ขอบบนของคะแนน: จาก TT หรือชนะได้เร็วที่สุดเท่าที่เป็นไปได้
+        upper = (CELLS - 1 - moves) // 2
+        key = position + mask
+        slot = key % self.table_size
+        # ค่า 0 คือช่องว่าง (key ของกระดานเปล่าก็เป็น 0 เท่ากับช่องที่ยังไม่ถูกใช้)
+        if self.keys[slot] == key and self.values[slot]:
+            upper = self.values[slot] + MIN_SCORE - 1
+        if beta > upper:
+            beta = upper
+            if alpha >= beta:
+                return beta
+
+        # เรียงการเดินตามจำนวน threat ที่สร้างได้ (มากก่อน)
+        candidates = []
+        for col in COLUMN_ORDER:
+            bit = next_moves & COLUMN_MASKS[col]
+            if bit:
+                score = winning_cells(position | bit, mask | bit).bit_count()
+                candidates.append((score, bit))
+        candidates.sort(key=lambda item: item[0], reverse=True)
+
+        for _, bit in candidates:
+            new_mask = mask | bit
+            score = -self._negamax(position ^ mask, new_mask, moves + 1, -beta, -alpha)
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+
+        self.keys[slot] = key
+        self.values[slot] = alpha - MIN_SCORE + 1
+        return alpha
+
+    def _solve(self, position, mask, moves):
+        """คะแนนที่แน่นอนของตำแหน่ง (ฝ่าย `position` จะเดิน)"""
+        if winning_cells(position, mask) & possible_moves(mask):
+            return (CELLS + 1 - moves) // 2
+        low = -((CELLS - moves) // 2)
+        high = (CELLS + 1 - moves) // 2
+        while low < high:
+            # ค้นหาแบบ null window รอบจุดกึ่งกลาง (เอนเข้าหา 0 ก่อน)
+            middle = low + (high - low) // 2
+            if middle <= 0 and _half(low) < middle:
+                middle = _half(low)
+            elif middle >= 0 and _half(high) > middle:
+                middle = _half(high)
+            result = self._negamax(position, mask, moves, middle, middle + 1)
+            if result <= middle:
+                high = result
+            else:
+                low = result
+        return low
+
+    @instrumented('connect_four.solve')
+    def solve(self, state, time_limit=None):
+        """
+        Exact score of the position for the player to move
+
+        Returns None if the time limit runs out before the position is solved.
+        """
+        if state.winner() is not None:
+            return 0 if state.winner() == 0 else -((CELLS + 2 - state.moves_played) // 2)
+        self.nodes = 0
+        self._deadline = None if time_limit is None else time.perf_counter() + time_limit
+        try:
+            return self._solve(state.current_position(), state.mask, state.moves_played)
+        except _SolverTimeout:
+            return None
+        finally:
+            incr('connect_four.solver_nodes', self.nodes)
+            self._deadline = None
+
+    @instrumented('connect_four.best_move')
+    def best_move(self, state, time_limit=1.0):
+        """
+        Perfect move for the player to move, or None if it cannot be proven in time
+
+        Returns:
+            tuple: (column, score)
+        """
+        moves = state.legal_moves()
+        if not moves:
+            return None
+        position = state.current_position()
+        mask = state.mask
+        played = state.moves_played
+
+        # ชนะได้ทันที
+        win = winning_cells(position, mask) & possible_moves(mask)
+        for col in moves:
+            if win & COLUMN_MASKS[col]:
+                return col, (CELLS + 1 - played) // 2
+
+        self.nodes = 0
+        self._deadline = None if time_limit is None else time.perf_counter() + time_limit
+        best_col, best_score = None, None
+        try:
+            for col in moves:
+                bit = (mask + BOTTOM_BITS[col]) & COLUMN_MASKS[col]
+                # คะแนนของเราคือค่าลบของคะแนนฝ่ายตรงข้ามหลังการเดิน
+                child_position, child_mask = position ^ mask, mask | bit
+                if winning_cells(child_position, child_mask) & possible_moves(child_mask):
+                    # การเดินนี้ปล่อยให้ฝ่ายตรงข้ามชนะได้ทันที
+                    score = -((CELLS + 1 - (played + 1)) // 2)
+                elif best_score is None:
+                    score = -self._solve(child_position, child_mask, played + 1)
+                else:
+                    # พิสูจน์แค่ว่าไม่ดีกว่าค่าปัจจุบัน ถ้าดีกว่าจึงค้นหาคะแนนจริง
+                    score = -self._negamax(child_position, child_mask, played + 1,
+                                           -(best_score + 1), -best_score)
+                    if score > best_score:
+                        score = -self._solve(child_position, child_mask, played + 1)
+                if best_score is None or score > best_score:
+                    best_col, best_score = col, score
+        except _SolverTimeout:
+            return None
+        finally:
+            incr('connect_four.solver_nodes', self.nodes)
+            self._deadline = None
+        return best_col, best_score
+
+
+class ConnectFourAgent:
+    """
+    Connect Four agent: exact solver with an MCTS fallback
+
+    The solver is tried first within `solve_time`; if the position is too
+    early to be proven in time the remaining budget goes to MCTS.
+    """
+
+    def __init__(self, time_limit=1.0, solve_time=0.5):
+        from algorithm.mcts import MCTS
+
+        self.time_limit = time_limit
+        self.solve_time = solve_time
+        self.solver = ConnectFourSolver()
+        self.mcts = MCTS(game_type='ConnectFour')
+
+    def reset_for_new_game(self):
+        self.mcts.reset_for_new_game()
+
+    @instrumented('connect_four.choose_action')
+    def choose_action(self, board, to_move=None):
+        state = ConnectFourState.from_board(board, to_move)
+        start = time.perf_counter()
+        result = self.solver.best_move(state, self.solve_time)
+        if result is not None:
+            incr('connect_four.solved_moves')
+            return result[0]
+        remaining = max(0.05, self.time_limit - (time.perf_counter() - start))
+        return self.mcts.search(state, time_limit=remaining, max_iterations=100000)
+
+
+# ทดสอบ Connect Four engine
+if __name__ == "__main__":
+    state = ConnectFourState()
+    for col in [3, 3, 3, 3, 2, 4, 2, 4, 4, 2, 5, 1, 1, 5]:
+        state.play(col)
+
+    for row in state.to_board():
+        print(' '.join(cell[0] if cell else '.' for cell in row))
+
+    solver = ConnectFourSolver()
+    start = time.perf_counter()
+    print(f"Best move: {solver.best_move(state, time_limit=5.0)}")
+    print(f"Solved in {time.perf_counter() - start:.3f}s ({solver.nodes} nodes)")
+
+    start = time.perf_counter()
+    playouts = 2000
+    for _ in range(playouts):
+        state.random_playout()
+    print(f"{playouts / (time.perf_counter() - start):.0f} random playouts/s")
+
+    print("Test complete.")
@@ -7,12 +7,14 @@ from tensorflow.keras.optimizers import Adam
 import random
 from collections import deque
 
+from algorithm.instrumentation import incr, instrumented, timer
+
 class DeepQNetwork:
     """
     Deep Q-Network (DQN) algorithm for game AI
     Uses deep learning to learn optimal strategy through reinforcement learning
     """
-    def __init__(self, state_size=(3, 3), action_size=9, learning_rate=0.001, gamma=0.95):
+    def __init__(self, state_size=(3, 3), action_size=9, learning_rate=0.001, gamma=0.95, load=True):
         self.state_size = state_size  # Board dimensions
         self.action_size = action_size  # Number of possible actions (9 for 3x3 board)
         self.memory = deque(maxlen=2000)  # Replay memory
@@ -24,7 +26,7 @@ class DeepQNetwork:
         self.model_path = 'dqn_model.h5'
         
         # Create network or load existing model
-        if os.path.exists(self.model_path):
+        if load and os.path.exists(self.model_path):
             self.model = load_model(self.model_path)
             print("Loaded existing DQN model")
         else:
@@ -76,13 +78,12 @@ class DeepQNetwork:
                     valid_actions.append(i * self.state_size[1] + j)
         return valid_actions
     
+    @instrumented('dqn.choose_action')
     def choose_action(self, board):
         """
         Choose action for current board state
         Uses epsilon-greedy policy (exploration vs. exploitation)
         """
-        # Convert board to state representation
-        state = self._board_to_state(board)
         valid_actions = self._get_valid_actions(board)
         
         # If no valid actions, return None
@@ -92,13 +93,24 @@ class DeepQNetwork:
         # Exploration: choose random action
         if np.random.rand() <= self.epsilon:
             action_idx = random.choice(valid_actions)
-        else:
-            # Exploitation: predict Q-values and choose best valid action
+            return (action_idx // self.state_size[1], action_idx % self.state_size[1])
+        return self.greedy_action(board)
+    
+    def greedy_action(self, board):
+        """Best valid action by predicted Q-value (no exploration)"""
+        # Convert board to state representation
+        state = self._board_to_state(board)
+        valid_actions = self._get_valid_actions(board)
+        if not valid_actions:
+            return None
+        
+        # Exploitation: predict Q-values and choose best valid action
+        with timer('dqn.predict'):
             q_values = self.model.predict(np.expand_dims(state, axis=0), verbose=0)[0]
-            
-            # Filter to only valid actions
-            valid_q_values = [(action, q_values[action]) for action in valid_actions]
-            action_idx = max(valid_q_values, key=lambda x: x[1])[0]
+        
+        # Filter to only valid actions
+        valid_q_values = [(action, q_values[action]) for action in valid_actions]
+        action_idx = max(valid_q_values, key=lambda x: x[1])[0]
         
         # Convert action index to board coordinates
         row = action_idx // self.state_size[1]
@@ -106,6 +118,58 @@ class DeepQNetwork:
         
         return (row, col)
     
+    @instrumented('dqn.choose_actions')
+    def choose_actions(self, boards, epsilon=None):
+        """
+        Epsilon-greedy actions for many boards with one predict call
+
+        Args:
+            boards: (N, rows, cols) array, 1 = own pieces, -1 = opponent, 0 = empty
+            epsilon: exploration rate (None = self.epsilon)
+
+        Returns:
+            (N,) action indices (row * cols + col)
+        """
+        boards = np.asarray(boards, dtype=np.float32)
+        valid = boards.reshape(len(boards), -1) == 0
+        with timer('dqn.predict'):
+            q_values = self.model.predict(boards[..., np.newaxis], verbose=0)
+        actions = np.where(valid, q_values, -np.inf).argmax(axis=1)
+        
+        explore = np.random.rand(len(boards)) <= (self.epsilon if epsilon is None else epsilon)
+        if explore.any():
+            noise = np.where(valid[explore], np.random.rand(int(explore.sum()), valid.shape[1]), -1)
+            actions[explore] = noise.argmax(axis=1)
+        return actions
+    
+    @instrumented('dqn.replay_batch')
+    def replay_batch(self, batch_size=256):
+        """
+        Train on a replay minibatch with batched predict/fit calls
+        
+        Same targets as learn_from_game, but two predict calls and one fit
+        for the whole minibatch instead of per sample.
+        """
+        if len(self.memory) < batch_size:
+            return
+        minibatch = random.sample(self.memory, batch_size)
+        states = np.array([sample[0] for sample in minibatch])
+        actions = np.array([sample[1] for sample in minibatch])
+        rewards = np.array([sample[2] for sample in minibatch], dtype=np.float32)
+        next_states = np.array([sample[3] for sample in minibatch])
+        dones = np.array([sample[4] for sample in minibatch])
+        
+        with timer('dqn.predict'):
+            next_q = self.model.predict(next_states, verbose=0).max(axis=1)
+            targets = self.model.predict(states, verbose=0)
+        targets[np.arange(batch_size), actions] = np.where(dones, rewards, rewards + self.gamma * next_q)
+        with timer('dqn.fit'):
+            self.model.fit(states, targets, epochs=1, verbose=0)
+        incr('dqn.samples_trained', batch_size)
+        
+        if self.epsilon > self.epsilon_min:
+            self.epsilon *= self.epsilon_decay
+    
     def record_memory(self, state, action, reward, next_state, done):
         """Store experience in replay memory"""
         action_idx = action[0] * self.state_size[1] + action[1]  # Convert (row, col) to index
@@ -119,6 +183,7 @@ class DeepQNetwork:
         self.current_state = state
         self.current_action = action
     
+    @instrumented('dqn.learn_from_game')
     def learn_from_game(self, reward):
         """
         Process game result and learn from it
@@ -137,17 +202,20 @@ class DeepQNetwork:
         
         for state, action, reward, next_state, done in minibatch:
             target = reward
-            if not done:
-                # Q-learning formula: Q(s,a) = r + γ max Q(s',a')
-                target = reward + self.gamma * np.amax(self.model.predict(np.expand_dims(next_state, axis=0), verbose=0)[0])
-            
-            # Get current Q-values
-            target_f = self.model.predict(np.expand_dims(state, axis=0), verbose=0)
+            with timer('dqn.predict'):
+                if not done:
+                    # Q-learning formula: Q(s,a) = r + γ max Q(s',a')
+                    target = reward + self.gamma * np.amax(self.model.predict(np.expand_dims(next_state, axis=0), verbose=0)[0])
+                
+                # Get current Q-values
+                target_f = self.model.predict(np.expand_dims(state, axis=0), verbose=0)
             # Update the Q-value for the action
             target_f[0][action] = target
             
             # Train the network
-            self.model.fit(np.expand_dims(state, axis=0), target_f, epochs=1, verbose=0)
+            with timer('dqn.fit'):
+                self.model.fit(np.expand_dims(state, axis=0), target_f, epochs=1, verbose=0)
+        incr('dqn.samples_trained', len(minibatch))
         
         # Save model periodically
         if random.random() < 0.1:  # 10% chance to save
@@ -175,18 +243,25 @@ class DeepQNetwork:
     def save_model(self):
         """Save trained model to file"""
         try:
-            self.model.save(self.model_path)
+            with timer('dqn.save'):
+                self.model.save(self.model_path)
+            incr('dqn.bytes_written', os.path.getsize(self.model_path))
             print("DQN model saved successfully")
         except Exception as e:
             print(f"Error saving DQN model: {e}")
     
-    def load_model(self):
-        """Load trained model from file"""
+    def load_model(self, path=None, strict=False):
+        """Load trained model from file (strict=True raises when it is missing or unreadable)"""
+        path = path or self.model_path
+        if strict and not os.path.exists(path):
+            raise FileNotFoundError(f"DQN model file not found: {path}")
         try:
-            if os.path.exists(self.model_path):
-                self.model = load_model(self.model_path)
+            if os.path.exists(path):
+                self.model = load_model(path)
                 print("DQN model loaded successfully")
         except Exception as e:
+            if strict:
+                raise
             print(f"Error loading DQN model: {e}")
 
 # Test code
@@ -0,0 +1,223 @@
+import glob
+import hashlib
+import os
+import struct
+import time
+from functools import lru_cache
+
+import numpy as np
+
+from algorithm.game_rules import GAME_CODES, GAME_NAMES, get_game_state_class
+from algorithm.instrumentation import incr, instrumented, timer
+
+# Game log แบบ append-only: ทุกเกมเป็น record ขนาดคงที่ 128 bytes ในไฟล์ segment
+# ที่ map เข้าหน่วยความจำได้โดยตรง (np.memmap) สำหรับการฝึกและวิเคราะห์แบบ offline
+#
+# การเดินเก็บตัวละ 1 byte:
+# - เกมที่มี ACTION_SIZE (TicTacToe, ConnectFour): GameState.move_index
+# - เกมอื่น (Checkers, Chess): ลำดับของการเดินใน state.legal_moves() ขณะนั้น
+
+MAX_MOVES = 105
+RECORD_DTYPE = np.dtype([
+    ('timestamp', '<f8'),
+    ('player', '<u8'),      # hash ของ player id
+    ('game', 'u1'),         # GAME_CODES
+    ('ai_mode', 'u1'),
+    ('ai_side', 'i1'),      # ฝ่ายของ AI: 1 = เดินก่อน, -1 = เดินทีหลัง, 0 = ไม่มี AI
+    ('result', 'i1'),       # ผู้ชนะ: 1 / -1 (ฝ่ายที่เดินก่อน / ทีหลัง), 0 = เสมอ
+    ('flags', 'u1'),
+    ('length', '<u2'),      # จำนวนการเดินทั้งหมดของเกม
+    ('moves', 'u1', (MAX_MOVES,)),
+])
+RECORD_SIZE = RECORD_DTYPE.itemsize  # 128
+RECORD_STRUCT = struct.Struct(f'<dQBBbbBH{MAX_MOVES}s')  # layout เดียวกับ RECORD_DTYPE สำหรับการเขียน
+
+FLAG_TRUNCATED = 1  # เกมยาวเกิน MAX_MOVES: เก็บเฉพาะการเดินแรก ๆ
+
+
+@lru_cache(maxsize=4096)
+def player_hash(player_id):
+    """แปลง player id (สตริง) เป็นเลข 64 บิตขนาดคงที่"""
+    return int.from_bytes(hashlib.blake2b(str(player_id).encode(), digest_size=8).digest(), 'little')
+
+
+def pack_moves(game_type, moves, start=None):
+    """แปลงการเดินเป็น bytes (ตัวละ 1 byte)"""
+    state_class = get_game_state_class(game_type)
+    if state_class.ACTION_SIZE is not None and state_class.ACTION_SIZE <= 256:
+        state = start or state_class()
+        return bytes(state.move_index(tuple(m) if isinstance(m, list) else m) for m in moves)
+    state = start.copy() if start is not None else state_class()
+    packed = bytearray()
+    for move in moves:
+        if isinstance(move, list):
+            move = tuple(move)
+        packed.append(state.legal_moves().index(move))
+        state.play(move)
+    return bytes(packed)
+
+
+def unpack_moves(game_type, packed, start=None):
+    """แปลง bytes กลับเป็นรายการการเดิน"""
+    state_class = get_game_state_class(game_type)
+    state = start.copy() if start is not None else state_class()
+    if state_class.ACTION_SIZE is not None and state_class.ACTION_SIZE <= 256:
+        return [state.index_move(int(index)) for index in packed]
+    moves = []
+    for index in packed:
+        move = state.legal_moves()[int(index)]
+        moves.append(move)
+        state.play(move)
+    return moves
+
+
+class GameLogWriter:
+    """
+    Appends finished games to segmented binary files
+
+    Records are buffered and written with one append per flush, so several
+    processes can log into the same directory.
+
+    Args:
+        directory: directory of the segment files
+        segment_records: records per segment file (65536 = 8 MB)
+        flush_records / flush_interval: buffer bound in records / seconds
+    """
+
+    def __init__(self, directory='game_log', segment_records=65536, flush_records=256, flush_interval=1.0):
+        self.directory = directory
+        self.segment_records = segment_records
+        self.flush_records = flush_records
+        self.flush_interval = flush_interval
+        self.buffer = bytearray(flush_records * RECORD_SIZE)
+        self.pending = 0
+        self.last_flush = time.time()
+        os.makedirs(directory, exist_ok=True)
+
+    def log_game(self, game_type, moves, result, ai_mode=0, player_id="default", ai_side=0, packed=False):
+        """
+        Log one finished game
+
+        Args:
+            moves: moves in the game's move format (or bytes when packed=True)
+            result: +1 / -1 (player who moved first / second) or 0 for a draw
+        """
+        if not packed:
+            moves = pack_moves(game_type, moves)
+        # struct เติม 0 ต่อท้าย moves และตัดส่วนที่เกิน MAX_MOVES ให้เอง
+        RECORD_STRUCT.pack_into(self.buffer, self.pending * RECORD_SIZE, time.time(), player_hash(player_id),
+                                GAME_CODES[game_type], ai_mode, ai_side, result,
+                                FLAG_TRUNCATED if len(moves) > MAX_MOVES else 0, len(moves), bytes(moves))
+        self.pending += 1
+        incr('gamelog.games')
+        if self.pending >= self.flush_records or time.time() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def _segment_path(self):
+        """segment ล่าสุดที่ยังไม่เต็ม (หรือ segment ใหม่)"""
+        segments = sorted(glob.glob(os.path.join(self.directory, 'segment_*.bin')))
+        if segments and os.path.getsize(segments[-1]) < self.segment_records * RECORD_SIZE:
+            return segments[-1]
+        number = int(os.path.basename(segments[-1])[8:14]) + 1 if segments else 0
+        return os.path.join(self.directory, f'segment_{number:06d}.bin')
+
+    def flush(self):
+        """เขียน record ที่ค้างอยู่ต่อท้าย segment ในการเขียนครั้งเดียว"""
+        if not self.pending:
+            return
+        try:
+            with timer('gamelog.flush'), open(self._segment_path(), 'ab') as f:
+                f.write(memoryview(self.buffer)[:self.pending * RECORD_SIZE])
+            incr('gamelog.bytes_written', self.pending * RECORD_SIZE)
+        except Exception as e:
+            print(f"Error writing game log: {e}")
+        self.pending = 0
+        self.last_flush = time.time()
+
+    def close(self):
+        self.flush()
+
+
+class GameLogReader:
+    """
+    Streams the game log as NumPy record batches (memory-mapped, no parsing)
+    """
+
+    def __init__(self, directory='game_log'):
+        self.directory = directory
+
+    def segments(self):
+        return sorted(glob.glob(os.path.join(self.directory, 'segment_*.bin')))
+
+    def __len__(self):
+        return sum(os.path.getsize(path) // RECORD_SIZE for path in self.segments())
+
+    @instrumented('gamelog.read')
+    def batches(self, batch_size=65536, game_type=None):
+        """
+        Yield record arrays (RECORD_DTYPE) of up to batch_size games
+
+        Args:
+            game_type: only games of this type (None = all)
+        """
+        code = GAME_CODES[game_type] if game_type is not None else None
+        for path in self.segments():
+            count = os.path.getsize(path) // RECORD_SIZE  # ไม่อ่าน record ที่ยังเขียนไม่ครบ
+            if not count:
+                continue
+            records = np.memmap(path, dtype=RECORD_DTYPE, mode='r', shape=(count,))
+            for start in range(0, count, batch_size):
+                batch = records[start:start + batch_size]
+                if code is not None:
+                    batch = batch[batch['game'] == code]
+                if len(batch):
+                    incr('gamelog.games_read', len(batch))
+                    yield batch
+
+    def games(self, game_type=None):
+        """Yield (game_type, moves, result, record) for each game (decoded moves)"""
+        for batch in self.batches(game_type=game_type):
+            for record in batch:
+                name = GAME_NAMES[int(record['game'])]
+                packed = record['moves'][:min(int(record['length']), MAX_MOVES)].tobytes()
+                yield name, unpack_moves(name, packed), int(record['result']), record
+
+
+# ทดสอบ Game log
+if __name__ == "__main__":
+    import tempfile
+
+    from algorithm.td_learning import batch_from_moves
+
+    directory = tempfile.mkdtemp()
+    writer = GameLogWriter(directory, segment_records=100000)
+    rng = np.random.default_rng(0)
+    games = 200000
+    moves = np.argsort(rng.random((games, 9)), axis=1).astype(np.uint8)
+    results = rng.integers(-1, 2, games)
+    start = time.perf_counter()
+    for i in range(games):
+        writer.log_game('TicTacToe', moves[i].tobytes(), int(results[i]), ai_mode=1, player_id="default",
+                        ai_side=1, packed=True)
+    writer.close()
+    elapsed = time.perf_counter() - start
+    print(f"Logged {games} games in {elapsed:.2f}s ({elapsed / games * 1e6:.1f} us per game)")
+
+    chess = get_game_state_class('Chess')()
+    chess_moves = []
+    for _ in range(4):
+        chess_moves.append(chess.legal_moves()[0])
+        chess.play(chess_moves[-1])
+    writer.log_game('Chess', chess_moves, 0, player_id="alice")
+    writer.close()
+
+    reader = GameLogReader(directory)
+    start = time.perf_counter()
+    scanned = 0
+    for batch in reader.batches(game_type='TicTacToe'):
+        states = batch_from_moves(batch['moves'][:, :9], batch['length'], batch['result'])
+        scanned += len(batch)
+    print(f"Scanned {scanned} of {len(reader)} games into training batches in {time.perf_counter() - start:.2f}s")
+    print(f"Chess game: {next(reader.games('Chess'))[:3]}")
+
+    print("Test complete.")
@@ -0,0 +1,256 @@
+import importlib
+import random
+
+# Game positions for the search agents (Minimax, MCTS ...)
+# ผู้เล่นแทนด้วย +1 (ฝ่ายที่เดินก่อน / 'X') และ -1
+
+
+def zobrist_table(size, seed):
+    """สร้างตารางเลขสุ่ม 64 บิตสำหรับ Zobrist hashing"""
+    rng = random.Random(seed)
+    return [rng.getrandbits(64) for _ in range(size)]
+
+
+class GameState:
+    """
+    Abstract game position used by the search agents
+
+    Subclasses keep a move history so that play() / undo() can update the
+    position in place instead of copying the board for every search node.
+    """
+    to_move = 1
+
+    # จำนวนช่องของ policy vector สำหรับ network (None ถ้าเกมยังไม่รองรับ)
+    ACTION_SIZE = None
+
+    @classmethod
+    def from_board(cls, board, to_move=None):
+        """สร้างตำแหน่งจากกระดานในรูปแบบที่ frontend/API ใช้"""
+        raise NotImplementedError
+
+    def to_board(self):
+        """แปลงตำแหน่งกลับเป็นกระดานในรูปแบบที่ frontend/API ใช้"""
+        raise NotImplementedError
+
+    def legal_moves(self):
+        """รายการการเดินที่ทำได้ในตำแหน่งปัจจุบัน"""
+        raise NotImplementedError
+
+    def play(self, move):
+        """เดินหมาก (แก้ไขตำแหน่งในที่)"""
+        raise NotImplementedError
+
+    def undo(self):
+        """ยกเลิกการเดินล่าสุด"""
+        raise NotImplementedError
+
+    def winner(self):
+        """+1 / -1 ถ้ามีผู้ชนะ, 0 ถ้าเสมอ, None ถ้าเกมยังไม่จบ"""
+        raise NotImplementedError
+
+    def is_terminal(self):
+        return self.winner() is not None
+
+    def hash_key(self):
+        """ค่า hash ของตำแหน่ง (รวมฝ่ายที่จะเดิน) สำหรับ transposition table"""
+        raise NotImplementedError
+
+    def evaluate(self):
+        """คะแนนประเมินแบบ heuristic จากมุมมองของฝ่ายที่จะเดิน"""
+        return 0
+
+    def copy(self):
+        raise NotImplementedError
+
+    def encode(self):
+        """Feature vector (list of floats) from the side-to-move perspective for the networks"""
+        raise NotImplementedError
+
+    def move_index(self, move):
+        """index ของการเดินใน policy vector (0 .. ACTION_SIZE - 1)"""
+        raise NotImplementedError
+
+    def index_move(self, index):
+        raise NotImplementedError
+
+    def random_playout(self, rng=random):
+        """
+        Play random moves until the game ends and return the winner
+
+        The position is restored before returning, so the caller can keep
+        using the same state object for the rest of the search.
+        """
+        played = 0
+        try:
+            while self.winner() is None:
+                self.play(rng.choice(self.legal_moves()))
+                played += 1
+            return self.winner()
+        finally:
+            for _ in range(played):
+                self.undo()
+
+
+# แนวชนะทั้งหมดของ Tic-Tac-Toe และแนวที่ผ่านแต่ละช่อง
+TICTACTOE_LINES = [(0, 1, 2), (3, 4, 5), (6, 7, 8),
+                   (0, 3, 6), (1, 4, 7), (2, 5, 8),
+                   (0, 4, 8), (2, 4, 6)]
+TICTACTOE_LINES_THROUGH = [[line for line in TICTACTOE_LINES if i in line] for i in range(9)]
+
+
+class TicTacToeState(GameState):
+    """Tic-Tac-Toe position with incremental Zobrist hashing"""
+
+    LINES = TICTACTOE_LINES
+    LINES_THROUGH = TICTACTOE_LINES_THROUGH
+    ACTION_SIZE = 9
+
+    # ค่าสุ่มสำหรับ (ช่อง, ผู้เล่น) และค่าสำหรับฝ่ายที่จะเดิน
+    ZOBRIST = zobrist_table(9 * 2 + 1, seed=9)
+    ZOBRIST_SIDE = ZOBRIST[18]
+
+    def __init__(self, cells=None, to_move=1):
+        self.cells = list(cells) if cells is not None else [0] * 9
+        self.to_move = to_move
+        self.history = []  # [(index, winner ก่อนเดิน)]
+        self._winner = None
+        self.key = 0
+        for i, cell in enumerate(self.cells):
+            if cell:
+                self.key ^= self.ZOBRIST[i * 2 + (cell < 0)]
+        if to_move < 0:
+            self.key ^= self.ZOBRIST_SIDE
+        self._winner = self._compute_winner()
+
+    @classmethod
+    def from_board(cls, board, to_move='X'):
+        """
+        Create a state from the 3x3 board used by the agents
+
+        Args:
+            board: 3x3 list of 'X', 'O' or None
+            to_move: symbol of the player to move (the AI plays 'X')
+        """
+        if to_move is None:
+            to_move = 'X'
+        cells = []
+        for row in board:
+            for cell in row:
+                cells.append(1 if cell == 'X' else -1 if cell == 'O' else 0)
+        return cls(cells, 1 if to_move == 'X' else -1)
+
+    def to_board(self):
+        symbols = {1: 'X', -1: 'O', 0: None}
+        return [[symbols[self.cells[r * 3 + c]] for c in range(3)] for r in range(3)]
+
+    def _compute_winner(self):
+        for a, b, c in self.LINES:
+            if self.cells[a] and self.cells[a] == self.cells[b] == self.cells[c]:
+                return self.cells[a]
+        if all(self.cells):
+            return 0
+        return None
+
+    def legal_moves(self):
+        if self._winner is not None:
+            return []
+        return [(i // 3, i % 3) for i in range(9) if not self.cells[i]]
+
+    def play(self, move):
+        index = move[0] * 3 + move[1]
+        player = self.to_move
+        self.history.append((index, self._winner))
+        self.cells[index] = player
+        self.key ^= self.ZOBRIST[index * 2 + (player < 0)] ^ self.ZOBRIST_SIDE
+        self.to_move = -player
+
+        # ตรวจเฉพาะแนวที่ผ่านช่องที่เพิ่งเดิน
+        cells = self.cells
+        for a, b, c in self.LINES_THROUGH[index]:
+            if cells[a] == cells[b] == cells[c] == player:
+                self._winner = player
+                return
+        if len(self.history) == 9 or all(cells):
+            self._winner = 0
+
+    def undo(self):
+        index, previous_winner = self.history.pop()
+        player = self.cells[index]
+        self.cells[index] = 0
+        self.key ^= self.ZOBRIST[index * 2 + (player < 0)] ^ self.ZOBRIST_SIDE
+        self.to_move = player
+        self._winner = previous_winner
+
+    def winner(self):
+        return self._winner
+
+    def hash_key(self):
+        return self.key
+
+    def evaluate(self):
+        """แนวที่ยังเปิดอยู่: +แนวที่มีแต่หมากฝ่ายที่จะเดิน, -แนวที่มีแต่หมากฝ่ายตรงข้าม"""
+        score = 0
+        cells = self.cells
+        for a, b, c in self.LINES:
+            total = cells[a] + cells[b] + cells[c]
+            filled = (cells[a] != 0) + (cells[b] != 0) + (cells[c] != 0)
+            if filled and abs(total) == filled:
+                score += total * filled
+        return score * self.to_move
+
+    def copy(self):
+        state = TicTacToeState.__new__(TicTacToeState)
+        state.cells = list(self.cells)
+        state.to_move = self.to_move
+        state.history = list(self.history)
+        state._winner = self._winner
+        state.key = self.key
+        return state
+
+    def encode(self):
+        """ช่องของฝ่ายที่จะเดิน 9 ค่า ตามด้วยช่องของฝ่ายตรงข้าม 9 ค่า"""
+        player = self.to_move
+        return ([1.0 if cell == player else 0.0 for cell in self.cells] +
+                [1.0 if cell == -player else 0.0 for cell in self.cells])
+
+    def move_index(self, move):
+        return move[0] * 3 + move[1]
+
+    def index_move(self, index):
+        return divmod(index, 3)
+
+
+# ชนิดของเกมที่ search agents รองรับ
+GAME_STATES = {
+    'TicTacToe': TicTacToeState,
+}
+
+# เกมที่มี engine อยู่ในโมดูลแยก (โหลดเมื่อใช้งานครั้งแรก)
+ENGINE_MODULES = {
+    'ConnectFour': ('algorithm.connect_four', 'ConnectFourState'),
+    'Checkers': ('algorithm.checkers', 'CheckersState'),
+    'Chess': ('algorithm.chess_engine', 'ChessState'),
+}
+
+# รหัสเกมแบบตัวเลข (ใช้ในข้อมูลแบบ binary เช่น trajectory ของ self-play และ game log)
+GAME_CODES = {'TicTacToe': 0, 'ConnectFour': 1, 'Checkers': 2, 'Chess': 3}
+GAME_NAMES = {code: name for name, code in GAME_CODES.items()}
+
+
+def register_game(game_type, state_class):
+    """ลงทะเบียนชนิดของเกมใหม่ให้ search agents ใช้ได้"""
+    GAME_STATES[game_type] = state_class
+
+
+def get_game_state_class(game_type):
+    if game_type not in GAME_STATES and game_type in ENGINE_MODULES:
+        module_name, class_name = ENGINE_MODULES[game_type]
+        GAME_STATES[game_type] = getattr(importlib.import_module(module_name), class_name)
+    if game_type not in GAME_STATES:
+        raise ValueError(f"Unsupported game type: {game_type}")
+    return GAME_STATES[game_type]
+
+
+def state_from_board(game_type, board, to_move=None):
+    """สร้าง GameState ของเกมที่ระบุจากกระดานที่ได้รับจาก API"""
+    return get_game_state_class(game_type).from_board(board, to_move)
@@ -4,12 +4,14 @@ import pickle
 import os
 from copy import deepcopy
 
+from algorithm.instrumentation import incr, instrumented, timer
+
 class GeneticAlgorithm:
     """
     Genetic Algorithm agent for playing Tic Tac Toe
     Uses a population of strategies that evolve over time
     """
-    def __init__(self, population_size=50, mutation_rate=0.1):
+    def __init__(self, population_size=50, mutation_rate=0.1, load=True):
         self.population_size = population_size
         self.mutation_rate = mutation_rate
         self.population = []  # List of strategies (weighted matrices)
@@ -17,7 +19,10 @@ class GeneticAlgorithm:
         self.best_strategy = None
         self.generation = 0
         self.init_population()
-        self.load_best_strategy()
+        if load:
+            self.load_best_strategy()
+        else:
+            self.best_strategy = self.population[0]
     
     def init_population(self):
         """Initialize the population with random strategies"""
@@ -33,16 +38,26 @@ class GeneticAlgorithm:
         """Reset the agent for a new game (no state needs to be maintained)"""
         pass
     
-    def load_best_strategy(self):
-        """Load the best strategy from file if available"""
-        best_strategy_file = 'best_genetic_strategy.pkl'
+    def load_best_strategy(self, path='best_genetic_strategy.pkl', strict=False):
+        """Load the best strategy from file if available
         
-        if os.path.exists(best_strategy_file):
+        Args:
+            strict: raise when the file is missing or unreadable instead of
+                    falling back to a strategy of the population
+        """
+        if strict and not os.path.exists(path):
+            raise FileNotFoundError(f"Genetic strategy file not found: {path}")
+        if os.path.exists(path):
             try:
-                with open(best_strategy_file, 'rb') as f:
-                    self.best_strategy = pickle.load(f)
-                    print("Loaded best genetic strategy from file.")
+                with open(path, 'rb') as f:
+                    strategy = np.asarray(pickle.load(f), dtype=float)
+                if strategy.shape != (10,):
+                    raise ValueError(f"Unexpected strategy shape: {strategy.shape}")
+                self.best_strategy = strategy
+                print("Loaded best genetic strategy from file.")
             except Exception as e:
+                if strict:
+                    raise
                 print(f"Error loading genetic strategy: {e}")
                 self.best_strategy = self.population[0] if self.population else None
         else:
@@ -52,8 +67,9 @@ class GeneticAlgorithm:
         """Save the best strategy to file"""
         if self.best_strategy is not None:
             try:
-                with open('best_genetic_strategy.pkl', 'wb') as f:
+                with timer('genetic.save'), open('best_genetic_strategy.pkl', 'wb') as f:
                     pickle.dump(self.best_strategy, f)
+                    incr('genetic.bytes_written', f.tell())
             except Exception as e:
                 print(f"Error saving best genetic strategy: {e}")
     
@@ -94,6 +110,7 @@ class GeneticAlgorithm:
         
         return features
     
+    @instrumented('genetic.choose_action')
     def choose_action(self, board):
         """Choose the best move according to the best evolved strategy
         
@@ -119,6 +136,7 @@ class GeneticAlgorithm:
                     
                     # Evaluate the resulting position
                     score = self.evaluate_board(new_board, strategy)
+                    incr('genetic.boards_evaluated')
                     
                     # Keep track of the best move
                     if score > best_score:
@@ -145,6 +163,7 @@ class GeneticAlgorithm:
         
         self.generation += num_generations
     
+    @instrumented('genetic.evolve_generation')
     def _evolve_one_generation(self):
         """Evolve the population by one generation using selection, crossover, and mutation"""
         # Selection: Select parents based on fitness
@@ -262,6 +281,46 @@ class GeneticAlgorithm:
                 
             self.fitness_scores[strategy_idx] += reward
     
+    @instrumented('genetic.evaluate_population')
+    def evaluate_population(self, game_simulator, games_per_strategy=10):
+        """Set each strategy's fitness to its average result over several games
+        
+        Args:
+            game_simulator: Function that simulates a game with a given strategy
+            games_per_strategy: Number of games to play per strategy
+        """
+        for i, strategy in enumerate(self.population):
+            total_score = 0
+            
+            # Play multiple games per strategy to get a better fitness estimate
+            for _ in range(games_per_strategy):
+                # Simulate game and get result
+                result = game_simulator(strategy)
+                total_score += result
+            
+            # Update fitness (average score across games)
+            self.fitness_scores[i] = total_score / games_per_strategy
+    
+    def top_strategies(self, count):
+        """Best strategies of the current population
+        
+        Returns:
+            list: (strategy copy, fitness) pairs, best first
+        """
+        order = np.argsort(self.fitness_scores)[::-1][:count]
+        return [(self.population[i].copy(), self.fitness_scores[i]) for i in order]
+    
+    def receive_migrants(self, migrants):
+        """Replace the worst strategies with strategies from another population
+        
+        Args:
+            migrants: list of (strategy, fitness) pairs
+        """
+        order = np.argsort(self.fitness_scores)
+        for idx, (strategy, fitness) in zip(order, migrants):
+            self.population[idx] = np.array(strategy, dtype=float)
+            self.fitness_scores[idx] = fitness
+    
     def play_tournament(self, game_simulator, generations=50, games_per_strategy=10):
         """Run a tournament to evolve better strategies
         
@@ -276,17 +335,7 @@ class GeneticAlgorithm:
             print(f"Generation {gen+1}/{generations}")
             
             # Play games with each strategy
-            for i, strategy in enumerate(self.population):
-                total_score = 0
-                
-                # Play multiple games per strategy to get a better fitness estimate
-                for _ in range(games_per_strategy):
-                    # Simulate game and get result
-                    result = game_simulator(strategy)
-                    total_score += result
-                
-                # Update fitness (average score across games)
-                self.fitness_scores[i] = total_score / games_per_strategy
+            self.evaluate_population(game_simulator, games_per_strategy)
             
             # Evolve to the next generation
             self._evolve_one_generation()
@@ -301,6 +350,7 @@ class GeneticAlgorithm:
         self.save_best_strategy()
         print(f"Tournament complete. Best strategy saved with fitness: {max(self.fitness_scores):.4f}")
     
+    @instrumented('genetic.learn_from_game')
     def learn_from_game(self, board, move, result):
         """Learn from a completed game
         
@@ -0,0 +1,250 @@
+import cProfile
+import functools
+import os
+import random
+import threading
+import time
+
+# Instrumentation for the game agents
+# - ตัวจับเวลาและตัวนับสำหรับแต่ละช่วงการทำงานของ agent (selection, rollout, predict, fit, save ...)
+# - ส่งออกเป็นข้อความรูปแบบ Prometheus
+# - สุ่มเก็บ cProfile dump ตามตัวแปรสภาพแวดล้อมหรือผ่าน request_profile()
+#
+# เมื่อปิดการทำงาน (ค่าเริ่มต้น) ทุกฟังก์ชันจะตรวจแค่ flag เดียวแล้วคืนค่าทันที
+
+METRICS_ENV = 'AI_METRICS'  # "1" เพื่อเปิดตัวจับเวลาและตัวนับ
+PROFILE_SAMPLE_ENV = 'AI_PROFILE_SAMPLE'  # สัดส่วนการเรียกที่จะถูก profile เช่น "0.01"
+PROFILE_DIR_ENV = 'AI_PROFILE_DIR'  # โฟลเดอร์เก็บไฟล์ .prof
+
+
+class _State:
+    """Global instrumentation state (shared by all agents in the process)"""
+
+    def __init__(self):
+        self.enabled = os.environ.get(METRICS_ENV, '0') == '1'
+        self.profile_sample_rate = float(os.environ.get(PROFILE_SAMPLE_ENV, '0') or 0)
+        self.profile_dir = os.environ.get(PROFILE_DIR_ENV, 'profiles')
+        self.profile_requests = 0  # จำนวนการเรียกที่ถูกขอให้ profile ผ่าน API
+        self.profiling = False  # cProfile ทำงานได้ครั้งละหนึ่งตัวต่อ process
+        self.lock = threading.Lock()
+        self.counters = {}  # name -> value
+        self.timers = {}  # name -> [count, total_seconds, max_seconds]
+
+
+_state = _State()
+
+
+class _NullTimer:
+    """Context manager that does nothing (used while instrumentation is disabled)"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    """Context manager that records the elapsed time of a block"""
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        record_time(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def enable():
+    """เปิดการเก็บตัวจับเวลาและตัวนับ"""
+    _state.enabled = True
+
+
+def disable():
+    """ปิดการเก็บตัวจับเวลาและตัวนับ"""
+    _state.enabled = False
+
+
+def is_enabled():
+    return _state.enabled
+
+
+def reset():
+    """ล้างค่าที่เก็บไว้ทั้งหมด"""
+    with _state.lock:
+        _state.counters.clear()
+        _state.timers.clear()
+
+
+def incr(name, value=1):
+    """เพิ่มค่าตัวนับ (เช่น iterations, nodes allocated, cache hits, bytes written)"""
+    if not _state.enabled:
+        return
+    with _state.lock:
+        _state.counters[name] = _state.counters.get(name, 0) + value
+
+
+def record_time(name, seconds):
+    """บันทึกเวลาที่ใช้ของช่วงการทำงานหนึ่ง"""
+    if not _state.enabled:
+        return
+    with _state.lock:
+        entry = _state.timers.get(name)
+        if entry is None:
+            _state.timers[name] = [1, seconds, seconds]
+        else:
+            entry[0] += 1
+            entry[1] += seconds
+            if seconds > entry[2]:
+                entry[2] = seconds
+
+
+def timer(name):
+    """
+    Time a block of code
+
+    Usage:
+        with timer('mcts.simulate'):
+            ...
+    """
+    if not _state.enabled:
+        return _NULL_TIMER
+    return _Timer(name)
+
+
+def snapshot():
+    """คืนสำเนาของตัวนับและตัวจับเวลาทั้งหมด"""
+    with _state.lock:
+        return {
+            'counters': dict(_state.counters),
+            'timers': {name: {'count': v[0], 'total': v[1], 'max': v[2]}
+                       for name, v in _state.timers.items()}
+        }
+
+
+def _metric_name(name, prefix):
+    """แปลงชื่อเช่น 'mcts.select' เป็นชื่อที่ใช้ได้ใน Prometheus"""
+    cleaned = ''.join(c if c.isalnum() else '_' for c in name)
+    return f"{prefix}{cleaned}"
+
+
+def export_prometheus(prefix='pokervsai_'):
+    """
+    Export all metrics in the Prometheus text exposition format
+
+    Counters become `<name>_total`, timers become a summary
+    (`<name>_seconds_count` / `<name>_seconds_sum`) plus a `<name>_seconds_max` gauge.
+    """
+    data = snapshot()
+    lines = []
+    for name, value in sorted(data['counters'].items()):
+        metric = _metric_name(name, prefix) + '_total'
+        lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric} {value}")
+    for name, entry in sorted(data['timers'].items()):
+        metric = _metric_name(name, prefix) + '_seconds'
+        lines.append(f"# TYPE {metric} summary")
+        lines.append(f"{metric}_count {entry['count']}")
+        lines.append(f"{metric}_sum {entry['total']:.9f}")
+        lines.append(f"# TYPE {metric}_max gauge")
+        lines.append(f"{metric}_max {entry['max']:.9f}")
+    return '\n'.join(lines) + '\n'
+
+
+def set_profile_sample_rate(rate):
+    """กำหนดสัดส่วนการเรียกที่จะถูก profile (0 = ปิด)"""
+    _state.profile_sample_rate = max(0.0, min(1.0, rate))
+
+
+def request_profile(count=1):
+    """ขอให้ profile การเรียก instrumented ครั้งถัดไป `count` ครั้ง"""
+    with _state.lock:
+        _state.profile_requests += count
+
+
+def _should_profile():
+    """ตัดสินใจว่าจะ profile การเรียกนี้หรือไม่"""
+    if _state.profiling:
+        return False
+    if _state.profile_requests > 0:
+        with _state.lock:
+            if _state.profile_requests > 0 and not _state.profiling:
+                _state.profile_requests -= 1
+                _state.profiling = True
+                return True
+        return False
+    if _state.profile_sample_rate > 0 and random.random() < _state.profile_sample_rate:
+        with _state.lock:
+            if not _state.profiling:
+                _state.profiling = True
+                return True
+    return False
+
+
+def _run_profiled(name, func, args, kwargs):
+    """เรียกฟังก์ชันภายใต้ cProfile แล้วเขียนผลลงไฟล์ .prof"""
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func, *args, **kwargs)
+    finally:
+        _state.profiling = False
+        try:
+            os.makedirs(_state.profile_dir, exist_ok=True)
+            filename = f"{_metric_name(name, '')}-{int(time.time() * 1000)}-{os.getpid()}.prof"
+            profiler.dump_stats(os.path.join(_state.profile_dir, filename))
+            incr('profiler.dumps')
+        except Exception as e:
+            print(f"Error writing profile dump: {e}")
+
+
+def instrumented(name):
+    """
+    Decorator for agent entry points (choose_action, learn_from_game, ...)
+
+    Records call count and duration under `name` and occasionally runs
+    the call under cProfile (see AI_PROFILE_SAMPLE / request_profile).
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if (not _state.enabled and not _state.profile_requests
+                    and not _state.profile_sample_rate):
+                return func(*args, **kwargs)
+
+            start = time.perf_counter()
+            try:
+                if _should_profile():
+                    return _run_profiled(name, func, args, kwargs)
+                return func(*args, **kwargs)
+            finally:
+                record_time(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+# ทดสอบ instrumentation
+if __name__ == "__main__":
+    enable()
+
+    @instrumented('demo.work')
+    def work(n):
+        with timer('demo.inner'):
+            total = sum(i * i for i in range(n))
+        incr('demo.iterations', n)
+        return total
+
+    for _ in range(5):
+        work(10000)
+
+    print(export_prometheus(), end='')
+    print("Test complete.")
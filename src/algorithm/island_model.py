@@ -0,0 +1,249 @@
+import multiprocessing
+import os
+import pickle
+import queue
+import random
+import time
+
+import numpy as np
+
+from algorithm.game_rules import TicTacToeState
+from algorithm.genetic_algorithm import GeneticAlgorithm
+from algorithm.instrumentation import incr, instrumented, timer
+
+# Island model ของ GeneticAlgorithm: ประชากรย่อยหลายกลุ่มวิวัฒนาการแยกกันใน process ของตัวเอง
+#
+# ทุก migration_interval รุ่น แต่ละเกาะส่งกลยุทธ์ที่ดีที่สุดให้เกาะถัดไปแบบวงแหวน (ring) ผ่าน Pipe
+# การรับไม่รอ: รับเฉพาะที่มาถึงแล้ว เกาะจึงไม่ต้องรอกันเหมือนประชากรรวมกลุ่มเดียว
+# และประชากรของแต่ละเกาะถูกบันทึกเป็น checkpoint (genetic_islands/island_00.pkl ...)
+
+
+def play_vs_random(strategy, rng=random):
+    """
+    Play one game as 'X' with the strategy against a random 'O'
+
+    Returns:
+        1 for a win, 0 for a draw, -1 for a loss
+    """
+    state = TicTacToeState()
+    weights = strategy[:9]
+    while state.winner() is None:
+        if state.to_move == 1:
+            # การประเมินเชิงเส้นแบบเดียวกับ choose_action: วาง X ที่ช่องว่างซึ่งมีน้ำหนักสูงสุด
+            empty = [i for i in range(9) if not state.cells[i]]
+            index = max(empty, key=lambda i: weights[i])
+            state.play(divmod(index, 3))
+        else:
+            state.play(rng.choice(state.legal_moves()))
+    return state.winner()
+
+
+def _checkpoint_path(checkpoint_dir, island_id):
+    return os.path.join(checkpoint_dir, f"island_{island_id:02d}.pkl")
+
+
+def _save_checkpoint(checkpoint_dir, island_id, ga, best):
+    path = _checkpoint_path(checkpoint_dir, island_id)
+    try:
+        os.makedirs(checkpoint_dir, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with timer('islands.checkpoint'), open(tmp, 'wb') as f:
+            pickle.dump({'generation': ga.generation, 'population': ga.population,
+                         'fitness_scores': ga.fitness_scores, 'best': best}, f)
+        os.replace(tmp, path)
+    except Exception as e:
+        print(f"Error saving island checkpoint: {e}")
+
+
+def _load_checkpoint(checkpoint_dir, island_id):
+    path = _checkpoint_path(checkpoint_dir, island_id)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    except Exception as e:
+        print(f"Error loading island checkpoint: {e}")
+        return None
+
+
+def _island_main(island_id, config, generations, seed, inbox, outbox, reports, stop, inherited=()):
+    """
+    วิวัฒนาการประชากรของเกาะหนึ่ง แล้วรายงานผลทุกรุ่นผ่าน reports queue
+
+    inherited: ปลาย pipe ของเกาะอื่นที่ได้มาจากการ fork (ปิดทิ้ง ไม่เช่นนั้นปลายทางที่จบแล้วยังดูเหมือนเปิดอยู่)
+    """
+    for connection in inherited:
+        connection.close()
+    random.seed(seed)
+    np.random.seed(seed % (1 << 32))
+    ga = GeneticAlgorithm(config['population_size'], config['mutation_rate'])
+    best = None  # (strategy, fitness) ที่ดีที่สุดที่เคยพบในเกาะนี้
+
+    checkpoint = _load_checkpoint(config['checkpoint_dir'], island_id)
+    if checkpoint is not None and len(checkpoint['population']) == ga.population_size:
+        ga.population = checkpoint['population']
+        ga.fitness_scores = checkpoint['fitness_scores']
+        ga.generation = checkpoint['generation']
+        best = checkpoint['best']
+
+    simulator = config['simulator']
+    rng = random.Random(seed)
+    target = ga.generation + generations
+    while ga.generation < target and not stop.is_set():
+        ga.evaluate_population(lambda strategy: simulator(strategy, rng), config['games_per_strategy'])
+        top = ga.top_strategies(config['migrants'])
+        if best is None or top[0][1] > best[1]:
+            best = top[0]
+
+        ga.generation += 1
+        if config['migration_interval'] and ga.generation % config['migration_interval'] == 0:
+            try:
+                outbox.send(top)
+                incr('islands.migrants_sent', len(top))
+            except OSError:
+                pass  # เกาะปลายทางจบการทำงานแล้ว
+        # รับผู้อพยพที่มาถึงแล้ว (ไม่รอ) แทนที่กลยุทธ์ที่แย่ที่สุด
+        while inbox.poll():
+            try:
+                migrants = inbox.recv()
+            except EOFError:
+                break
+            ga.receive_migrants(migrants)
+            incr('islands.migrants_received', len(migrants))
+
+        diversity = float(np.std(np.array(ga.population), axis=0).mean())
+        reports.put((island_id, ga.generation, float(top[0][1]), diversity, None))
+        ga._evolve_one_generation()
+
+        if config['checkpoint_interval'] and ga.generation % config['checkpoint_interval'] == 0:
+            _save_checkpoint(config['checkpoint_dir'], island_id, ga, best)
+    _save_checkpoint(config['checkpoint_dir'], island_id, ga, best)
+    reports.put((island_id, ga.generation, None, None, best))
+
+
+class IslandModel:
+    """
+    Runs several GeneticAlgorithm populations in parallel processes
+
+    Args:
+        islands: number of island processes (default: one per core)
+        population_size: strategies per island
+        migration_interval: generations between migrations (0 = no migration)
+        migrants: top strategies sent to the next island in the ring
+        checkpoint_dir: directory of the per-island population checkpoints
+        checkpoint_interval: generations between checkpoints
+        simulator: picklable function(strategy, rng) -> 1 / 0 / -1 (default play_vs_random)
+    """
+
+    def __init__(self, islands=None, population_size=50, mutation_rate=0.1, games_per_strategy=10,
+                 migration_interval=5, migrants=2, checkpoint_dir='genetic_islands', checkpoint_interval=5,
+                 simulator=play_vs_random):
+        self.islands = islands or multiprocessing.cpu_count() or 2
+        self.config = {
+            'population_size': population_size,
+            'mutation_rate': mutation_rate,
+            'games_per_strategy': games_per_strategy,
+            'migration_interval': migration_interval,
+            'migrants': migrants,
+            'checkpoint_dir': checkpoint_dir,
+            'checkpoint_interval': checkpoint_interval,
+            'simulator': simulator,
+        }
+        self.history = []  # (island, generation, best fitness, diversity)
+        self.best_strategy = None
+        self.best_fitness = None
+
+    @instrumented('islands.run')
+    def run(self, generations=50, agent=None, report_every=10):
+        """
+        Evolve every island for `generations` more generations
+
+        Args:
+            agent: GeneticAlgorithm that receives (and saves) the best strategy found
+            report_every: print progress every this many generations (0 = quiet)
+
+        Returns:
+            (best strategy, fitness)
+        """
+        context = multiprocessing.get_context()
+        reports = context.Queue()
+        stop = context.Event()
+        # วงแหวน: เกาะ i ส่งให้เกาะ i + 1
+        pipes = [context.Pipe(duplex=False) for _ in range(self.islands)]
+        # เมื่อ fork ทุกเกาะได้สำเนาของปลาย pipe ทั้งหมด จึงต้องปิดปลายที่ไม่ได้ใช้ในแต่ละเกาะ
+        # (spawn ส่งไปเฉพาะปลายที่อยู่ใน args อยู่แล้ว)
+        fork = context.get_start_method() == 'fork'
+        processes = []
+        for i in range(self.islands):
+            inbox, outbox = pipes[i][0], pipes[(i + 1) % self.islands][1]
+            inherited = [end for pair in pipes for end in pair if end is not inbox and end is not outbox] if fork else ()
+            processes.append(context.Process(
+                target=_island_main, daemon=True,
+                args=(i, self.config, generations, random.randrange(1 << 62), inbox, outbox, reports, stop, inherited)))
+        for process in processes:
+            process.start()
+        # ปิดปลาย pipe ใน process หลักด้วย: เมื่อไม่มี process ใดถือปลายรับของเกาะที่จบแล้ว
+        # การส่งไปยังเกาะนั้นจะได้ BrokenPipeError แทนการค้าง
+        for receiver, sender in pipes:
+            receiver.close()
+            sender.close()
+
+        start = time.time()
+        finished = {}
+        try:
+            while len(finished) < self.islands:
+                try:
+                    island_id, generation, fitness, diversity, best = reports.get(timeout=1.0)
+                except queue.Empty:
+                    if not any(p.is_alive() for p in processes):
+                        print("Error: island processes exited without reporting")
+                        break
+                    continue
+                if best is not None or fitness is None:
+                    finished[island_id] = best
+                    continue
+                self.history.append((island_id, generation, fitness, diversity))
+                if report_every and island_id == 0 and generation % report_every == 0:
+                    latest = {}
+                    for island, _, island_fitness, island_diversity in self.history:
+                        latest[island] = (island_fitness, island_diversity)
+                    print(f"Generation {generation}: best fitness "
+                          f"{max(f for f, _ in latest.values()):.3f}, mean diversity "
+                          f"{np.mean([d for _, d in latest.values()]):.3f} ({time.time() - start:.1f}s)")
+        finally:
+            stop.set()
+            for process in processes:
+                process.join(timeout=5.0)
+                if process.is_alive():
+                    process.terminate()
+
+        candidates = [best for best in finished.values() if best is not None]
+        if candidates:
+            self.best_strategy, self.best_fitness = max(candidates, key=lambda item: item[1])
+        if agent is not None and self.best_strategy is not None:
+            agent.best_strategy = self.best_strategy.copy()
+            agent.save_best_strategy()
+        return self.best_strategy, self.best_fitness
+
+
+# ทดสอบ Island model
+if __name__ == "__main__":
+    import tempfile
+
+    checkpoint_dir = os.path.join(tempfile.mkdtemp(), 'genetic_islands')
+    for islands in (1, 4):
+        model = IslandModel(islands=islands, population_size=30, games_per_strategy=20,
+                            checkpoint_dir=f"{checkpoint_dir}_{islands}")
+        start = time.perf_counter()
+        strategy, fitness = model.run(generations=20, report_every=0)
+        elapsed = time.perf_counter() - start
+        print(f"{islands} island(s): {islands * 20 / elapsed:.1f} island-generations/s, best fitness {fitness:.3f}")
+
+    # ทำต่อจาก checkpoint
+    strategy, fitness = model.run(generations=5, report_every=5)
+    print(f"Resumed to generation {max(g for _, g, _, _ in model.history)}, "
+          f"checkpoints: {sorted(os.listdir(f'{checkpoint_dir}_4'))}")
+    wins = sum(play_vs_random(strategy) == 1 for _ in range(1000))
+    print(f"Best strategy wins {wins / 10:.1f}% against random play")
+    print("Test complete.")
@@ -1,33 +1,36 @@
 import math
 import random
+import threading
 import time
-from copy import deepcopy
+from algorithm.game_rules import get_game_state_class, state_from_board
+from algorithm.instrumentation import incr, instrumented, timer
 
 class Node:
-    """Node in the Monte Carlo Tree Search"""
+    """
+    Node in the Monte Carlo Tree Search
+    
+    Only the action and the statistics are stored (in __slots__); the
+    position is obtained by replaying the actions from the root. The list
+    of untried actions is created on the first expansion and the children
+    list with the first child, so unexpanded leaves stay small.
+    """
+    
+    __slots__ = ('parent', 'action', 'player', 'children', 'visits', 'wins', 'untried_actions')
     
     def __init__(self, state, parent=None, action=None):
-        self.state = state  # Current game state (board)
         self.parent = parent  # Parent node
         self.action = action  # Action that led to this state
-        self.children = []  # Child nodes
+        self.player = -state.to_move  # Player who made `action`
+        self.children = None  # Child nodes (list, created with the first child)
         self.visits = 0  # Number of visits to this node
-        self.wins = 0  # Number of wins from this node (for the AI)
-        self.untried_actions = self._get_untried_actions()  # Actions not yet explored
-    
-    def _get_untried_actions(self):
-        """Get list of untried actions from the current state"""
-        if hasattr(self.state, 'get_valid_moves'):
-            valid_moves = []
-            for row in range(len(self.state)):
-                for col in range(len(self.state[0])):
-                    if self.state[row][col] is None:
-                        valid_moves.append((row, col))
-            return valid_moves
-        else:
-            # ใช้สำหรับสถานะเกมทั่วไปที่ไม่มีเมธอด get_valid_moves
-            return [(row, col) for row in range(3) for col in range(3) 
-                   if self.state[row][col] is None]
+        self.wins = 0  # Wins from this node for `self.player`
+        self.untried_actions = None  # Actions not yet explored (None = not computed yet)
+    
+    def pending_actions(self, state):
+        """Untried actions; `state` is this node's position (used on the first call only)"""
+        if self.untried_actions is None:
+            self.untried_actions = list(state.legal_moves())
+        return self.untried_actions
     
     def select_child(self, exploration_weight=1.0):
         """
@@ -41,7 +44,7 @@ class Node:
         # c = exploration weight
         
         # Prevent division by zero
-        if self.visits == 0:
+        if self.visits == 0 or not self.children:
             return None
         
         # Select the child with the highest UCB value
@@ -56,13 +59,15 @@ class Node:
         return self.children[ucb_values.index(max(ucb_values))]
     
     def add_child(self, action, state):
-        """Add a new child node"""
+        """Add a new child node (state is the position after `action`)"""
         child = Node(state=state, parent=self, action=action)
         
         # Remove the action from untried actions
-        if action in self.untried_actions:
+        if self.untried_actions and action in self.untried_actions:
             self.untried_actions.remove(action)
         
+        if self.children is None:
+            self.children = []
         self.children.append(child)
         return child
     
@@ -72,148 +77,394 @@ class Node:
         self.wins += result
 
 class MCTS:
-    """Monte Carlo Tree Search algorithm"""
+    """
+    Monte Carlo Tree Search algorithm
+    
+    Searches any game registered in algorithm.game_rules through the
+    GameState interface (legal_moves / play / undo / winner).
+    
+    The tree is kept between moves: when the next search starts from a
+    position already in the tree (after the AI's move and the opponent's
+    reply) that subtree becomes the new root. With ponder=True the search
+    continues in a background thread on the opponent's time.
     
-    def __init__(self, exploration_weight=1.0):
+    With adaptive=True the time budget is managed per move: the search
+    stops as soon as the most visited move can no longer be overtaken (or
+    its confidence bound separates from the rest) and gets up to
+    max_extension more time (and iterations) when the decision is still
+    unstable, so time_limit is not a hard bound; use adaptive=False for one.
+    
+    With max_nodes set the tree is kept below that many nodes: when it
+    grows past the cap, the least visited subtrees are pruned until
+    prune_fraction of the cap remains (their actions become untried again).
+    """
+    
+    # ระยะเวลาทำงานต่อรอบของ thread pondering ก่อนพักตามสัดส่วน CPU
+    PONDER_SLICE = 0.05
+    # ตรวจเงื่อนไขหยุดก่อนเวลาทุกกี่ iteration และจำนวน iteration ขั้นต่ำก่อนใช้ confidence bound
+    CHECK_INTERVAL = 64
+    MIN_CONFIDENCE_ITERATIONS = 256
+    
+    def __init__(self, exploration_weight=1.0, game_type='TicTacToe', ponder=False,
+                 ponder_cpu_share=0.5, ponder_budget=10.0, adaptive=True,
+                 max_extension=0.5, confidence_delta=0.05, max_nodes=None, prune_fraction=0.75):
         self.exploration_weight = exploration_weight
+        self.game_type = game_type
+        self.adaptive = adaptive
+        self.max_extension = max_extension  # เวลาเพิ่มสูงสุด (สัดส่วนของ time_limit) ในตำแหน่งวิกฤต
+        self.confidence_delta = confidence_delta
+        self.max_nodes = max_nodes
+        self.prune_fraction = prune_fraction
+        self.node_count = 0  # จำนวน node ในต้นไม้ (นับเมื่อใช้ max_nodes)
         self.root = None
+        self.ponder = ponder
+        self.ponder_cpu_share = ponder_cpu_share  # สัดส่วนเวลาที่ thread pondering ได้ใช้ CPU
+        self.ponder_budget = ponder_budget  # เวลา CPU สูงสุด (วินาที) ต่อการ ponder หนึ่งครั้ง
+        self.last_search_info = {}
+        self._root_state = None
+        self._ponder_thread = None
+        self._ponder_stop = None
     
     def reset_for_new_game(self):
         """Reset the search tree for a new game"""
+        self.stop_pondering()
         self.root = None
+        self._root_state = None
     
-    def choose_action(self, board, time_limit=1.0, max_iterations=1000):
+    @instrumented('mcts.choose_action')
+    def choose_action(self, board, time_limit=1.0, max_iterations=1000, to_move=None):
         """
         Choose the best action using MCTS within a time limit
         
         Args:
-            board: The current state of the game board
-            time_limit: Maximum time (in seconds) for MCTS
-            max_iterations: Maximum number of iterations
+            board: The current state of the game board (format of the selected game type)
+            time_limit: Time budget (in seconds) for MCTS; with adaptive=True an
+                unstable decision may use up to time_limit * (1 + max_extension)
+            max_iterations: Iteration budget, extended by the same factor
+            to_move: Symbol of the AI player (game default if None)
             
         Returns:
-            tuple: Best action (row, col)
+            Best action ((row, col) for Tic-Tac-Toe, column for Connect Four ...)
+        """
+        state = state_from_board(self.game_type, board, to_move)
+        return self.search(state, time_limit, max_iterations)
+    
+    def search(self, state, time_limit=1.0, max_iterations=1000):
         """
-        # Create a deep copy of the board to avoid modifying the original
-        board_copy = deepcopy(board)
+        Run MCTS from a GameState and return the most visited action
+
+        time_limit and max_iterations are hard bounds only with adaptive=False;
+        otherwise both can be extended by max_extension (see the class docstring).
+        """
+        # หยุด pondering ก่อน เพื่อให้มีเพียง thread เดียวที่แก้ไขต้นไม้
+        self.stop_pondering()
         
-        # Initialize the root node with the current board state
-        self.root = Node(state=board_copy)
+        # Work on a private copy; the search plays and undoes moves in place
+        state = state.copy()
+        
+        # Reuse the subtree of this position if the previous search reached it
+        self.root = self._find_subtree(state)
+        self.root.pending_actions(state)
+        reused_visits = self.root.visits
+        if self.max_nodes:
+            self.node_count = self._count_nodes(self.root)
+        if not self.root.untried_actions and not self.root.children:
+            return None
+        self._root_state = state.copy()
         
         # Run MCTS within time limit or iteration limit
         start_time = time.time()
+        deadline = start_time + time_limit
+        iteration_cap = max_iterations
         iterations = 0
+        nodes_allocated = 0
+        extended = False
+        stop_reason = None
         
-        while (time.time() - start_time < time_limit and 
-               iterations < max_iterations):
-            # Phase 1: Selection
-            node = self._select(self.root)
-            
-            # Phase 2: Expansion
-            if node.untried_actions:
-                # If there are untried actions, expand the node
-                action = random.choice(node.untried_actions)
-                
-                # Create a deep copy of the state
-                state_copy = deepcopy(node.state)
-                
-                # Apply the action
-                state_copy[action[0]][action[1]] = 'X'  # AI's move
-                
-                # Add the new child node
-                node = node.add_child(action, state_copy)
-            
-            # Phase 3: Simulation
-            result = self._simulate(node.state)
-            
-            # Phase 4: Backpropagation
-            self._backpropagate(node, result)
+        if len(self.root.children or ()) + len(self.root.untried_actions) == 1:
+            # มีการเดินเดียว ไม่ต้องค้นหา
+            stop_reason = 'single_move'
+        
+        while stop_reason is None:
+            now = time.time()
+            if now >= deadline or iterations >= iteration_cap:
+                if self.adaptive and not extended and self._is_critical():
+                    # ตำแหน่งที่ยังตัดสินใจไม่ได้ชัดเจน: ให้เวลาเพิ่มหนึ่งครั้ง
+                    extended = True
+                    deadline = start_time + time_limit * (1 + self.max_extension)
+                    iteration_cap = int(max_iterations * (1 + self.max_extension))
+                    continue
+                stop_reason = 'time' if now >= deadline else 'iterations'
+                break
             
+            nodes_allocated += self._iterate(state)
             iterations += 1
+            
+            if self.adaptive and iterations % self.CHECK_INTERVAL == 0:
+                stop_reason = self._early_stop(iterations, now - start_time,
+                                               deadline - now, iteration_cap - iterations)
+        
+        time_used = time.time() - start_time
+        incr('mcts.iterations', iterations)
+        incr('mcts.rollouts', iterations)
+        incr('mcts.nodes_allocated', nodes_allocated)
+        incr('mcts.reused_visits', reused_visits)
+        incr(f'mcts.stop.{stop_reason}')
+        self.last_search_info = {
+            'iterations': iterations,
+            'reused_visits': reused_visits,
+            'time_used': time_used,
+            'time_limit': time_limit,
+            'stop_reason': stop_reason,
+            'extended': extended,
+        }
         
         # Choose the best child of the root based on the most visits
         if not self.root.children:
-            # If no children (shouldn't happen with a valid board)
-            valid_moves = [(r, c) for r in range(3) for c in range(3) 
-                         if board[r][c] is None]
-            return random.choice(valid_moves) if valid_moves else (0, 0)
+            return random.choice(self.root.untried_actions)
         
         # Select the child with the most visits
         visits = [child.visits for child in self.root.children]
         best_child = self.root.children[visits.index(max(visits))]
         
+        if self.ponder:
+            self.start_pondering(best_child)
         return best_child.action
     
-    def _select(self, node):
+    def _early_stop(self, iterations, elapsed, remaining_time, remaining_iterations):
+        """
+        Reason to stop before the budget runs out, or None
+        
+        - visit_lead: the remaining iterations cannot give another move more visits
+        - confidence: the Hoeffding lower bound of the best move's value is above
+          the upper bound of every other move
+        """
+        root = self.root
+        if root.untried_actions or len(root.children or ()) < 2 or elapsed <= 0:
+            return None
+        remaining = min(remaining_iterations, iterations / elapsed * remaining_time)
+        children = sorted(root.children, key=lambda child: child.visits, reverse=True)
+        best, second = children[0], children[1]
+        if best.visits - second.visits > remaining:
+            return 'visit_lead'
+        
+        if iterations >= self.MIN_CONFIDENCE_ITERATIONS:
+            # ผลลัพธ์อยู่ในช่วง [-1, 1] จึงมีรัศมี sqrt(2 ln(1/delta) / n)
+            scale = 2.0 * math.log(1.0 / self.confidence_delta)
+            lower = best.wins / best.visits - math.sqrt(scale / best.visits)
+            upper = max(child.wins / child.visits + math.sqrt(scale / child.visits)
+                        for child in children[1:] if child.visits > 0)
+            if lower > upper:
+                return 'confidence'
+        return None
+    
+    def _is_critical(self):
+        """
+        The decision is still unstable: the most visited move is not the
+        best valued one, or the two most visited moves are close
+        """
+        children = [child for child in self.root.children or () if child.visits > 0]
+        if len(children) < 2:
+            return False
+        by_visits = max(children, key=lambda child: child.visits)
+        by_value = max(children, key=lambda child: child.wins / child.visits)
+        if by_visits is not by_value:
+            return True
+        visits = sorted((child.visits for child in children), reverse=True)
+        return visits[0] - visits[1] < 0.1 * visits[0]
+    
+    def _iterate(self, state):
+        """
+        One MCTS iteration from self.root (state must be the root position)
+        Returns the number of nodes allocated
+        """
+        depth = 0
+        allocated = 0
+        
+        # Phase 1: Selection
+        with timer('mcts.select'):
+            node = self.root
+            while not node.pending_actions(state) and node.children:
+                node = node.select_child(self.exploration_weight)
+                state.play(node.action)
+                depth += 1
+        
+        # Phase 2: Expansion
+        if node.untried_actions:
+            with timer('mcts.expand'):
+                # If there are untried actions, expand the node
+                action = random.choice(node.untried_actions)
+                state.play(action)
+                depth += 1
+                
+                # Add the new child node
+                node = node.add_child(action, state)
+            allocated = 1
+        
+        # Phase 3: Simulation
+        with timer('mcts.simulate'):
+            winner = self._simulate(state)
+        
+        # Phase 4: Backpropagation
+        with timer('mcts.backpropagate'):
+            self._backpropagate(node, winner)
+        
+        # Restore the root position
+        for _ in range(depth):
+            state.undo()
+        
+        if self.max_nodes:
+            self.node_count += allocated
+            if self.node_count > self.max_nodes:
+                self._prune()
+        return allocated
+    
+    @staticmethod
+    def _count_nodes(root):
+        count = 0
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            count += 1
+            if node.children:
+                stack.extend(node.children)
+        return count
+    
+    @instrumented('mcts.prune')
+    def _prune(self):
         """
-        Select a node for expansion
-        Traverse the tree from the root to a leaf node using UCB1
+        Drop the least visited subtrees until prune_fraction of max_nodes remains
+        
+        A child never has more visits than its parent, so every node at or
+        below a visit threshold lies in a subtree whose root is at or below
+        it too: cutting the children at or below the threshold removes
+        exactly those nodes.
         """
-        while not node.untried_actions and node.children:
-            node = node.select_child(self.exploration_weight)
+        visits = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            visits.append(node.visits)
+            if node.children:
+                stack.extend(node.children)
+        keep = max(1, int(self.max_nodes * self.prune_fraction))
+        if len(visits) <= keep:
+            self.node_count = len(visits)
+            return
+        visits.sort(reverse=True)
+        threshold = visits[keep]
+        
+        remaining = 0
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            remaining += 1
+            if not node.children:
+                continue
+            kept = []
+            for child in node.children:
+                if child.visits > threshold:
+                    kept.append(child)
+                else:
+                    # การเดินนี้กลับไปเป็น untried และขยายใหม่ได้ภายหลัง
+                    child.parent = None
+                    node.untried_actions.append(child.action)
+            node.children = kept or None
+            stack.extend(kept)
+        incr('mcts.nodes_pruned', len(visits) - remaining)
+        self.node_count = remaining
+    
+    def _find_subtree(self, state):
+        """
+        Node for `state` from the previous tree (root, a child or a grandchild)
+        or a fresh root if the position is not in the tree
+        """
+        if self.root is not None and self._root_state is not None:
+            key = state.hash_key()
+            previous = self._root_state.copy()
+            if previous.hash_key() == key:
+                return self.root
+            for child in self.root.children or ():
+                previous.play(child.action)
+                if previous.hash_key() == key:
+                    return self._detach(child)
+                for grandchild in child.children or ():
+                    previous.play(grandchild.action)
+                    found = previous.hash_key() == key
+                    previous.undo()
+                    if found:
+                        return self._detach(grandchild)
+                previous.undo()
+        return Node(state=state)
+    
+    @staticmethod
+    def _detach(node):
+        node.parent = None
+        incr('mcts.subtree_reuse')
         return node
     
+    def start_pondering(self, node):
+        """
+        Continue searching below `node` (the AI's chosen move) in a background thread
+        
+        The thread works in short slices and sleeps in between so it uses at
+        most ponder_cpu_share of a core, and stops after ponder_budget CPU
+        seconds or when stop_pondering() is called.
+        """
+        self.stop_pondering()
+        state = self._root_state.copy()
+        state.play(node.action)
+        self.root = self._detach(node)
+        self._root_state = state.copy()
+        node.pending_actions(state)
+        if self.max_nodes:
+            self.node_count = self._count_nodes(node)
+        if not node.untried_actions and not node.children:
+            return
+        self._ponder_stop = threading.Event()
+        self._ponder_thread = threading.Thread(target=self._ponder, args=(state, self._ponder_stop),
+                                               daemon=True)
+        self._ponder_thread.start()
+    
+    def stop_pondering(self):
+        """Stop the background search (the current iteration is finished first)"""
+        if self._ponder_thread is not None:
+            self._ponder_stop.set()
+            self._ponder_thread.join()
+            self._ponder_thread = None
+    
+    def _ponder(self, state, stop):
+        cpu_start = time.thread_time()
+        share = self.ponder_cpu_share
+        iterations = 0
+        nodes_allocated = 0
+        while not stop.is_set():
+            slice_start = time.perf_counter()
+            while time.perf_counter() - slice_start < self.PONDER_SLICE and not stop.is_set():
+                nodes_allocated += self._iterate(state)
+                iterations += 1
+            if time.thread_time() - cpu_start >= self.ponder_budget:
+                break
+            if share < 1.0:
+                # พักให้ session อื่นได้ใช้ CPU
+                stop.wait((time.perf_counter() - slice_start) * (1.0 - share) / share)
+        incr('mcts.ponder_iterations', iterations)
+        incr('mcts.nodes_allocated', nodes_allocated)
+    
     def _simulate(self, state):
         """
         Simulate a random playout from the given state
-        Return 1 for AI win, 0 for draw, -1 for AI loss
+        Return the winner (+1 / -1) or 0 for a draw; the state is left unchanged
         """
-        # Create a copy of the state for simulation
-        state_copy = deepcopy(state)
-        current_player = 'O'  # Player's move after AI's move
-        
-        # Simulate until the game is over
-        while True:
-            # Get valid moves
-            valid_moves = [(r, c) for r in range(3) for c in range(3) 
-                          if state_copy[r][c] is None]
-            
-            # If no valid moves, the game is a draw
-            if not valid_moves:
-                return 0  # Draw
-            
-            # Choose a random move
-            row, col = random.choice(valid_moves)
-            state_copy[row][col] = current_player
-            
-            # Check if the game is over
-            if self._is_winner(state_copy, current_player):
-                # If the player (O) wins, it's a loss for the AI
-                if current_player == 'O':
-                    return -1
-                # If the AI (X) wins, it's a win for the AI
-                else:
-                    return 1
-            
-            # Switch player
-            current_player = 'X' if current_player == 'O' else 'O'
+        return state.random_playout()
     
-    def _backpropagate(self, node, result):
+    def _backpropagate(self, node, winner):
         """Backpropagate the result up the tree"""
         while node:
-            node.update(result)
+            # 1 for a win of the player who moved into the node, -1 for a loss, 0 for a draw
+            node.update(0 if winner == 0 else (1 if winner == node.player else -1))
             node = node.parent
     
-    def _is_winner(self, state, player):
-        """Check if a player has won on the given state"""
-        # Check rows
-        for row in range(3):
-            if state[row][0] == state[row][1] == state[row][2] == player:
-                return True
-        
-        # Check columns
-        for col in range(3):
-            if state[0][col] == state[1][col] == state[2][col] == player:
-                return True
-        
-        # Check diagonals
-        if state[0][0] == state[1][1] == state[2][2] == player:
-            return True
-        if state[0][2] == state[1][1] == state[2][0] == player:
-            return True
-        
-        return False
-    
     def adapt_for_game(self, game_type):
         """
         Adapt MCTS for different game types
@@ -221,15 +472,7 @@ class MCTS:
         Args:
             game_type: Type of game ('TicTacToe', 'ConnectFour', 'Checkers', 'Chess')
         """
-        if game_type == 'TicTacToe':
-            # Default implementation already works for TicTacToe
-            pass
-        elif game_type == 'ConnectFour':
-            # Modify for Connect Four specific rules
-            pass
-        elif game_type == 'Checkers':
-            # Modify for Checkers specific rules
-            pass
-        elif game_type == 'Chess':
-            # Modify for Chess specific rules
-            pass
+        # Raises ValueError for games without a registered rules engine
+        get_game_state_class(game_type)
+        self.game_type = game_type
+        self.reset_for_new_game()
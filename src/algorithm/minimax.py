@@ -0,0 +1,286 @@
+import time
+
+from algorithm.game_rules import get_game_state_class, state_from_board
+from algorithm.instrumentation import incr, instrumented
+
+# ค่าคะแนนชนะ (ลบด้วยจำนวน ply เพื่อให้ชนะเร็วที่สุด/แพ้ช้าที่สุด)
+WIN_SCORE = 1000000
+MATE_BOUND = WIN_SCORE - 1000
+
+# ชนิดของค่าใน transposition table
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# ความลึกที่ใช้เก็บผลที่แก้ได้สมบูรณ์ (ไม่มีการใช้ evaluate ในต้นไม้ย่อย)
+SOLVED_DEPTH = 1 << 20
+
+
+class _SearchTimeout(Exception):
+    """หมดเวลาระหว่างการค้นหา"""
+
+
+class TranspositionTable:
+    """
+    Fixed-size transposition table indexed by the low bits of the Zobrist key
+
+    Each slot keeps (key, depth, score, flag, best_move); a new entry
+    replaces the old one when it was searched at least as deep or the
+    slot belongs to another position.
+    """
+
+    def __init__(self, size_bits=20):
+        self.size = 1 << size_bits
+        self.mask = self.size - 1
+        self.entries = [None] * self.size
+
+    def clear(self):
+        self.entries = [None] * self.size
+
+    def probe(self, key):
+        entry = self.entries[key & self.mask]
+        if entry is not None and entry[0] == key:
+            return entry
+        return None
+
+    def store(self, key, depth, score, flag, move):
+        index = key & self.mask
+        entry = self.entries[index]
+        if entry is None or entry[0] != key or depth >= entry[1]:
+            self.entries[index] = (key, depth, score, flag, move)
+
+
+class MinimaxAgent:
+    """
+    Minimax agent (negamax with alpha-beta pruning)
+
+    - Iterative deepening under a time budget
+    - Zobrist-hashed transposition table
+    - Move ordering: TT move, killer moves, history heuristic
+    """
+
+    def __init__(self, game_type='TicTacToe', time_limit=1.0, max_depth=64, tt_size_bits=20):
+        self.game_type = game_type
+        self.time_limit = time_limit
+        self.max_depth = max_depth
+        self.tt = TranspositionTable(tt_size_bits)
+        self.killers = []  # killer moves ต่อ ply (2 ช่อง)
+        self.history = {}  # move -> คะแนน history heuristic
+        self.nodes = 0
+        self.last_search_info = {}
+        self._deadline = None
+        self._horizon_hit = False
+
+    def reset_for_new_game(self):
+        """รีเซ็ตข้อมูลการเรียงลำดับการเดิน (transposition table ยังใช้ต่อได้)"""
+        self.killers = []
+        self.history = {}
+
+    def adapt_for_game(self, game_type):
+        """เปลี่ยนชนิดของเกมที่ค้นหา"""
+        get_game_state_class(game_type)
+        if game_type != self.game_type:
+            self.game_type = game_type
+            self.tt.clear()
+            self.reset_for_new_game()
+
+    @instrumented('minimax.choose_action')
+    def choose_action(self, board, to_move=None):
+        """
+        Choose the best move for the player to move
+
+        Args:
+            board: Current board state (format of the selected game type)
+            to_move: Symbol of the AI player (game default if None)
+
+        Returns:
+            Best move (row, col for grid games) or None if the game is over
+        """
+        state = state_from_board(self.game_type, board, to_move)
+        return self.search(state)
+
+    def search(self, state, time_limit=None, max_depth=None):
+        """
+        Iterative deepening search from the given state
+
+        Returns the best move of the deepest completed iteration
+        """
+        time_limit = self.time_limit if time_limit is None else time_limit
+        max_depth = self.max_depth if max_depth is None else max_depth
+
+        moves = state.legal_moves()
+        if not moves:
+            return None
+        if len(moves) == 1:
+            return moves[0]
+
+        start = time.perf_counter()
+        self._deadline = start + time_limit
+        self.nodes = 0
+        best_move = moves[0]
+        best_score = 0
+        depth_reached = 0
+
+        for depth in range(1, max_depth + 1):
+            self._horizon_hit = False
+            try:
+                score, move = self._search_root(state, depth)
+            except _SearchTimeout:
+                break
+            if move is not None:
+                best_move, best_score = move, score
+            depth_reached = depth
+            # เจอผลชนะ/แพ้ที่แน่นอนแล้ว ไม่ต้องค้นลึกกว่านี้
+            if abs(best_score) >= MATE_BOUND:
+                break
+            # ทุกเส้นทางจบเกมภายในความลึกนี้ (ไม่มีการใช้ evaluate) ผลลัพธ์จึงแน่นอนแล้ว
+            if not self._horizon_hit:
+                break
+
+        incr('minimax.nodes', self.nodes)
+        self.last_search_info = {
+            'depth': depth_reached,
+            'score': best_score,
+            'nodes': self.nodes,
+            'time_used': time.perf_counter() - start,
+        }
+        return best_move
+
+    def _search_root(self, state, depth):
+        alpha, beta = -WIN_SCORE - 1, WIN_SCORE + 1
+        best_move = None
+        best_score = -WIN_SCORE - 1
+        for move in self._ordered_moves(state, state.legal_moves(), 0):
+            state.play(move)
+            try:
+                score = -self._negamax(state, depth - 1, -beta, -alpha, 1)
+            finally:
+                state.undo()
+            if score > best_score:
+                best_score, best_move = score, move
+            if score > alpha:
+                alpha = score
+        self.tt.store(state.hash_key(), depth, best_score, EXACT, best_move)
+        return best_score, best_move
+
+    def _negamax(self, state, depth, alpha, beta, ply):
+        self.nodes += 1
+        if self.nodes & 1023 == 0 and time.perf_counter() > self._deadline:
+            raise _SearchTimeout()
+
+        winner = state.winner()
+        if winner is not None:
+            if winner == 0:
+                return 0
+            # ฝ่ายที่เพิ่งเดินชนะ จึงเป็นการแพ้ของฝ่ายที่จะเดิน
+            return (WIN_SCORE - ply) if winner == state.to_move else -(WIN_SCORE - ply)
+        if depth <= 0:
+            self._horizon_hit = True
+            return state.evaluate()
+
+        alpha_orig = alpha
+        key = state.hash_key()
+        tt_move = None
+        entry = self.tt.probe(key)
+        if entry is not None:
+            incr('minimax.tt_hits')
+            tt_move = entry[4]
+            if entry[1] >= depth:
+                score = self._score_from_tt(entry[2], ply)
+                flag = entry[3]
+                if entry[1] != SOLVED_DEPTH:
+                    # ค่าจาก TT มาจากต้นไม้ที่ใช้การประเมินแบบ heuristic
+                    self._horizon_hit = True
+                if flag == EXACT:
+                    return score
+                if flag == LOWER and score > alpha:
+                    alpha = score
+                elif flag == UPPER and score < beta:
+                    beta = score
+                if alpha >= beta:
+                    return score
+
+        outer_horizon_hit = self._horizon_hit
+        self._horizon_hit = False
+        best_score = -WIN_SCORE - 1
+        best_move = None
+        for move in self._ordered_moves(state, state.legal_moves(), ply, tt_move):
+            state.play(move)
+            try:
+                score = -self._negamax(state, depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                state.undo()
+            if score > best_score:
+                best_score, best_move = score, move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        self._record_cutoff(move, depth, ply)
+                        break
+
+        if best_score <= alpha_orig:
+            flag = UPPER
+        elif best_score >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        stored_depth = depth if self._horizon_hit else SOLVED_DEPTH
+        self.tt.store(key, stored_depth, self._score_to_tt(best_score, ply), flag, best_move)
+        self._horizon_hit = self._horizon_hit or outer_horizon_hit
+        return best_score
+
+    def _ordered_moves(self, state, moves, ply, tt_move=None):
+        """เรียงการเดิน: TT move ก่อน ตามด้วย killer moves แล้วเรียงตาม history"""
+        history = self.history
+        killers = self.killers[ply] if ply < len(self.killers) else ()
+
+        def priority(move):
+            if move == tt_move:
+                return 1 << 40
+            if move in killers:
+                return 1 << 30
+            return history.get(move, 0)
+
+        return sorted(moves, key=priority, reverse=True)
+
+    def _record_cutoff(self, move, depth, ply):
+        """บันทึก killer move และเพิ่มคะแนน history ให้การเดินที่ทำให้เกิด cutoff"""
+        while len(self.killers) <= ply:
+            self.killers.append([])
+        killers = self.killers[ply]
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[2:]
+        self.history[move] = self.history.get(move, 0) + depth * depth
+
+    @staticmethod
+    def _score_to_tt(score, ply):
+        """ปรับคะแนนชนะ/แพ้ให้ไม่ขึ้นกับ ply ก่อนเก็บใน TT"""
+        if score >= MATE_BOUND:
+            return score + ply
+        if score <= -MATE_BOUND:
+            return score - ply
+        return score
+
+    @staticmethod
+    def _score_from_tt(score, ply):
+        if score >= MATE_BOUND:
+            return score - ply
+        if score <= -MATE_BOUND:
+            return score + ply
+        return score
+
+
+# ทดสอบ Minimax Agent
+if __name__ == "__main__":
+    agent = MinimaxAgent(time_limit=1.0)
+
+    board = [
+        ['X', None, None],
+        [None, 'O', None],
+        [None, None, None]
+    ]
+
+    action = agent.choose_action(board)
+    print(f"Chosen action: {action}")
+    print(f"Search info: {agent.last_search_info}")
+
+    print("Test complete.")
@@ -0,0 +1,291 @@
+import importlib
+import json
+import os
+import shutil
+import stat
+import threading
+import time
+
+from algorithm.instrumentation import incr, instrumented, timer
+
+# Model registry: เก็บโมเดลของแต่ละ agent เป็นเวอร์ชันที่แก้ไขไม่ได้
+#
+#   model_registry/<agent>/v000001/<ไฟล์โมเดล>
+#   model_registry/<agent>/current.json  -> {"version": 2, "previous": 1}
+#
+# process ที่ให้บริการใช้ HotSwapAgent ตรวจ current.json เป็นระยะ (polling)
+# แล้วโหลดเวอร์ชันใหม่ใน thread เบื้องหลังก่อนสลับเข้ามาแทนแบบ atomic
+
+# agent -> (โมดูล, คลาส, เมธอดโหลด, ไฟล์โมเดล)
+AGENT_MODELS = {
+    'q_learning': ('algorithm.q_learning', 'QLearningAgent', 'load_q_values', 'q_values.pkl'),
+    'neural_network': ('algorithm.neural_network', 'NeuralNetworkAgent', 'load_model', 'nn_weights.pkl'),
+    'genetic': ('algorithm.genetic_algorithm', 'GeneticAlgorithm', 'load_best_strategy',
+                'best_genetic_strategy.pkl'),
+    'dqn': ('algorithm.deep_q_network', 'DeepQNetwork', 'load_model', 'dqn_model.h5'),
+}
+
+
+class ModelRegistry:
+    """
+    Immutable, versioned model artifacts per agent
+
+    Args:
+        root: registry directory
+    """
+
+    def __init__(self, root='model_registry'):
+        self.root = root
+
+    def _agent_dir(self, agent_name):
+        return os.path.join(self.root, agent_name)
+
+    def version_dir(self, agent_name, version):
+        return os.path.join(self._agent_dir(agent_name), f"v{version:06d}")
+
+    def versions(self, agent_name):
+        """เวอร์ชันทั้งหมดของ agent เรียงจากเก่าไปใหม่"""
+        directory = self._agent_dir(agent_name)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(int(name[1:]) for name in os.listdir(directory)
+                      if name.startswith('v') and name[1:].isdigit())
+
+    def _read_pointer(self, agent_name):
+        path = os.path.join(self._agent_dir(agent_name), 'current.json')
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"version": None, "previous": None}
+        except Exception as e:
+            print(f"Error reading model registry: {e}")
+            return {"version": None, "previous": None}
+
+    def _write_pointer(self, agent_name, version, previous):
+        path = os.path.join(self._agent_dir(agent_name), 'current.json')
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump({"version": version, "previous": previous}, f)
+        os.replace(tmp, path)
+
+    def current_version(self, agent_name):
+        return self._read_pointer(agent_name)["version"]
+
+    @instrumented('registry.publish')
+    def publish(self, agent_name, files, activate=True):
+        """
+        Store a new version of an agent's model
+
+        Args:
+            files: paths of the artifact files (copied into the version)
+            activate: make it the current version
+
+        Returns:
+            the new version number
+        """
+        if isinstance(files, str):
+            files = [files]
+        agent_dir = self._agent_dir(agent_name)
+        os.makedirs(agent_dir, exist_ok=True)
+        staging = os.path.join(agent_dir, f".staging-{os.getpid()}-{time.time_ns()}")
+        os.makedirs(staging)
+        with timer('registry.copy'):
+            for path in files:
+                target = os.path.join(staging, os.path.basename(path))
+                shutil.copy2(path, target)
+                os.chmod(target, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+        # rename ทั้งไดเรกทอรีเป็นเวอร์ชันถัดไป: ผู้อ่านไม่มีทางเห็นเวอร์ชันที่คัดลอกไม่ครบ
+        while True:
+            version = (self.versions(agent_name) or [0])[-1] + 1
+            try:
+                os.rename(staging, self.version_dir(agent_name, version))
+                break
+            except OSError:
+                if not os.path.exists(self.version_dir(agent_name, version)):
+                    raise
+        incr('registry.versions_published')
+        if activate:
+            self.activate(agent_name, version)
+        return version
+
+    def activate(self, agent_name, version):
+        """ตั้งเวอร์ชันที่ให้บริการ (เวอร์ชันเดิมถูกจำไว้สำหรับ rollback)"""
+        if version not in self.versions(agent_name):
+            raise ValueError(f"Unknown version {version} for {agent_name}")
+        current = self.current_version(agent_name)
+        if current != version:
+            self._write_pointer(agent_name, version, current)
+
+    def rollback(self, agent_name):
+        """กลับไปใช้เวอร์ชันก่อนหน้า แล้วคืนค่าเวอร์ชันที่ใช้อยู่"""
+        pointer = self._read_pointer(agent_name)
+        previous = pointer["previous"]
+        if previous is None:
+            # ไม่มีประวัติ: ใช้เวอร์ชันที่เก่ากว่าเวอร์ชันปัจจุบัน
+            older = [v for v in self.versions(agent_name) if pointer["version"] is None or v < pointer["version"]]
+            if not older:
+                raise ValueError(f"No earlier version of {agent_name} to roll back to")
+            previous = older[-1]
+        self._write_pointer(agent_name, previous, pointer["version"])
+        incr('registry.rollbacks')
+        return previous
+
+    def prune(self, agent_name, keep=5):
+        """ลบเวอร์ชันเก่า (ไม่ลบเวอร์ชันปัจจุบันและเวอร์ชันสำหรับ rollback)"""
+        pointer = self._read_pointer(agent_name)
+        protected = {pointer["version"], pointer["previous"]}
+        for version in self.versions(agent_name)[:-keep]:
+            if version not in protected:
+                directory = self.version_dir(agent_name, version)
+                for name in os.listdir(directory):
+                    os.chmod(os.path.join(directory, name), stat.S_IWUSR | stat.S_IRUSR)
+                shutil.rmtree(directory)
+
+
+def load_agent(agent_name, version_dir):
+    """
+    Create an agent from a version's artifact
+
+    The agent is built without loading the default model from the working
+    directory, and the artifact is loaded strictly.
+
+    Raises:
+        FileNotFoundError / ValueError / unpickling errors when the version's
+        file is missing or unreadable
+    """
+    module_name, class_name, loader, filename = AGENT_MODELS[agent_name]
+    agent = getattr(importlib.import_module(module_name), class_name)(load=False)
+    getattr(agent, loader)(os.path.join(version_dir, filename), strict=True)
+    return agent
+
+
+def publish_agent(registry, agent_name, directory='.', activate=True):
+    """บันทึกไฟล์โมเดลปัจจุบันของ agent (ในไดเรกทอรีทำงาน) เป็นเวอร์ชันใหม่"""
+    filename = AGENT_MODELS[agent_name][3]
+    return registry.publish(agent_name, [os.path.join(directory, filename)], activate)
+
+
+class HotSwapAgent:
+    """
+    Serves an agent from the registry and swaps in new versions without restart
+
+    A background thread polls current.json; a changed version is loaded and
+    warmed up into a new agent instance, then the reference is replaced in
+    one assignment. A request keeps the instance it started with, so no
+    request is dropped or sees a half-loaded model.
+
+    Args:
+        registry: ModelRegistry
+        agent_name: key of AGENT_MODELS
+        loader: function(version_dir) -> agent (default load_agent)
+        warmup_boards: boards passed to choose_action before a swap
+    """
+
+    def __init__(self, registry, agent_name, poll_interval=2.0, loader=None, warmup_boards=None):
+        self.registry = registry
+        self.agent_name = agent_name
+        self.poll_interval = poll_interval
+        self.loader = loader or (lambda directory: load_agent(agent_name, directory))
+        self.warmup_boards = warmup_boards if warmup_boards is not None else [[[None] * 3 for _ in range(3)]]
+        self._current = (None, None)  # (version, agent) แทนที่ทั้งคู่พร้อมกันในการ assign ครั้งเดียว
+        self.previous = None  # (version, agent) ที่เพิ่งถูกแทนที่ สำหรับ rollback ทันที
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.check()
+        self._thread = None
+        if poll_interval:
+            self._thread = threading.Thread(target=self._poll, daemon=True)
+            self._thread.start()
+
+    def __getattr__(self, name):
+        agent = self.__dict__.get('_current', (None, None))[1]
+        if agent is None:
+            raise AttributeError(name)
+        return getattr(agent, name)
+
+    @property
+    def agent(self):
+        return self._current[1]
+
+    @property
+    def version(self):
+        return self._current[0]
+
+    def current(self):
+        """(version, agent) ที่ให้บริการอยู่ (อ่านพร้อมกันจึงตรงกันเสมอ)"""
+        return self._current
+
+    def choose_action(self, *args, **kwargs):
+        agent = self.agent  # ใช้ instance เดียวตลอดทั้ง request
+        return agent.choose_action(*args, **kwargs)
+
+    @instrumented('registry.check')
+    def check(self):
+        """โหลดและสลับเวอร์ชันถ้า current.json เปลี่ยน (คืนค่า True ถ้ามีการสลับ)"""
+        version = self.registry.current_version(self.agent_name)
+        if version is None or version == self.version:
+            return False
+        with self._lock:
+            if version == self.version:
+                return False
+            if self.previous is not None and self.previous[0] == version:
+                agent = self.previous[1]  # rollback: instance เดิมยังอุ่นอยู่
+            else:
+                try:
+                    with timer('registry.load'):
+                        agent = self.loader(self.registry.version_dir(self.agent_name, version))
+                        for board in self.warmup_boards:
+                            agent.choose_action([row[:] for row in board])
+                except Exception as e:
+                    print(f"Error loading {self.agent_name} version {version}: {e}")
+                    return False
+            if self.agent is not None:
+                self.previous = (self.version, self.agent)
+            self._current = (version, agent)
+            incr('registry.swaps')
+            print(f"Serving {self.agent_name} version {version}")
+            return True
+
+    def rollback(self):
+        """กลับไปใช้เวอร์ชันก่อนหน้า (ทั้งใน registry และใน process นี้)"""
+        self.registry.rollback(self.agent_name)
+        self.check()
+
+    def _poll(self):
+        while not self._stop.wait(self.poll_interval):
+            self.check()
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+
+
+# ทดสอบ Model registry
+if __name__ == "__main__":
+    import pickle
+    import tempfile
+
+    workdir = tempfile.mkdtemp()
+    registry = ModelRegistry(os.path.join(workdir, 'registry'))
+
+    def publish_strategy(values):
+        path = os.path.join(workdir, 'best_genetic_strategy.pkl')
+        with open(path, 'wb') as f:
+            pickle.dump(values, f)
+        return publish_agent(registry, 'genetic', workdir)
+
+    import numpy as np
+    publish_strategy(np.array([1.0] * 9 + [0.0]))
+    served = HotSwapAgent(registry, 'genetic', poll_interval=0.1)
+    print(f"Version {served.version}: {served.choose_action([[None] * 3 for _ in range(3)])}")
+
+    publish_strategy(np.array([0.0] * 8 + [5.0, 0.0]))
+    time.sleep(0.5)
+    print(f"Version {served.version}: {served.choose_action([[None] * 3 for _ in range(3)])}")
+
+    served.rollback()
+    print(f"Rolled back to version {served.version}: {served.choose_action([[None] * 3 for _ in range(3)])}")
+    served.close()
+    print("Test complete.")
@@ -4,12 +4,14 @@ import pickle
 import random
 from copy import deepcopy
 
+from algorithm.instrumentation import incr, instrumented, timer
+
 class NeuralNetworkAgent:
     """
     Neural Network agent for Tic-Tac-Toe game
     Uses a simple neural network to evaluate board states and select moves
     """
-    def __init__(self, learning_rate=0.01):
+    def __init__(self, learning_rate=0.01, load=True):
         self.learning_rate = learning_rate
         
         # Neural Network architecture (simple feedforward)
@@ -18,7 +20,7 @@ class NeuralNetworkAgent:
         # Output layer: 9 nodes (one for each possible move)
         
         # Initialize weights with random values if no saved model exists
-        if os.path.exists('nn_weights.pkl'):
+        if load and os.path.exists('nn_weights.pkl'):
             self.load_model()
         else:
             # Xavier initialization for weights
@@ -31,18 +33,32 @@ class NeuralNetworkAgent:
         
         # Store game data for training
         self.game_states = []  # [board_state, move_index, reward]
+        
+        # Exploration rate of choose_action
+        self.exploration_rate = 0.1
+        
+        # Quantized weights for inference (None = float64 weights)
+        self.quantized = None
     
-    def load_model(self):
-        """โหลดโมเดลที่ฝึกไว้แล้ว"""
+    def load_model(self, path='nn_weights.pkl', strict=False):
+        """โหลดโมเดลที่ฝึกไว้แล้ว (strict=True: raise เมื่อไม่มีไฟล์หรืออ่านไม่ได้ แทนการสุ่มน้ำหนักใหม่)"""
         try:
-            with open('nn_weights.pkl', 'rb') as f:
+            with open(path, 'rb') as f:
                 weights = pickle.load(f)
-                self.weights_input_hidden = weights['input_hidden']
-                self.weights_hidden_output = weights['hidden_output']
-                self.bias_hidden = weights['bias_hidden']
-                self.bias_output = weights['bias_output']
-                print("Neural network model loaded successfully.")
+            shapes = {'input_hidden': (9, 27), 'hidden_output': (27, 9), 'bias_hidden': (27,), 'bias_output': (9,)}
+            for key, shape in shapes.items():
+                if np.shape(weights[key]) != shape:
+                    raise ValueError(f"Unexpected shape for {key}: {np.shape(weights[key])}")
+            self.weights_input_hidden = weights['input_hidden']
+            self.weights_hidden_output = weights['hidden_output']
+            self.bias_hidden = weights['bias_hidden']
+            self.bias_output = weights['bias_output']
+            if getattr(self, 'quantized', None) is not None:
+                self.quantize(self.quantized['mode'])
+            print("Neural network model loaded successfully.")
         except Exception as e:
+            if strict:
+                raise
             print(f"Error loading neural network model: {e}")
             # Initialize with random weights if loading fails
             self.weights_input_hidden = np.random.randn(9, 27) * np.sqrt(2.0/9)
@@ -59,8 +75,9 @@ class NeuralNetworkAgent:
             'bias_output': self.bias_output
         }
         try:
-            with open('nn_weights.pkl', 'wb') as f:
+            with timer('nn.save'), open('nn_weights.pkl', 'wb') as f:
                 pickle.dump(weights, f)
+                incr('nn.bytes_written', f.tell())
                 print("Neural network model saved successfully.")
         except Exception as e:
             print(f"Error saving neural network model: {e}")
@@ -93,8 +110,8 @@ class NeuralNetworkAgent:
     
     def _softmax(self, x):
         """ฟังก์ชัน Softmax สำหรับ output layer"""
-        exp_x = np.exp(x - np.max(x))  # ลบด้วยค่าสูงสุดเพื่อป้องกัน numerical overflow
-        return exp_x / exp_x.sum()
+        exp_x = np.exp(x - np.max(x, axis=-1, keepdims=True))  # ลบด้วยค่าสูงสุดเพื่อป้องกัน numerical overflow
+        return exp_x / exp_x.sum(axis=-1, keepdims=True)
     
     def _forward_pass(self, board_input):
         """คำนวณ forward pass ผ่านเครือข่าย"""
@@ -108,10 +125,125 @@ class NeuralNetworkAgent:
         
         return hidden_input, hidden_output, output_input, output
     
+    def quantize(self, mode='int8'):
+        """
+        Quantize the weights for inference
+
+        int8: symmetric per-output-channel scales, integer matmuls with the
+        hidden activations quantized per board. float16: half precision
+        weights computed in float32. Biases stay float32.
+        """
+        if mode == 'int8':
+            def channels(weights):
+                scale = np.abs(weights).max(axis=0) / 127.0
+                scale[scale == 0] = 1.0
+                return np.round(weights / scale).astype(np.int8), scale.astype(np.float32)
+            w1, s1 = channels(self.weights_input_hidden)
+            w2, s2 = channels(self.weights_hidden_output)
+        elif mode == 'float16':
+            w1, s1 = self.weights_input_hidden.astype(np.float16), None
+            w2, s2 = self.weights_hidden_output.astype(np.float16), None
+        else:
+            raise ValueError(f"Unknown quantization mode: {mode}")
+        self.quantized = {
+            'mode': mode,
+            'input_hidden': w1, 'scale_hidden': s1, 'bias_hidden': self.bias_hidden.astype(np.float32),
+            'hidden_output': w2, 'scale_output': s2, 'bias_output': self.bias_output.astype(np.float32),
+        }
+        return self.quantized
+    
+    def save_quantized(self, path=None):
+        """บันทึกน้ำหนักแบบ quantized (nn_weights_int8.pkl / nn_weights_float16.pkl)"""
+        if self.quantized is None:
+            return
+        path = path or f"nn_weights_{self.quantized['mode']}.pkl"
+        try:
+            with timer('nn.save'), open(path, 'wb') as f:
+                pickle.dump(self.quantized, f)
+                incr('nn.bytes_written', f.tell())
+        except Exception as e:
+            print(f"Error saving quantized model: {e}")
+    
+    def load_quantized(self, path='nn_weights_int8.pkl'):
+        """โหลดน้ำหนักแบบ quantized แล้วใช้ในการเลือกการกระทำ"""
+        try:
+            with open(path, 'rb') as f:
+                self.quantized = pickle.load(f)
+            print(f"Quantized ({self.quantized['mode']}) model loaded successfully.")
+        except Exception as e:
+            print(f"Error loading quantized model: {e}")
+    
+    def _quantized_forward(self, board_inputs):
+        """forward pass ด้วยน้ำหนักแบบ quantized (board_inputs: (N, 9) หรือ (9,))"""
+        q = self.quantized
+        inputs = np.atleast_2d(board_inputs)
+        if q['mode'] == 'int8':
+            # input เป็น -1/0/1 อยู่แล้ว จึงคูณแบบจำนวนเต็มได้โดยตรง
+            hidden = np.dot(inputs.astype(np.int32), q['input_hidden'].astype(np.int32))
+            hidden = self._relu(hidden * q['scale_hidden'] + q['bias_hidden'])
+            # quantize activation ของแต่ละกระดานเป็น int8 แล้วคูณแบบจำนวนเต็ม
+            act_scale = hidden.max(axis=1, keepdims=True) / 127.0
+            act_scale[act_scale == 0] = 1.0
+            hidden_q = np.round(hidden / act_scale).astype(np.int32)
+            logits = np.dot(hidden_q, q['hidden_output'].astype(np.int32)) * (act_scale * q['scale_output'])
+        else:
+            hidden = self._relu(np.dot(inputs.astype(np.float32), q['input_hidden'].astype(np.float32))
+                                + q['bias_hidden'])
+            logits = np.dot(hidden, q['hidden_output'].astype(np.float32))
+        logits = logits + q['bias_output']
+        exp_x = np.exp(logits - logits.max(axis=1, keepdims=True))
+        return exp_x / exp_x.sum(axis=1, keepdims=True)
+    
+    def quantized_accuracy(self, boards=None):
+        """
+        Compare the quantized and float64 move choices on reference boards
+
+        Args:
+            boards: list of boards (default: every reachable non-terminal position)
+
+        Returns:
+            dict with the move agreement, largest probability error and weight sizes
+        """
+        if self.quantized is None:
+            self.quantize()
+        if boards is None:
+            boards = reference_boards()
+        inputs = np.array([self._board_to_input(board) for board in boards])
+        valid = inputs == 0
+        hidden = self._relu(np.dot(inputs, self.weights_input_hidden) + self.bias_hidden)
+        logits = np.dot(hidden, self.weights_hidden_output) + self.bias_output
+        exact = np.exp(logits - logits.max(axis=1, keepdims=True))
+        exact /= exact.sum(axis=1, keepdims=True)
+        approx = self._quantized_forward(inputs)
+        
+        exact_moves = np.where(valid, exact, -1).argmax(axis=1)
+        approx_moves = np.where(valid, approx, -1).argmax(axis=1)
+        float_weights = (self.weights_input_hidden, self.weights_hidden_output, self.bias_hidden, self.bias_output)
+        return {
+            'mode': self.quantized['mode'],
+            'boards': len(boards),
+            'agreement': float((exact_moves == approx_moves).mean()),
+            'max_prob_error': float(np.abs(exact - approx).max()),
+            'bytes': sum(v.nbytes for v in self.quantized.values() if isinstance(v, np.ndarray)),
+            'float_bytes': sum(w.nbytes for w in float_weights),
+        }
+    
+    @instrumented('nn.choose_action')
     def choose_action(self, board):
         """เลือกการกระทำจากกระดานปัจจุบัน"""
+        return self._select_move(board, self.exploration_rate)
+    
+    def greedy_action(self, board):
+        """การเคลื่อนที่ที่ดีที่สุดตามเครือข่าย (ไม่มีการสำรวจ)"""
+        return self._select_move(board, 0.0)
+    
+    def _select_move(self, board, exploration_rate):
         board_input = self._board_to_input(board)
-        _, _, _, output = self._forward_pass(board_input)
+        with timer('nn.forward'):
+            if self.quantized is not None:
+                output = self._quantized_forward(board_input)[0]
+            else:
+                _, _, _, output = self._forward_pass(board_input)
         
         # Create a mask for valid moves (empty cells)
         valid_moves_mask = np.zeros(9)
@@ -133,7 +265,7 @@ class NeuralNetworkAgent:
         
         # Choose move based on probabilities
         # Exploration: sometimes choose randomly
-        if random.random() < 0.1:  # 10% exploration rate
+        if random.random() < exploration_rate:
             valid_indices = np.where(valid_moves_mask == 1)[0]
             if len(valid_indices) > 0:
                 move_index = np.random.choice(valid_indices)
@@ -149,6 +281,67 @@ class NeuralNetworkAgent:
         
         return (row, col)
     
+    @instrumented('nn.choose_actions')
+    def choose_actions(self, boards, exploration_rate=None):
+        """
+        Choose moves for many boards with one batched forward pass
+
+        Args:
+            boards: (N, 3, 3) or (N, 9) array, 1 = own pieces, -1 = opponent, 0 = empty
+            exploration_rate: chance of a random legal move per board (None = self.exploration_rate)
+
+        Returns:
+            (N,) move indices (row * 3 + col)
+        """
+        inputs = np.asarray(boards).reshape(len(boards), 9)
+        valid = inputs == 0
+        with timer('nn.forward'):
+            if self.quantized is not None:
+                output = self._quantized_forward(inputs)
+            else:
+                _, _, _, output = self._forward_pass(inputs.astype(np.float64))
+        moves = np.where(valid, output, -1).argmax(axis=1)
+        
+        if exploration_rate is None:
+            exploration_rate = self.exploration_rate
+        if exploration_rate:
+            explore = np.random.random(len(inputs)) < exploration_rate
+            if explore.any():
+                # ช่องว่างแบบสุ่ม: ค่าสุ่มที่มากที่สุดในบรรดาช่องที่เดินได้
+                noise = np.where(valid[explore], np.random.random((int(explore.sum()), 9)), -1)
+                moves[explore] = noise.argmax(axis=1)
+        return moves
+    
+    @instrumented('nn.train_on_batch')
+    def train_on_batch(self, boards, move_indices, rewards):
+        """
+        Batched version of the train_on_game update (gradients averaged over the batch)
+
+        Args:
+            boards: (N, 3, 3) or (N, 9) array from the mover's point of view
+            move_indices: (N,) moves played
+            rewards: (N,) final result for the mover (1 win, -1 loss, 0 draw)
+        """
+        inputs = np.asarray(boards, dtype=np.float64).reshape(len(boards), 9)
+        if not len(inputs):
+            return
+        incr('nn.samples_trained', len(inputs))
+        hidden_input, hidden_output, _, _ = self._forward_pass(inputs)
+        
+        # เหมือน train_on_game: error มีเฉพาะที่การเคลื่อนที่ที่เลือก (learning_rate * reward)
+        output_delta = np.zeros((len(inputs), 9))
+        output_delta[np.arange(len(inputs)), move_indices] = self.learning_rate * np.asarray(rewards)
+        hidden_delta = np.dot(output_delta, self.weights_hidden_output.T) * self._relu_derivative(hidden_input)
+        
+        scale = self.learning_rate / len(inputs)
+        self.weights_hidden_output += scale * np.dot(hidden_output.T, output_delta)
+        self.bias_output += scale * output_delta.sum(axis=0)
+        self.weights_input_hidden += scale * np.dot(inputs.T, hidden_delta)
+        self.bias_hidden += scale * hidden_delta.sum(axis=0)
+        
+        if self.quantized is not None:
+            self.quantize(self.quantized['mode'])
+    
     def record_move(self, board, move, player):
         """บันทึกการเคลื่อนที่สำหรับการเรียนรู้ในภายหลัง"""
         board_input = self._board_to_input(board)
@@ -160,6 +353,7 @@ class NeuralNetworkAgent:
         # บันทึกสถานะ
         self.game_states.append((board_input, move_index, reward))
     
+    @instrumented('nn.train_on_game')
     def train_on_game(self, final_reward):
         """ฝึกเครือข่ายประสาทเทียมบนเกมที่จบแล้ว"""
         if not self.game_states:
@@ -169,6 +363,8 @@ class NeuralNetworkAgent:
         last_state = self.game_states[-1]
         self.game_states[-1] = (last_state[0], last_state[1], final_reward)
         
+        incr('nn.samples_trained', len(self.game_states))
+        
         # Backpropagation สำหรับแต่ละการเคลื่อนที่
         for board_input, move_index, reward in self.game_states:
             # Forward pass
@@ -202,9 +398,32 @@ class NeuralNetworkAgent:
         # บันทึกโมเดลหลังจากฝึก
         self.save_model()
         
+        # quantize ใหม่จากน้ำหนักที่ฝึกแล้ว
+        if self.quantized is not None:
+            self.quantize(self.quantized['mode'])
+        
         # รีเซ็ตสำหรับเกมใหม่
         self.reset_for_new_game()
 
+def reference_boards():
+    """กระดาน Tic-Tac-Toe ทุกแบบที่เกิดขึ้นได้และยังไม่จบเกม"""
+    from algorithm.game_rules import TicTacToeState
+    
+    boards = {}
+    
+    def visit(state):
+        key = state.hash_key()
+        if key in boards or state.is_terminal():
+            return
+        boards[key] = state.to_board()
+        for move in state.legal_moves():
+            state.play(move)
+            visit(state)
+            state.undo()
+    
+    visit(TicTacToeState())
+    return list(boards.values())
+
 # ทดสอบ Neural Network Agent
 if __name__ == "__main__":
     agent = NeuralNetworkAgent()
@@ -236,4 +455,9 @@ if __name__ == "__main__":
     # ฝึกบนเกมที่จบ โดยสมมติว่า AI ชนะ
     agent.train_on_game(1.0)
     
+    # ทดสอบ inference แบบ quantized
+    for mode in ('int8', 'float16'):
+        agent.quantize(mode)
+        print(f"Quantized {mode}: {agent.quantized_accuracy()}")
+    
     print("Test complete.")
@@ -0,0 +1,205 @@
+import json
+import os
+import pickle
+from collections import OrderedDict
+
+from algorithm.game_rules import get_game_state_class, state_from_board
+from algorithm.instrumentation import incr, instrumented, timer
+
+# Opening book: ตอบตำแหน่งต้นเกมที่รู้จักแล้วจาก hash map โดยไม่ต้องค้นหาใหม่
+#
+# - book: ผลจากการค้นหาลึกแบบ offline (ไม่ถูกลบ)
+# - learned: สถิติการเดินจาก log ของเกมที่เล่นได้ดี (จำกัดขนาดแบบ LRU)
+
+
+class OpeningBook:
+    """
+    Position -> move cache keyed by the GameState Zobrist hash
+
+    Args:
+        game_type: game in the game_rules registry
+        max_learned: LRU bound of the learned table (None = unbounded)
+        min_weight: minimum accumulated weight before a learned move is used
+    """
+
+    def __init__(self, game_type='TicTacToe', max_learned=10000, min_weight=2.0, path=None):
+        self.game_type = game_type
+        self.state_class = get_game_state_class(game_type)
+        self.max_learned = max_learned
+        self.min_weight = min_weight
+        self.path = path or f"opening_book_{game_type.lower()}.pkl"
+        self.book = {}  # key -> move
+        self.learned = OrderedDict()  # key -> {move: weight}
+        self.load()
+
+    def load(self):
+        """โหลด opening book จากไฟล์"""
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'rb') as f:
+                    data = pickle.load(f)
+                self.book = data['book']
+                self.learned = OrderedDict(data['learned'])
+                print(f"Loaded opening book with {len(self.book)} positions")
+            except Exception as e:
+                print(f"Error loading opening book: {e}")
+
+    def save(self):
+        """บันทึก opening book ลงไฟล์"""
+        try:
+            with timer('book.save'), open(self.path, 'wb') as f:
+                pickle.dump({'book': self.book, 'learned': dict(self.learned)}, f)
+                incr('book.bytes_written', f.tell())
+        except Exception as e:
+            print(f"Error saving opening book: {e}")
+
+    def __len__(self):
+        return len(self.book) + len(self.learned)
+
+    def lookup(self, state):
+        """การเดินจาก book สำหรับตำแหน่งนี้ หรือ None ถ้าไม่รู้จัก"""
+        key = state.hash_key()
+        move = self.book.get(key)
+        if move is None:
+            weights = self.learned.get(key)
+            if weights:
+                self.learned.move_to_end(key)
+                move, weight = max(weights.items(), key=lambda item: item[1])
+                if weight < self.min_weight:
+                    move = None
+        incr('book.hits' if move is not None else 'book.misses')
+        return move
+
+    def add(self, state, move):
+        self.book[state.hash_key()] = move
+
+    def _learn(self, key, move, weight):
+        weights = self.learned.get(key)
+        if weights is None:
+            weights = self.learned[key] = {}
+            if self.max_learned is not None and len(self.learned) > self.max_learned:
+                self.learned.popitem(last=False)
+                incr('book.evictions')
+        else:
+            self.learned.move_to_end(key)
+        weights[move] = weights.get(move, 0.0) + weight
+
+    @instrumented('book.build')
+    def build(self, max_plies=4, searcher=None, time_limit=0.5):
+        """
+        Precompute the book by deep search of every position up to `max_plies`
+
+        Args:
+            searcher: object with search(state, time_limit) (MinimaxAgent by default)
+        """
+        if searcher is None:
+            from algorithm.minimax import MinimaxAgent
+            searcher = MinimaxAgent(game_type=self.game_type, time_limit=time_limit)
+
+        visited = set()
+
+        def visit(state, ply):
+            key = state.hash_key()
+            if ply >= max_plies or key in visited or state.is_terminal():
+                return
+            visited.add(key)
+            if key not in self.book:
+                move = searcher.search(state.copy(), time_limit)
+                if move is not None:
+                    self.book[key] = move
+            for move in state.legal_moves():
+                state.play(move)
+                visit(state, ply + 1)
+                state.undo()
+
+        visit(self.state_class(), 0)
+        return len(visited)
+
+    def learn_from_game(self, moves, winner, start=None):
+        """
+        Learn the moves of a finished game
+
+        Moves of the winning side get weight 1, both sides get 0.5 on a
+        draw and the losing side's moves are ignored.
+
+        Args:
+            moves: moves from the start position in the game's move format
+            winner: +1 / -1 (player who moved first / second) or 0 for a draw
+        """
+        state = start.copy() if start is not None else self.state_class()
+        for move in moves:
+            if isinstance(move, list):
+                move = tuple(move)
+            weight = 1.0 if winner == state.to_move else 0.5 if winner == 0 else 0.0
+            if weight:
+                self._learn(state.hash_key(), move, weight)
+            state.play(move)
+
+    def learn_from_log(self, path):
+        """
+        Learn from a JSON-lines game log
+
+        Each line: {"game_type": "TicTacToe", "moves": [[1, 1], ...], "winner": 1}
+        """
+        games = 0
+        try:
+            with open(path) as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    game = json.loads(line)
+                    if game.get('game_type', self.game_type) != self.game_type:
+                        continue
+                    self.learn_from_game(game['moves'], game['winner'])
+                    games += 1
+        except Exception as e:
+            print(f"Error reading game log: {e}")
+        return games
+
+
+class OpeningBookAgent:
+    """
+    Puts an OpeningBook in front of any agent's choose_action
+
+    Known positions are answered from the book; everything else (and every
+    other attribute) is passed through to the wrapped agent.
+    """
+
+    def __init__(self, agent, book, to_move=None):
+        self.agent = agent
+        self.book = book
+        self.to_move = to_move
+
+    def __getattr__(self, name):
+        return getattr(self.agent, name)
+
+    def choose_action(self, board, *args, **kwargs):
+        state = state_from_board(self.book.game_type, board, kwargs.get('to_move', self.to_move))
+        move = self.book.lookup(state)
+        if move is not None and move in state.legal_moves():
+            return move
+        return self.agent.choose_action(board, *args, **kwargs)
+
+
+# ทดสอบ Opening book
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    from algorithm.mcts import MCTS
+
+    book = OpeningBook('TicTacToe', path=os.path.join(tempfile.mkdtemp(), 'book.pkl'))
+    start = time.perf_counter()
+    positions = book.build(max_plies=4, time_limit=0.2)
+    print(f"Built book for {positions} positions in {time.perf_counter() - start:.2f}s")
+
+    agent = OpeningBookAgent(MCTS(), book)
+    empty = [[None] * 3 for _ in range(3)]
+    start = time.perf_counter()
+    for _ in range(1000):
+        move = agent.choose_action(empty)
+    print(f"Book move on empty board: {move} ({(time.perf_counter() - start) * 1000:.1f} us per call)")
+
+    book.learn_from_game([(1, 1), (0, 0), (2, 2)], winner=1)
+    book.save()
+    print("Test complete.")
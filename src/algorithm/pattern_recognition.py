@@ -1,15 +1,280 @@
 import json
 import os
 import random
+from collections import OrderedDict
+from collections.abc import MutableMapping
 from copy import deepcopy
+from urllib.parse import quote, unquote
+
+import numpy as np
+
+from algorithm.instrumentation import incr, instrumented, timer
+
+
+class ProfileCache(MutableMapping):
+    """
+    Player profiles: a bounded LRU of hot profiles over a per-player file store
+
+    Cold profiles are written to `directory` (one JSON file per player) when
+    evicted and reloaded on demand. Profiles changed in place must be marked
+    with mark_dirty() so they are written back.
+
+    Args:
+        directory: backing store directory
+        max_entries: maximum number of profiles kept in memory
+        max_bytes: optional bound on the (JSON) size of the profiles in memory
+    """
+    def __init__(self, directory='player_profiles', max_entries=1000, max_bytes=None):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.profiles = OrderedDict()  # player_id -> profile (เรียงจากใช้ล่าสุดน้อยไปมาก)
+        self.sizes = {}  # player_id -> ขนาดโดยประมาณ (bytes)
+        self.total_bytes = 0
+        self.dirty = set()
+        self.hits = self.misses = self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+        # ชื่อผู้เล่นที่มีไฟล์ใน store: อ่านไดเรกทอรีครั้งเดียว แล้วอัปเดตตอนเขียน/ลบ
+        # len() และ iter() จึงไม่ต้องเรียก os.listdir ทุกครั้ง (ไฟล์ที่ process อื่นเพิ่มภายหลังจะไม่เห็น)
+        self.stored = {unquote(name[:-5]) for name in os.listdir(directory) if name.endswith('.json')}
+    
+    def _path(self, player_id):
+        return os.path.join(self.directory, quote(str(player_id), safe='') + '.json')
+    
+    def _load(self, player_id):
+        path = self._path(player_id)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Error loading player profile: {e}")
+            return None
+    
+    def _write(self, player_id):
+        """เขียนโปรไฟล์ลง store แบบ atomic"""
+        path = self._path(player_id)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with timer('pattern.profile_write'), open(tmp, 'w') as f:
+                json.dump(self.profiles[player_id], f)
+                size = f.tell()
+            os.replace(tmp, path)
+            self.stored.add(str(player_id))
+            incr('pattern.bytes_written', size)
+            self._resize(player_id, size)
+            self.dirty.discard(player_id)
+        except Exception as e:
+            print(f"Error saving player profile: {e}")
+    
+    def _resize(self, player_id, size):
+        self.total_bytes += size - self.sizes.get(player_id, 0)
+        self.sizes[player_id] = size
+    
+    def _insert(self, player_id, profile, size):
+        self.profiles[player_id] = profile
+        self.profiles.move_to_end(player_id)
+        self._resize(player_id, size)
+        self._evict()
+    
+    def _evict(self):
+        """ย้ายโปรไฟล์ที่ไม่ได้ใช้นานที่สุดออกจากหน่วยความจำ (เขียนลง store ถ้ามีการแก้ไข)"""
+        while len(self.profiles) > 1 and (
+                len(self.profiles) > self.max_entries or
+                (self.max_bytes is not None and self.total_bytes > self.max_bytes)):
+            player_id = next(iter(self.profiles))
+            if player_id in self.dirty:
+                self._write(player_id)
+            del self.profiles[player_id]
+            self.total_bytes -= self.sizes.pop(player_id, 0)
+            self.evictions += 1
+            incr('pattern.profile_evictions')
+    
+    def __getitem__(self, player_id):
+        profile = self.profiles.get(player_id)
+        if profile is not None:
+            self.profiles.move_to_end(player_id)
+            self.hits += 1
+            incr('pattern.profile_hits')
+            return profile
+        self.misses += 1
+        incr('pattern.profile_misses')
+        profile = self._load(player_id)
+        if profile is None:
+            raise KeyError(player_id)
+        self._insert(player_id, profile, len(json.dumps(profile)))
+        return profile
+    
+    def __contains__(self, player_id):
+        if player_id in self.profiles:
+            return True
+        try:
+            self[player_id]
+            return True
+        except KeyError:
+            return False
+    
+    def __setitem__(self, player_id, profile):
+        self._insert(player_id, profile, len(json.dumps(profile)))
+        self.dirty.add(player_id)
+    
+    def __delitem__(self, player_id):
+        found = player_id in self.profiles
+        if found:
+            del self.profiles[player_id]
+            self.total_bytes -= self.sizes.pop(player_id, 0)
+            self.dirty.discard(player_id)
+        path = self._path(player_id)
+        if os.path.exists(path):
+            os.remove(path)
+            self.stored.discard(str(player_id))
+        elif not found:
+            raise KeyError(player_id)
+    
+    def __iter__(self):
+        return iter(set(self.profiles) | self.stored)
+    
+    def __len__(self):
+        return len(self.stored) + sum(1 for player_id in self.profiles if str(player_id) not in self.stored)
+    
+    def mark_dirty(self, player_id):
+        """แจ้งว่าโปรไฟล์ถูกแก้ไข (ขนาดจะถูกคำนวณใหม่ตอนเขียนลง store)"""
+        if player_id in self.profiles:
+            self.dirty.add(player_id)
+    
+    def flush(self):
+        """เขียนโปรไฟล์ที่มีการแก้ไขทั้งหมดลง store"""
+        for player_id in list(self.dirty):
+            self._write(player_id)
+        self._evict()
+    
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self.profiles),
+            'bytes': self.total_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+
+# สมมาตรทั้ง 8 แบบของกระดาน 3x3: ช่อง r*3+c ย้ายไปที่ SYMMETRIES[t][r*3+c]
+def _symmetries():
+    cells = np.arange(9).reshape(3, 3)
+    boards = []
+    for flipped in (cells, cells.T):
+        for turns in range(4):
+            boards.append(np.rot90(flipped, turns))
+    # boards[t][r][c] = ช่องเดิมที่ย้ายมาอยู่ที่ (r, c) -> กลับด้านเป็นตำแหน่งใหม่ของแต่ละช่อง
+    return np.array([np.argsort(board.reshape(-1)) for board in boards])
+
+
+SYMMETRIES = _symmetries()
+# จำนวนบิตของ mask 18 บิต (X 9 บิตล่าง, O 9 บิตบน)
+POPCOUNT = np.unpackbits(np.arange(1 << 18, dtype='>u4').view(np.uint8).reshape(-1, 4), axis=1).sum(
+    axis=1, dtype=np.int8)
+# SYMMETRY_MASKS[t][mask] = mask 9 บิตหลังแปลงด้วยสมมาตร t
+SYMMETRY_MASKS = np.array([
+    [sum(1 << int(perm[cell]) for cell in range(9) if mask >> cell & 1) for mask in range(512)]
+    for perm in SYMMETRIES
+], dtype=np.uint16)
+
+
+class BoardIndex:
+    """
+    Nearest-neighbour index over a player's recorded boards
+
+    Each board is packed into two 9-bit masks ('X' cells and 'O' cells,
+    stored together as one 18-bit integer); the distance of two boards is the Hamming distance of the masks,
+    optionally minimised over the 8 symmetries of the board.
+
+    Args:
+        board_patterns: player_data["board_patterns"] (board string -> {"moves": {"r,c": weight}})
+    """
+    def __init__(self, board_patterns):
+        boards = list(board_patterns)
+        self.size = len(boards)
+        self.weights = np.zeros((self.size, 9))  # น้ำหนักการเดินของแต่ละช่อง
+        if not boards:
+            self.masks = np.zeros(0, dtype=np.int32)
+            return
+        cells = np.frombuffer(''.join(boards).encode(), dtype=np.uint8).reshape(-1, 9)
+        bits = 1 << np.arange(9)
+        self.masks = ((cells == ord('X')) @ bits | ((cells == ord('O')) @ bits) << 9).astype(np.int32)
+        for i, board in enumerate(boards):
+            for move_str, weight in board_patterns[board]["moves"].items():
+                row, col = map(int, move_str.split(','))
+                self.weights[i, row * 3 + col] = weight
+    
+    @staticmethod
+    def pack(board_str):
+        """แปลงสตริงกระดาน 9 ตัวอักษรเป็น (mask ของ X, mask ของ O)"""
+        x_mask = o_mask = 0
+        for cell, symbol in enumerate(board_str):
+            if symbol == 'X':
+                x_mask |= 1 << cell
+            elif symbol == 'O':
+                o_mask |= 1 << cell
+        return x_mask, o_mask
+    
+    def query(self, board_str, k=5, symmetric=True):
+        """
+        Top-k nearest recorded boards
+
+        Returns:
+            (distances, move weights in the query board's orientation), each of length <= k
+        """
+        if not self.size:
+            return np.zeros(0, dtype=np.int64), np.zeros((0, 9))
+        x_mask, o_mask = self.pack(board_str)
+        transforms = SYMMETRIES if symmetric else SYMMETRIES[:1]
+        # ระยะของทุกกระดานกับคำถามที่แปลงด้วยสมมาตรแต่ละแบบ: (สมมาตร, จำนวนกระดาน)
+        queries = (SYMMETRY_MASKS[:len(transforms), x_mask].astype(np.int32) |
+                   SYMMETRY_MASKS[:len(transforms), o_mask].astype(np.int32) << 9)
+        distances = POPCOUNT[self.masks ^ queries[:, None]]
+        best = distances.argmin(axis=0)
+        nearest = distances[best, np.arange(self.size)].astype(np.int64)
+
+        k = min(k, self.size)
+        top = np.argpartition(nearest, k - 1)[:k] if k < self.size else np.arange(self.size)
+        # ช่อง c ของคำถามตรงกับช่อง perm[c] ของกระดานที่บันทึกไว้
+        perms = transforms[best[top]]
+        weights = np.take_along_axis(self.weights[top], perms, axis=1)
+        return nearest[top], weights
+    
+    def predict(self, board_str, k=5, max_distance=3, symmetric=True):
+        """การเดินที่น่าจะเป็นที่สุดจากกระดานใกล้เคียง (row, col) หรือ None"""
+        distances, weights = self.query(board_str, k, symmetric)
+        close = distances <= max_distance
+        if not close.any():
+            return None
+        # รวมน้ำหนักการเดิน โดยกระดานที่ใกล้กว่ามีน้ำหนักมากกว่า
+        scores = (weights[close] / (1.0 + distances[close, None])).sum(axis=0)
+        scores[np.frombuffer(board_str.encode(), dtype=np.uint8) != ord('_')] = 0.0
+        if scores.max() <= 0:
+            return None
+        return divmod(int(scores.argmax()), 3)
+
 
 class PatternRecognitionAgent:
     """
     Pattern Recognition agent for Tic-Tac-Toe game
     Analyzes player patterns and tries to predict and counter their moves
+
+    Player profiles are kept in a ProfileCache: at most `max_profiles`
+    (and optionally `max_profile_bytes`) stay in memory, the rest live in
+    `profile_dir`. Unseen boards are predicted from the `neighbours`
+    closest recorded boards within `max_distance` (BoardIndex).
     """
-    def __init__(self):
-        self.player_patterns = {}
+    def __init__(self, max_profiles=1000, max_profile_bytes=None, profile_dir='player_profiles',
+                 neighbours=5, max_distance=3):
+        self.player_patterns = ProfileCache(profile_dir, max_profiles, max_profile_bytes)
+        self.board_indexes = OrderedDict()  # player_id -> BoardIndex (LRU ขนาดเท่ากับ cache ของโปรไฟล์)
+        self.neighbours = neighbours
+        self.max_distance = max_distance
         self.current_game_moves = []
         self.load_patterns()
         self.settings = None
@@ -21,22 +286,22 @@ class PatternRecognitionAgent:
         self.settings = game_settings.get_settings()
     
     def load_patterns(self):
-        """โหลดข้อมูลรูปแบบการเล่นจากไฟล์"""
-        if os.path.exists('player_patterns.json'):
+        """โหลดข้อมูลรูปแบบการเล่นจากไฟล์ (ย้าย player_patterns.json เดิมเข้า store ครั้งแรก)"""
+        if os.path.exists('player_patterns.json') and not os.listdir(self.player_patterns.directory):
             try:
                 with open('player_patterns.json', 'r') as f:
-                    self.player_patterns = json.load(f)
-                print(f"Loaded patterns for {len(self.player_patterns)} players")
+                    patterns = json.load(f)
+                for player_id, profile in patterns.items():
+                    self.player_patterns[player_id] = profile
+                self.player_patterns.flush()
+                print(f"Loaded patterns for {len(patterns)} players")
             except Exception as e:
                 print(f"Error loading pattern data: {e}")
     
     def save_patterns(self):
-        """บันทึกข้อมูลรูปแบบการเล่นลงไฟล์"""
-        try:
-            with open('player_patterns.json', 'w') as f:
-                json.dump(self.player_patterns, f, indent=2)
-        except Exception as e:
-            print(f"Error saving pattern data: {e}")
+        """บันทึกข้อมูลรูปแบบการเล่นลงไฟล์ (เฉพาะโปรไฟล์ที่มีการเปลี่ยนแปลง)"""
+        with timer('pattern.save'):
+            self.player_patterns.flush()
     
     def reset_for_new_game(self):
         """รีเซ็ตข้อมูลสำหรับเกมใหม่"""
@@ -62,6 +327,7 @@ class PatternRecognitionAgent:
             "player": player_id
         })
     
+    @instrumented('pattern.analyze_game')
     def analyze_game(self, winner=None, player_id="default"):
         """วิเคราะห์เกมที่จบแล้วและอัปเดตรูปแบบ"""
         if not self.current_game_moves:
@@ -131,11 +397,14 @@ class PatternRecognitionAgent:
                 player_data["favorite_moves"][move_str] += weight
         
         # บันทึกข้อมูลรูปแบบ
+        self.player_patterns.mark_dirty(player_id)
+        self.board_indexes.pop(player_id, None)
         self.save_patterns()
         
         # รีเซ็ตสำหรับเกมใหม่
         self.reset_for_new_game()
     
+    @instrumented('pattern.predict_move')
     def predict_move(self, board, player_id="default"):
         """ทำนายการเคลื่อนที่ถัดไปของผู้เล่นจากรูปแบบที่เคยเล่น"""
         # ถ้ายังไม่มีข้อมูลผู้เล่น
@@ -147,6 +416,7 @@ class PatternRecognitionAgent:
         
         # เช็คว่าเคยเจอรูปแบบกระดานนี้หรือไม่
         if current_board in player_data["board_patterns"]:
+            incr('pattern.board_hits')
             patterns = player_data["board_patterns"][current_board]
             
             if patterns:
@@ -155,7 +425,14 @@ class PatternRecognitionAgent:
                 row, col = map(int, best_move.split(','))
                 return (row, col)
         
-        # ถ้าไม่เคยเจอรูปแบบนี้ ลองดูการเคลื่อนที่ที่ชอบ
+        # ถ้าไม่เคยเจอรูปแบบนี้ ลองดูกระดานที่ใกล้เคียงที่สุด (รวมถึงกระดานที่หมุน/กลับด้าน)
+        move = self._board_index(player_id, player_data).predict(
+            current_board, self.neighbours, self.max_distance)
+        if move is not None:
+            incr('pattern.neighbour_hits')
+            return move
+        
+        # ถ้าไม่มีกระดานที่ใกล้เคียง ลองดูการเคลื่อนที่ที่ชอบ
         if player_data["favorite_moves"]:
             # กรองเฉพาะการเคลื่อนที่ที่ยังทำได้
             valid_moves = []
@@ -174,6 +451,18 @@ class PatternRecognitionAgent:
         # ถ้าไม่มีรูปแบบที่พบหรือการเคลื่อนที่ที่ชอบที่ใช้ได้
         return None
     
+    def _board_index(self, player_id, player_data):
+        """BoardIndex ของผู้เล่น (สร้างใหม่เมื่อรูปแบบมีการเปลี่ยนแปลง)"""
+        index = self.board_indexes.get(player_id)
+        if index is None:
+            index = self.board_indexes[player_id] = BoardIndex(player_data["board_patterns"])
+            if len(self.board_indexes) > self.player_patterns.max_entries:
+                self.board_indexes.popitem(last=False)
+        else:
+            self.board_indexes.move_to_end(player_id)
+        return index
+    
+    @instrumented('pattern.choose_counter_move')
     def choose_counter_move(self, board, player_id="default"):
         """เลือกการเคลื่อนที่เพื่อตอบโต้ผู้เล่น"""
         # ตรวจสอบการชนะของ AI
@@ -0,0 +1,387 @@
+import numpy as np
+
+from algorithm.instrumentation import instrumented, timer
+
+# Texas Hold'em hand evaluation และการคำนวณ equity
+#
+# ไพ่แทนด้วยเลข 0-51: card = rank * 4 + suit (rank 0 = '2' ... 12 = 'A')
+# ค่ามือ (hand value) เป็นจำนวนเต็ม ยิ่งมากยิ่งชนะ:
+#     category << 20 | ลำดับ rank ที่ใช้ตัดสิน 5 ตัว (ตัวละ 4 บิต)
+
+RANKS = '23456789TJQKA'
+SUITS = 'cdhs'
+SUIT_NAMES = {'clubs': 0, 'diamonds': 1, 'hearts': 2, 'spades': 3}
+
+HAND_CATEGORIES = ['High Card', 'One Pair', 'Two Pair', 'Three of a Kind', 'Straight',
+                   'Flush', 'Full House', 'Four of a Kind', 'Straight Flush']
+HIGH_CARD, ONE_PAIR, TWO_PAIR, THREE_OF_A_KIND, STRAIGHT, FLUSH, FULL_HOUSE, \
+    FOUR_OF_A_KIND, STRAIGHT_FLUSH = range(9)
+
+# mask ของ straight จากสูงไปต่ำ (A-high ... wheel A-2-3-4-5) และ rank สูงสุดของแต่ละแบบ
+STRAIGHTS = [(0b11111 << low, low + 4) for low in range(8, -1, -1)] + [(0b1000000001111, 3)]
+
+# key แบบบวกกันได้ของ evaluate_batch(): บิต 0-16 นับ rank 2-8 (ฐาน 5), บิต 17-30 นับ rank 9-A,
+# บิต 31-42 นับไพ่แต่ละ suit (ช่องละ 3 บิต)
+LOW_RANKS = 7
+LOW_KEYS, HIGH_KEYS = 5 ** LOW_RANKS, 5 ** (13 - LOW_RANKS)
+LOW_BITS, SUIT_SHIFT = 17, 31
+LOW_MASK, HIGH_MASK = (1 << LOW_BITS) - 1, (1 << SUIT_SHIFT - LOW_BITS) - 1
+SUIT_LOW_BITS = 0b001001001001
+
+
+def parse_card(card):
+    """
+    Convert a card to its 0-51 index
+
+    Accepts an int, a string such as 'Ah', 'Td' or '10s', or the frontend
+    dict {"rank": "A", "suit": "hearts"}.
+    """
+    if isinstance(card, (int, np.integer)):
+        return int(card)
+    if isinstance(card, dict):
+        rank, suit = str(card['rank']), SUIT_NAMES.get(card['suit'], None)
+        if suit is None:
+            suit = SUITS.index(card['suit'][0].lower())
+    else:
+        rank, suit = card[:-1], SUITS.index(card[-1].lower())
+    rank = 'T' if rank == '10' else rank.upper()
+    return RANKS.index(rank) * 4 + suit
+
+
+def card_to_str(card):
+    return RANKS[card >> 2] + SUITS[card & 3]
+
+
+def _pack(category, ranks):
+    value = category
+    for i in range(5):
+        value = (value << 4) | (ranks[i] if i < len(ranks) else 0)
+    return value
+
+
+def _best_straight(mask):
+    for straight, high in STRAIGHTS:
+        if mask & straight == straight:
+            return high
+    return None
+
+
+def _value_from_counts(counts):
+    """ค่ามือที่ดีที่สุดจากจำนวนไพ่แต่ละ rank (กรณีไม่มี flush)"""
+    by_count = {4: [], 3: [], 2: [], 1: []}
+    mask = 0
+    for rank in range(12, -1, -1):
+        count = counts[rank]
+        if count:
+            by_count[count].append(rank)
+            mask |= 1 << rank
+    if by_count[4]:
+        quad = by_count[4][0]
+        kicker = max(r for r in range(13) if counts[r] and r != quad)
+        return _pack(FOUR_OF_A_KIND, [quad, kicker])
+    if by_count[3]:
+        trips = by_count[3][0]
+        pairs = [r for r in by_count[3][1:] + by_count[2] if r != trips]
+        if pairs:
+            return _pack(FULL_HOUSE, [trips, max(pairs)])
+    high = _best_straight(mask)
+    if high is not None:
+        return _pack(STRAIGHT, [high])
+    singles = sorted(by_count[1] + by_count[2][2:], reverse=True)
+    if by_count[3]:
+        return _pack(THREE_OF_A_KIND, [by_count[3][0]] + singles[:2])
+    if len(by_count[2]) >= 2:
+        first, second = by_count[2][:2]
+        kicker = max([r for r in by_count[1]] + by_count[2][2:])
+        return _pack(TWO_PAIR, [first, second, kicker])
+    if by_count[2]:
+        return _pack(ONE_PAIR, [by_count[2][0]] + by_count[1][:3])
+    return _pack(HIGH_CARD, by_count[1][:5])
+
+
+def _flush_value(mask):
+    high = _best_straight(mask)
+    if high is not None:
+        return _pack(STRAIGHT_FLUSH, [high])
+    return _pack(FLUSH, [r for r in range(12, -1, -1) if mask >> r & 1][:5])
+
+
+class HandEvaluator:
+    """
+    Lookup-table hand evaluator for 5, 6 and 7 cards
+
+    Flushes are looked up by the 13-bit rank mask of the flush suit.
+    Other hands use a minimal perfect hash of the rank counts (the index
+    of the count vector among all vectors with the same card total), so
+    every hand costs a handful of table reads and no combinatorics.
+    Both paths are vectorized for NumPy batches in evaluate_batch(), which
+    sums one packed key per card and splits the perfect hash into two
+    lookups (ranks 2-8 and 9-A) instead of walking the 13 ranks.
+    """
+
+    def __init__(self):
+        with timer('poker.build_tables'):
+            self._build_tables()
+
+    def _build_tables(self):
+        # OFFSETS[i, k, q] = จำนวน count vector ที่มาก่อน เมื่อ rank ที่ i มี q ใบ และเหลือ k ใบ
+        ways = np.zeros((14, 8), dtype=np.int64)
+        ways[0, 0] = 1
+        for n in range(1, 14):
+            for k in range(8):
+                ways[n, k] = sum(ways[n - 1, k - c] for c in range(min(4, k) + 1))
+        offsets = np.zeros((13, 8, 5), dtype=np.int32)
+        for i in range(13):
+            remaining = 12 - i
+            for k in range(8):
+                for q in range(1, 5):
+                    offsets[i, k, q] = offsets[i, k, q - 1] + (ways[remaining, k - q + 1] if k - q + 1 >= 0 else 0)
+        self.offsets = offsets
+        self._offset_lists = offsets.tolist()
+
+        self.flush_table = np.zeros(1 << 13, dtype=np.int32)
+        for mask in range(1 << 13):
+            if bin(mask).count('1') >= 5:
+                self.flush_table[mask] = _flush_value(mask)
+
+        self.rank_tables = {}
+        for total in (5, 6, 7):
+            table = np.zeros(int(ways[13, total]), dtype=np.int32)
+            for counts in self._count_vectors(13, total):
+                table[self._hash_counts(counts, total)] = _value_from_counts(counts)
+            self.rank_tables[total] = table
+        # สำเนาแบบ list สำหรับ evaluate() ทีละมือ (อ่าน list เร็วกว่า index ของ NumPy)
+        self._flush_list = self.flush_table.tolist()
+        self._rank_lists = {total: table.tolist() for total, table in self.rank_tables.items()}
+
+        # ตารางสำหรับ evaluate_batch(): hash ของ rank ต่ำ (2-8) และสูง (9-A) แยกกัน
+        # LOW_INDEX[total, key] = ผลรวม offset ของ rank ต่ำ, HIGH_INDEX[เหลือกี่ใบ, key] = ของ rank สูง
+        low_digits = np.arange(LOW_KEYS)[:, None] // 5 ** np.arange(LOW_RANKS) % 5
+        high_digits = np.arange(HIGH_KEYS)[:, None] // 5 ** np.arange(13 - LOW_RANKS) % 5
+        self.low_count = low_digits.sum(axis=1)
+        self.low_index = self._partial_index(low_digits, 0)
+        self.high_index = self._partial_index(high_digits, LOW_RANKS)
+        # key ของไพ่แต่ละใบ: นับ rank ต่ำ/สูงแบบฐาน 5 และนับ suit ช่องละ 3 บิต (รวมกันได้ด้วยการบวก)
+        self.card_keys = np.array([
+            (5 ** (card >> 2) if card >> 2 < LOW_RANKS else 5 ** ((card >> 2) - LOW_RANKS) << LOW_BITS) |
+            1 << 3 * (card & 3) + SUIT_SHIFT
+            for card in range(52)], dtype=np.int64)
+
+    def _partial_index(self, digits, first_rank):
+        """ผลรวม offset ของ rank first_rank.. สำหรับทุก count vector ย่อยและทุกจำนวนไพ่ที่เหลือ (0-7)"""
+        index = np.zeros((8, len(digits)), dtype=np.int32)
+        before = np.cumsum(digits, axis=1) - digits
+        for total in range(8):
+            remaining = total - before
+            valid = (remaining >= digits).all(axis=1)
+            ranks = np.arange(digits.shape[1]) + first_rank
+            parts = self.offsets[ranks, np.clip(remaining, 0, 7), digits]
+            index[total, valid] = parts[valid].sum(axis=1)
+        return index
+
+    @staticmethod
+    def _count_vectors(ranks, total):
+        if ranks == 1:
+            if total <= 4:
+                yield [total]
+            return
+        for count in range(min(4, total) + 1):
+            for rest in HandEvaluator._count_vectors(ranks - 1, total - count):
+                yield [count] + rest
+
+    def _hash_counts(self, counts, total):
+        index = 0
+        offsets = self._offset_lists
+        for i in range(13):
+            count = counts[i]
+            if count:
+                index += offsets[i][total][count]
+                total -= count
+        return index
+
+    def evaluate(self, cards):
+        """ค่ามือของไพ่ 5-7 ใบ (รายการของเลข 0-51)"""
+        counts = [0] * 13
+        suit_counts = [0, 0, 0, 0]
+        suit_masks = [0, 0, 0, 0]
+        for card in cards:
+            rank, suit = card >> 2, card & 3
+            counts[rank] += 1
+            suit_counts[suit] += 1
+            suit_masks[suit] |= 1 << rank
+        for suit in range(4):
+            if suit_counts[suit] >= 5:
+                return self._flush_list[suit_masks[suit]]
+        return self._rank_lists[len(cards)][self._hash_counts(counts, len(cards))]
+
+    def evaluate_batch(self, hands):
+        """
+        Evaluate many hands at once
+
+        Args:
+            hands: int array of shape (n, k) with k in 5..7 cards per hand
+
+        Returns:
+            int32 array of hand values, shape (n,)
+        """
+        hands = np.asarray(hands)
+        total = hands.shape[1]
+        keys = self.card_keys[hands.T]
+        key = keys[0].copy()
+        for card_key in keys[1:]:
+            key += card_key
+        low = key & LOW_MASK
+        high = (key >> LOW_BITS) & HIGH_MASK
+        index = self.low_index[total][low] + self.high_index[total - self.low_count[low], high]
+        values = self.rank_tables[total][index]
+
+        # ช่อง 3 บิตของ suit ที่มีตั้งแต่ 5 ใบ: บิต 2 ตั้ง และบิต 0 หรือ 1 ตั้งด้วย
+        suits = key >> SUIT_SHIFT
+        flush = suits & ((suits | suits >> 1) & SUIT_LOW_BITS) << 2
+        is_flush = flush != 0
+        if is_flush.any():
+            flush_suit = np.log2(flush[is_flush]).astype(np.int64) // 3
+            flush_hands = hands[is_flush]
+            in_suit = (flush_hands & 3) == flush_suit[:, None]
+            masks = (in_suit << (flush_hands >> 2)).sum(axis=1)
+            values[is_flush] = self.flush_table[masks]
+        return values
+
+    @staticmethod
+    def category(value):
+        return HAND_CATEGORIES[value >> 20]
+
+
+_default_evaluator = None
+
+
+def get_evaluator():
+    """HandEvaluator ที่ใช้ร่วมกัน (สร้างตารางครั้งแรกที่เรียกใช้)"""
+    global _default_evaluator
+    if _default_evaluator is None:
+        _default_evaluator = HandEvaluator()
+    return _default_evaluator
+
+
+class EquityCalculator:
+    """
+    Monte Carlo equity against random opponent hands
+
+    All runouts of one call are sampled as a single NumPy batch and
+    evaluated with HandEvaluator.evaluate_batch().
+    """
+
+    def __init__(self, evaluator=None, seed=None):
+        self.evaluator = evaluator or get_evaluator()
+        self.rng = np.random.default_rng(seed)
+
+    def _sample(self, deck, samples, needed):
+        """สุ่มไพ่ `needed` ใบโดยไม่ซ้ำในแต่ละ sample (Fisher-Yates บางส่วนแบบ vectorized)"""
+        cards = np.tile(deck, (samples, 1))
+        rows = np.arange(samples)
+        positions = np.arange(needed)[:, None]
+        picks = (self.rng.random((needed, samples)) * (len(deck) - positions)).astype(np.int64) + positions
+        for j in range(needed):
+            pick = picks[j]
+            chosen = cards[rows, pick]
+            cards[rows, pick] = cards[:, j]
+            cards[:, j] = chosen
+        return cards[:, :needed]
+
+    @instrumented('poker.equity')
+    def equity(self, hole_cards, community_cards=(), num_opponents=1, samples=1000):
+        """
+        Args:
+            hole_cards: the player's two cards
+            community_cards: 0-5 board cards
+            num_opponents: number of opponents with unknown hands
+            samples: number of random runouts
+
+        Returns:
+            float: expected share of the pot (wins + split ties) in [0, 1]
+
+        Raises:
+            ValueError: if there is no opponent or not enough cards left to deal
+        """
+        if num_opponents < 1:
+            raise ValueError(f"Equity needs at least one opponent, got {num_opponents}")
+        hole = [parse_card(c) for c in hole_cards]
+        board = [parse_card(c) for c in community_cards]
+        known = set(hole) | set(board)
+        deck = np.array([c for c in range(52) if c not in known], dtype=np.int64)
+
+        board_needed = 5 - len(board)
+        needed = board_needed + 2 * num_opponents
+        if needed > len(deck):
+            raise ValueError(f"Not enough cards left to deal {num_opponents} opponents")
+        drawn = self._sample(deck, samples, needed)
+
+        board_cards = np.broadcast_to(np.array(board, dtype=np.int64), (samples, len(board)))
+        full_board = np.concatenate([board_cards, drawn[:, :board_needed]], axis=1)
+        # มือของเราและของคู่แข่งทุกคนประเมินใน batch เดียว: (samples, 1 + opponents, 7)
+        hole_cards = np.concatenate(
+            [np.broadcast_to(np.array(hole, dtype=np.int64), (samples, 1, 2)),
+             drawn[:, board_needed:].reshape(samples, num_opponents, 2)], axis=1)
+        hands = np.concatenate(
+            [hole_cards, np.broadcast_to(full_board[:, None, :], (samples, num_opponents + 1, 5))], axis=2)
+        values = self.evaluator.evaluate_batch(hands.reshape(-1, 7)).reshape(samples, num_opponents + 1)
+        hero_values, opponent_values = values[:, 0], values[:, 1:]
+
+        best_opponent = opponent_values.max(axis=1)
+        ties = (opponent_values == hero_values[:, None]).sum(axis=1)
+        share = np.where(hero_values > best_opponent, 1.0,
+                         np.where(hero_values == best_opponent, 1.0 / (ties + 1), 0.0))
+        return float(share.mean())
+
+
+class PokerAgent:
+    """
+    Equity-based poker AI
+
+    Compares Monte Carlo equity with the pot odds of the current bet and
+    raises with strong hands.
+    """
+
+    def __init__(self, samples=1000, raise_threshold=0.65, seed=None):
+        self.samples = samples
+        self.raise_threshold = raise_threshold
+        self.calculator = EquityCalculator(seed=seed)
+
+    @instrumented('poker.choose_action')
+    def choose_action(self, hole_cards, community_cards, pot, to_call, num_opponents=1, min_raise=0):
+        """
+        Returns:
+            dict: {"action": "fold"|"check"|"call"|"raise", "amount": int, "equity": float}
+        """
+        equity = self.calculator.equity(hole_cards, community_cards, num_opponents, self.samples)
+        # pot odds: สัดส่วนของเงินที่ต้องจ่ายเทียบกับ pot หลังจากจ่ายแล้ว
+        pot_odds = to_call / (pot + to_call) if to_call > 0 else 0.0
+
+        if equity >= self.raise_threshold:
+            amount = max(min_raise, int(pot * equity))
+            return {'action': 'raise', 'amount': to_call + amount, 'equity': equity}
+        if to_call == 0:
+            return {'action': 'check', 'amount': 0, 'equity': equity}
+        if equity >= pot_odds:
+            return {'action': 'call', 'amount': to_call, 'equity': equity}
+        return {'action': 'fold', 'amount': 0, 'equity': equity}
+
+
+# ทดสอบ Poker evaluator
+if __name__ == "__main__":
+    import time
+
+    evaluator = get_evaluator()
+    hand = [parse_card(c) for c in ['Ah', 'Kh', 'Qh', 'Jh', 'Th', '2c', '3d']]
+    print(f"Royal flush: {evaluator.category(evaluator.evaluate(hand))}")
+
+    calculator = EquityCalculator(seed=0)
+    calculator.equity(['As', 'Ad'], [], 1, 1000)
+    start = time.perf_counter()
+    equity = calculator.equity(['As', 'Ad'], [], 1, 1000)
+    print(f"AA vs 1 opponent: {equity:.3f} ({(time.perf_counter() - start) * 1000:.2f} ms)")
+
+    agent = PokerAgent(seed=0)
+    print(f"AI decision: {agent.choose_action(['7c', '2d'], ['Ks', '9h', '4c'], pot=100, to_call=50)}")
+
+    print("Test complete.")
@@ -1,43 +1,91 @@
+import atexit
 import numpy as np
 import pickle
 import os
 import random
 from copy import deepcopy
 
+from algorithm.instrumentation import incr, instrumented, timer
+from algorithm.shared_q_table import SharedQTable
+from algorithm.td_learning import batch_from_moves, encode_game, td_lambda_update, train_offline
+
+# snapshot ของตาราง TD(lambda) ส่วนตัว (แยกจาก q_table.npy ของตารางร่วม)
+TD_TABLE_SNAPSHOT = 'q_table_lambda.npy'
+
 class QLearningAgent:
     """
     Q-Learning agent for Tic-Tac-Toe game
     Uses Q-learning algorithm to improve playing strategy over time
+
+    With `shared_table` (SharedQTable) the Q-values live in shared memory
+    and are shared by every worker process instead of q_values.pkl.
+    With `trace_decay` (lambda) games are learned by vectorized TD(lambda)
+    on the dense table. Without a shared_table the agent creates and owns
+    a private SharedQTable (snapshot q_table_lambda.npy), released by
+    close() or at exit.
     """
-    def __init__(self, learning_rate=0.3, discount_factor=0.9, exploration_rate=0.2):
+    def __init__(self, learning_rate=0.3, discount_factor=0.9, exploration_rate=0.2, shared_table=None,
+                 trace_decay=None, load=True):
         self.learning_rate = learning_rate  # Alpha: โอกาสในการเรียนรู้
         self.discount_factor = discount_factor  # Gamma: น้ำหนักของรางวัลในอนาคต
         self.exploration_rate = exploration_rate  # Epsilon: โอกาสในการสำรวจ
         self.q_values = {}  # Q-table เก็บค่า Q(s,a)
         self.last_states = []  # เก็บสถานะที่ผ่านมาในเกมปัจจุบัน
         self.last_actions = []  # เก็บการกระทำที่ผ่านมาในเกมปัจจุบัน
+        self.trace_decay = trace_decay  # Lambda: None = Q-learning แบบเดิม, 1.0 = Monte Carlo
+        self._owns_table = False
+        if trace_decay is not None and shared_table is None:
+            shared_table = SharedQTable(snapshot_path=TD_TABLE_SNAPSHOT)
+            shared_table.load_snapshot()
+            self._owns_table = True
+            atexit.register(self.close)
+        self.shared_table = shared_table  # Q-table ใน shared memory (ถ้ามี)
         
         # โหลด Q-values จากไฟล์ถ้ามีอยู่
-        self.load_q_values()
-    
-    def load_q_values(self):
-        """โหลด Q-values จากไฟล์"""
-        if os.path.exists('q_values.pkl'):
-            try:
-                with open('q_values.pkl', 'rb') as f:
-                    self.q_values = pickle.load(f)
-                print(f"Loaded {len(self.q_values)} Q-values from file")
-            except Exception as e:
-                print(f"Error loading Q-values: {e}")
+        if shared_table is None and load:
+            self.load_q_values()
+    
+    def load_q_values(self, path='q_values.pkl', strict=False):
+        """โหลด Q-values จากไฟล์ (strict=True: raise เมื่อไม่มีไฟล์หรืออ่านไม่ได้)"""
+        if not os.path.exists(path):
+            if strict:
+                raise FileNotFoundError(f"Q-values file not found: {path}")
+            return
+        try:
+            with open(path, 'rb') as f:
+                q_values = pickle.load(f)
+            if not isinstance(q_values, dict):
+                raise ValueError(f"Unexpected Q-values type: {type(q_values).__name__}")
+            self.q_values = q_values
+            print(f"Loaded {len(self.q_values)} Q-values from file")
+        except Exception as e:
+            if strict:
+                raise
+            print(f"Error loading Q-values: {e}")
     
     def save_q_values(self):
         """บันทึก Q-values ลงไฟล์"""
+        if self.shared_table is not None:
+            # ตารางร่วมบันทึกเป็น snapshot ตามรอบเวลา โดย process เจ้าของตาราง
+            self.shared_table.maybe_snapshot()
+            return
         try:
-            with open('q_values.pkl', 'wb') as f:
+            with timer('qlearning.save'), open('q_values.pkl', 'wb') as f:
                 pickle.dump(self.q_values, f)
+                incr('qlearning.bytes_written', f.tell())
         except Exception as e:
             print(f"Error saving Q-values: {e}")
     
+    def close(self):
+        """บันทึกและปล่อยตารางส่วนตัว (ตารางที่ส่งเข้ามาเป็นหน้าที่ของผู้สร้าง)"""
+        if not self._owns_table or self.shared_table is None:
+            return
+        atexit.unregister(self.close)
+        table, self.shared_table = self.shared_table, None
+        if table.owner_pid == os.getpid():
+            table.snapshot()
+        table.close()
+    
     def reset_for_new_game(self):
         """รีเซ็ตสถานะสำหรับเกมใหม่"""
         self.last_states = []
@@ -77,6 +125,9 @@ class QLearningAgent:
         ดึงค่า Q(s,a) จาก Q-table
         ถ้าไม่มี ให้ค่าเริ่มต้นเป็น 0
         """
+        if self.shared_table is not None:
+            return self.shared_table.get(state, action)
+        
         state_str = str(state)
         action_str = str(action)
         
@@ -85,6 +136,9 @@ class QLearningAgent:
         
         if action_str not in self.q_values[state_str]:
             self.q_values[state_str][action_str] = 0.0
+            incr('qlearning.q_misses')
+        else:
+            incr('qlearning.q_hits')
         
         return self.q_values[state_str][action_str]
     
@@ -92,6 +146,10 @@ class QLearningAgent:
         """
         อัปเดตค่า Q(s,a) ใน Q-table
         """
+        if self.shared_table is not None:
+            self.shared_table.set(state, action, value)
+            return
+        
         state_str = str(state)
         action_str = str(action)
         
@@ -100,6 +158,15 @@ class QLearningAgent:
         
         self.q_values[state_str][action_str] = value
     
+    def _adjust_q_value(self, state, action, delta):
+        """
+        เพิ่มค่า Q(s,a) ด้วย delta (ใน shared table ทำแบบ atomic จึงไม่ทับ update ของ learner อื่น)
+        """
+        if self.shared_table is not None:
+            self.shared_table.add(state, action, delta)
+        else:
+            self._update_q_value(state, action, self._get_q_value(state, action) + delta)
+    
     def _best_action(self, state, possible_actions):
         """
         เลือกการกระทำที่ดีที่สุดโดยพิจารณาจากค่า Q
@@ -123,6 +190,7 @@ class QLearningAgent:
         # สุ่มเลือกจากการกระทำที่ดีที่สุด (กรณีที่มีหลายตัวเท่ากัน)
         return random.choice(best_actions) if best_actions else None
     
+    @instrumented('qlearning.choose_action')
     def choose_action(self, board):
         """
         เลือกการกระทำตามนโยบาย epsilon-greedy
@@ -142,6 +210,12 @@ class QLearningAgent:
         
         return action
     
+    def greedy_action(self, board):
+        """
+        การกระทำที่ดีที่สุดตามค่า Q โดยไม่มีการสำรวจ
+        """
+        return self._best_action(self._board_to_state(board), self._get_possible_actions(board))
+    
     def record_move(self, board, action):
         """
         บันทึกสถานะและการกระทำในเกมปัจจุบัน
@@ -150,6 +224,7 @@ class QLearningAgent:
         self.last_states.append(state)
         self.last_actions.append(action)
     
+    @instrumented('qlearning.learn_from_game')
     def learn_from_game(self, reward):
         """
         เรียนรู้จากเกมที่จบแล้ว ด้วยรางวัลที่ได้รับ
@@ -158,6 +233,15 @@ class QLearningAgent:
         if not self.last_states or not self.last_actions:
             return
         
+        if self.trace_decay is not None:
+            # อัปเดตทั้งเกมใน pass เดียวบน dense table
+            states, actions = encode_game(self.last_states, self.last_actions)
+            td_lambda_update(self.shared_table, states, actions, len(states), reward,
+                             self.learning_rate, self.discount_factor, self.trace_decay)
+            self.save_q_values()
+            self.reset_for_new_game()
+            return
+        
         # ระบุรางวัลสำหรับสถานะสุดท้าย
         self._update_q_value(
             self.last_states[-1],
@@ -180,10 +264,10 @@ class QLearningAgent:
             
             # คำนวณค่า Q ใหม่ตามสูตร Q-learning
             current_q = self._get_q_value(state, action)
-            new_q = current_q + self.learning_rate * (self.discount_factor * max_next_q - current_q)
+            delta = self.learning_rate * (self.discount_factor * max_next_q - current_q)
             
             # อัปเดต Q-value
-            self._update_q_value(state, action, new_q)
+            self._adjust_q_value(state, action, delta)
         
         # บันทึก Q-values ลงไฟล์
         self.save_q_values()
@@ -191,6 +275,22 @@ class QLearningAgent:
         # รีเซ็ตสำหรับเกมใหม่
         self.reset_for_new_game()
     
+    @instrumented('qlearning.learn_from_batch')
+    def learn_from_batch(self, moves, lengths, winners, epochs=1, batch_size=65536):
+        """
+        เรียนรู้จากเกมจำนวนมากพร้อมกัน (เช่นจาก log) ด้วย TD(lambda) แบบ vectorized
+        moves: (จำนวนเกม, 9) index ช่อง r*3+c ตามลำดับการเดิน, lengths: จำนวนการเดิน,
+        winners: 1 ('X' ชนะ), -1 ('O' ชนะ), 0 (เสมอ) โดย AI เป็นฝ่าย 'X'
+        """
+        if self.shared_table is None:
+            raise ValueError("Batch learning needs the dense Q-table (shared_table or trace_decay)")
+        trace_decay = 0.0 if self.trace_decay is None else self.trace_decay
+        error = train_offline(self.shared_table, *batch_from_moves(moves, lengths, winners),
+                              epochs=epochs, batch_size=batch_size, learning_rate=self.learning_rate,
+                              discount_factor=self.discount_factor, trace_decay=trace_decay)
+        self.save_q_values()
+        return error
+    
     def _state_to_board(self, state):
         """
         แปลง state กลับเป็นกระดาน (สำหรับการคำนวณภายใน)
@@ -0,0 +1,161 @@
+import random
+import threading
+import time
+from collections import OrderedDict
+
+from algorithm.instrumentation import incr
+
+# Cache ผลการเลือกการเดินของ agent ที่ให้ผลแน่นอน (deterministic) สำหรับกระดานเดียวกัน
+#
+# key = (เวอร์ชันของโมเดล, กระดานแบบเลขฐาน 3) และการสำรวจแบบ epsilon ทำนอกเหนือ cache
+# จึงกระดานที่พบบ่อยไม่ต้องเรียกโมเดลเลย
+
+CELL_VALUES = {None: 0, 'X': 1, 'O': 2}
+# เมธอดที่เปลี่ยนโมเดลของ agent: เรียกผ่าน CachedAgent แล้วล้าง cache ทันที
+TRAINING_METHODS = ('learn_from_game', 'train_on_game', 'train_on_batch', 'learn_from_batch', 'replay_batch')
+
+
+def pack_board(board):
+    """แปลงกระดาน Tic-Tac-Toe เป็นจำนวนเต็ม (ฐาน 3, เหมือน shared_q_table.state_index)"""
+    key = 0
+    for row in board:
+        for cell in row:
+            key = key * 3 + CELL_VALUES[cell]
+    return key
+
+
+class CachedAgent:
+    """
+    Memoizes an agent's greedy move per (model version, board)
+
+    The greedy move comes from agent.greedy_action (QLearningAgent,
+    NeuralNetworkAgent, DeepQNetwork) or choose_action for agents that are
+    deterministic already (GeneticAlgorithm). Exploration is applied here,
+    before the cache, with the agent's own exploration rate.
+
+    A plain agent that keeps learning online must pass a version that
+    changes with the model (e.g. a callable returning an update counter);
+    training methods called through the wrapper also clear the cache.
+
+    Args:
+        agent: agent or HotSwapAgent (its version keys the cache)
+        version: model version, or a callable returning it (required for plain agents)
+        epsilon: exploration rate (None = agent.exploration_rate / agent.epsilon / 0)
+        max_entries: LRU bound
+        ttl: seconds an entry stays valid (None = until evicted or the version changes)
+
+    Raises:
+        ValueError: if a plain agent is given without a version
+    """
+
+    def __init__(self, agent, version=None, epsilon=None, max_entries=100000, ttl=None):
+        if version is None and not hasattr(agent, 'current'):
+            raise ValueError("CachedAgent needs a version (or a callable returning it) for a plain agent")
+        self.agent = agent
+        self.version = version
+        self.epsilon = epsilon
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()  # (version, board key) -> (move, time)
+        self.cached_version = None
+        self.hits = self.misses = self.evictions = 0
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        attr = getattr(self.__dict__['agent'], name)
+        if name in TRAINING_METHODS and callable(attr):
+            def train(*args, **kwargs):
+                try:
+                    return attr(*args, **kwargs)
+                finally:
+                    self.clear()
+            return train
+        return attr
+
+    def _current(self):
+        """(version, agent) ที่ใช้ใน request นี้"""
+        if hasattr(self.agent, 'current'):
+            return self.agent.current()
+        version = self.version() if callable(self.version) else self.version
+        return version, self.agent
+
+    def _exploration_rate(self, agent):
+        if self.epsilon is not None:
+            return self.epsilon
+        return getattr(agent, 'exploration_rate', getattr(agent, 'epsilon', 0.0))
+
+    def choose_action(self, board):
+        version, agent = self._current()
+        empty = [(i, j) for i in range(3) for j in range(3) if board[i][j] is None]
+        if not empty:
+            return None
+        if random.random() < self._exploration_rate(agent):
+            incr('cache.explore')
+            return random.choice(empty)
+        return self.greedy_action(board, version, agent)
+
+    def greedy_action(self, board, version=None, agent=None):
+        if agent is None:
+            version, agent = self._current()
+        key = (version, pack_board(board))
+        now = time.time()
+        with self._lock:
+            if version != self.cached_version:
+                # โมเดลเปลี่ยนเวอร์ชัน: ผลเก่าใช้ไม่ได้แล้ว
+                self.entries.clear()
+                self.cached_version = version
+            entry = self.entries.get(key)
+            if entry is not None and (self.ttl is None or now - entry[1] < self.ttl):
+                self.entries.move_to_end(key)
+                self.hits += 1
+                incr('cache.hits')
+                return entry[0]
+            self.misses += 1
+        incr('cache.misses')
+
+        greedy = getattr(agent, 'greedy_action', agent.choose_action)
+        move = greedy([row[:] for row in board])
+        if move is not None:
+            move = (int(move[0]), int(move[1]))
+        with self._lock:
+            if version == self.cached_version:
+                self.entries[key] = (move, now)
+                self.entries.move_to_end(key)
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+                    self.evictions += 1
+                    incr('cache.evictions')
+        return move
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self.entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+
+# ทดสอบ Result cache
+if __name__ == "__main__":
+    from algorithm.genetic_algorithm import GeneticAlgorithm
+
+    agent = CachedAgent(GeneticAlgorithm(), version=1)
+    boards = [[[None] * 3 for _ in range(3)], [['X', None, None], [None, 'O', None], [None, None, None]]]
+
+    start = time.perf_counter()
+    for _ in range(10000):
+        move = agent.choose_action(random.choice(boards))
+    print(f"Cached choose_action: {(time.perf_counter() - start) / 10000 * 1e6:.1f} us per call")
+    print(f"Stats: {agent.stats()}")
+
+    agent.version = 2
+    agent.choose_action(boards[0])
+    print(f"After version change: {agent.stats()['entries']} entries")
+    print("Test complete.")
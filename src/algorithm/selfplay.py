@@ -0,0 +1,298 @@
+import multiprocessing
+import queue
+import random
+import struct
+import time
+
+import numpy as np
+
+from algorithm.game_rules import GAME_CODES, GAME_NAMES, get_game_state_class
+from algorithm.instrumentation import incr, instrumented, timer
+
+# Self-play หลาย process: actor เล่นเกม agent-vs-agent แล้วส่ง trajectory แบบบีบอัด
+# เข้า multiprocessing.Queue ให้ learner process เดียวนำไปฝึก
+#
+# รูปแบบ trajectory: header '<BbH' (รหัสเกม, ผู้ชนะ, จำนวนการเดิน) ตามด้วย index การเดินตัวละ 1 byte
+
+HEADER = struct.Struct('<BbH')
+
+
+def encode_trajectory(game_type, moves, winner):
+    """แปลงเกมเป็น bytes (moves เป็น index ของ GameState.move_index)"""
+    return HEADER.pack(GAME_CODES[game_type], winner, len(moves)) + bytes(moves)
+
+
+def decode_chunk(payload):
+    """
+    Split a chunk of encoded trajectories
+
+    Returns:
+        list of (game_type, winner, moves uint8 array)
+    """
+    games = []
+    offset = 0
+    view = memoryview(payload)
+    while offset < len(payload):
+        code, winner, length = HEADER.unpack_from(payload, offset)
+        offset += HEADER.size
+        moves = np.frombuffer(view[offset:offset + length], dtype=np.uint8)
+        games.append((GAME_NAMES[code], winner, moves))
+        offset += length
+    return games
+
+
+def replay(game_type, moves):
+    """เล่นเกมซ้ำจาก index การเดิน แล้ว yield (state ก่อนเดิน, move)"""
+    state = get_game_state_class(game_type)()
+    for index in moves:
+        move = state.index_move(int(index))
+        yield state, move
+        state.play(move)
+
+
+# นโยบายของ actor: ชื่อ -> ฟังก์ชันสร้าง policy(state) -> move
+def _random_policy(game_type, rng, **options):
+    return lambda state: rng.choice(state.legal_moves())
+
+
+def _mcts_policy(game_type, rng, iterations=200, **options):
+    from algorithm.mcts import MCTS
+
+    search = MCTS(game_type=game_type, adaptive=False)
+    return lambda state: search.search(state, time_limit=float('inf'), max_iterations=iterations)
+
+
+def _epsilon_mcts_policy(game_type, rng, epsilon=0.1, **options):
+    greedy = _mcts_policy(game_type, rng, **options)
+    return lambda state: rng.choice(state.legal_moves()) if rng.random() < epsilon else greedy(state)
+
+
+ACTOR_POLICIES = {
+    'random': _random_policy,
+    'mcts': _mcts_policy,
+    'epsilon_mcts': _epsilon_mcts_policy,
+}
+
+
+def _actor_main(actor_id, game_type, policies, options, chunk_games, seed, output, stop):
+    """วนเล่นเกมจนกว่าจะได้รับสัญญาณหยุด แล้วส่งผลเป็นชุดละ chunk_games เกม"""
+    rng = random.Random(seed)
+    random.seed(seed)
+    state_class = get_game_state_class(game_type)
+    players = {1: ACTOR_POLICIES[policies[0]](game_type, rng, **options),
+               -1: ACTOR_POLICIES[policies[1]](game_type, rng, **options)}
+    chunk = []
+    games = 0
+    while not stop.is_set():
+        state = state_class()
+        moves = []
+        while state.winner() is None:
+            move = players[state.to_move](state)
+            moves.append(state.move_index(move))
+            state.play(move)
+        chunk.append(encode_trajectory(game_type, moves, state.winner()))
+        games += 1
+        if len(chunk) >= chunk_games:
+            _put(output, stop, (actor_id, time.time(), len(chunk), b''.join(chunk)))
+            chunk = []
+    if chunk:
+        _put(output, stop, (actor_id, time.time(), len(chunk), b''.join(chunk)))
+
+
+def _put(output, stop, item):
+    # queue เต็ม = learner ตามไม่ทัน: รอจนมีที่ว่าง (หยุดได้ทันทีเมื่อได้รับสัญญาณ)
+    while not stop.is_set():
+        try:
+            output.put(item, timeout=0.1)
+            return
+        except queue.Full:
+            continue
+
+
+class SelfPlayPipeline:
+    """
+    Actor processes play games and a single learner consumes them
+
+    Args:
+        game_type: game with move indices (GameState.ACTION_SIZE), e.g. 'TicTacToe'
+        actors: number of actor processes
+        policies: policy names for the first and second player (ACTOR_POLICIES)
+        policy_options: keyword options for the policies (e.g. iterations=200)
+        chunk_games: games sent per queue message
+        queue_size: bound of the queue (backpressure on the actors)
+    """
+
+    def __init__(self, game_type='TicTacToe', actors=None, policies=('epsilon_mcts', 'epsilon_mcts'),
+                 policy_options=None, chunk_games=32, queue_size=64):
+        if get_game_state_class(game_type).ACTION_SIZE is None:
+            raise ValueError(f"Unsupported game type for self-play: {game_type}")
+        self.game_type = game_type
+        self.actors = actors or max(1, (multiprocessing.cpu_count() or 2) - 1)
+        self.policies = policies
+        self.policy_options = policy_options or {}
+        self.chunk_games = chunk_games
+        self.queue_size = queue_size
+        self.stats = {}
+
+    @instrumented('selfplay.run')
+    def run(self, learner, max_games=None, duration=None, report_every=10.0):
+        """
+        Run until max_games games were learned or `duration` seconds passed
+
+        Args:
+            learner: callable receiving a list of decoded games
+                     [(game_type, winner, moves), ...]
+
+        Returns:
+            dict of throughput statistics
+        """
+        context = multiprocessing.get_context()
+        output = context.Queue(self.queue_size)
+        stop = context.Event()
+        processes = [
+            context.Process(target=_actor_main, daemon=True,
+                            args=(i, self.game_type, self.policies, self.policy_options,
+                                  self.chunk_games, random.randrange(1 << 30), output, stop))
+            for i in range(self.actors)
+        ]
+        for process in processes:
+            process.start()
+
+        start = last_report = time.time()
+        games = trajectories = 0
+        lag_total = lag_max = 0.0
+        chunks = 0
+        try:
+            while (max_games is None or games < max_games) and \
+                    (duration is None or time.time() - start < duration):
+                try:
+                    actor_id, produced, count, payload = output.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                decoded = decode_chunk(payload)
+                with timer('selfplay.learn'):
+                    learner(decoded)
+                now = time.time()
+                # lag: เวลาตั้งแต่ actor ส่งจนถึง learner ฝึกเสร็จ
+                lag = now - produced
+                lag_total += lag
+                lag_max = max(lag_max, lag)
+                chunks += 1
+                games += count
+                trajectories += 2 * count  # หนึ่งเกมให้ trajectory ของผู้เล่นสองฝ่าย
+                incr('selfplay.games', count)
+                if report_every and now - last_report >= report_every:
+                    last_report = now
+                    self._update_stats(games, trajectories, now - start, lag_total, lag_max, chunks, output)
+                    print(self._format_stats())
+        finally:
+            stop.set()
+            # ระบาย queue เพื่อให้ actor ที่รอ put อยู่ออกจาก loop ได้
+            deadline = time.time() + 5.0
+            while any(p.is_alive() for p in processes) and time.time() < deadline:
+                try:
+                    output.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            for process in processes:
+                process.join(timeout=1.0)
+                if process.is_alive():
+                    process.terminate()
+
+        self._update_stats(games, trajectories, time.time() - start, lag_total, lag_max, chunks, None)
+        return self.stats
+
+    def _update_stats(self, games, trajectories, elapsed, lag_total, lag_max, chunks, output):
+        depth = None
+        if output is not None:
+            try:
+                depth = output.qsize()
+            except NotImplementedError:
+                pass
+        self.stats = {
+            'games': games,
+            'trajectories': trajectories,
+            'elapsed': elapsed,
+            'games_per_sec': games / elapsed if elapsed > 0 else 0.0,
+            'trajectories_per_sec': trajectories / elapsed if elapsed > 0 else 0.0,
+            'learner_lag_avg': lag_total / chunks if chunks else 0.0,
+            'learner_lag_max': lag_max,
+            'queue_depth': depth,
+        }
+
+    def _format_stats(self):
+        s = self.stats
+        return (f"{s['games']} games, {s['games_per_sec']:.1f} games/s, "
+                f"{s['trajectories_per_sec']:.1f} traj/s, lag {s['learner_lag_avg']:.3f}s "
+                f"(max {s['learner_lag_max']:.3f}s), queue {s['queue_depth']}")
+
+
+class AgentLearner:
+    """
+    Feeds self-play games to an existing Tic-Tac-Toe learner
+
+    The agent learns the moves of the first player ('X', as in the web UI):
+    - QLearningAgent: record_move(board, move) + learn_from_game(reward)
+    - DeepQNetwork: record_memory(state, action, reward, next_state, done) for
+      every move, where next_state is the board at the agent's next turn
+      (or the final board), then learn_from_game(reward)
+    - NeuralNetworkAgent: record_move(board, move, 'X') + train_on_game(reward)
+    - GeneticAlgorithm: learn_from_game(final_board, last_move, reward)
+    """
+
+    def __init__(self, agent, side=1):
+        self.agent = agent
+        self.side = side
+        self.games = 0
+
+    def __call__(self, games):
+        agent = self.agent
+        for game_type, winner, moves in games:
+            reward = 0.0 if winner == 0 else (1.0 if winner == self.side else -1.0)
+            if hasattr(agent, 'reset_for_new_game'):
+                agent.reset_for_new_game()
+            last_move = None
+            final = None
+            turns = []  # (board ก่อนเดิน, move) ของฝ่ายที่ agent เรียนรู้
+            for state, move in replay(game_type, moves):
+                if state.to_move == self.side:
+                    last_move = move
+                    turns.append((state.to_board(), move))
+                    if hasattr(agent, 'train_on_game'):
+                        agent.record_move(state.to_board(), move, 'X')
+                    elif hasattr(agent, 'record_move') and not hasattr(agent, 'record_memory'):
+                        agent.record_move(state.to_board(), move)
+                final = state
+            if final is None:
+                continue
+            # replay() เดินการเดินสุดท้ายไปแล้ว: final คือตำแหน่งจบเกม
+            final_board = final.to_board()
+            if hasattr(agent, 'train_on_game'):
+                agent.train_on_game(reward)
+            elif hasattr(agent, 'evolve'):
+                agent.learn_from_game(final_board, last_move, reward)
+            elif hasattr(agent, 'record_memory'):
+                for turn, (board, move) in enumerate(turns):
+                    done = turn + 1 == len(turns)
+                    next_board = final_board if done else turns[turn + 1][0]
+                    agent.record_memory(agent._board_to_state(board), move, reward if done else 0.0,
+                                        agent._board_to_state(next_board), done)
+                agent.learn_from_game(reward)
+            else:
+                agent.learn_from_game(reward)
+            self.games += 1
+
+
+# ทดสอบ Self-play pipeline
+if __name__ == "__main__":
+    positions = []
+
+    def count_positions(games):
+        positions.append(sum(len(moves) for _, _, moves in games))
+
+    pipeline = SelfPlayPipeline('TicTacToe', actors=2, policies=('epsilon_mcts', 'random'),
+                                policy_options={'iterations': 50})
+    stats = pipeline.run(count_positions, duration=3.0, report_every=1.0)
+    print(f"Final: {pipeline._format_stats()}, positions {sum(positions)}")
+
+    print("Test complete.")
@@ -0,0 +1,224 @@
+import ast
+import multiprocessing
+import os
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from algorithm.instrumentation import incr, timer
+
+# Q-table แบบ dense ใน shared memory สำหรับ Tic-Tac-Toe
+#
+# - แถวคือกระดาน (เลขฐาน 3: '_'=0, 'X'=1, 'O'=2 -> 3^9 แถว) คอลัมน์คือช่อง r*3+c
+# - ทุก process อ่านตารางเดียวกันแบบ zero-copy โดยไม่ต้องล็อก
+# - การเขียนใช้ล็อกแบบ striped ตามแถว จึงไม่มี update หายเมื่อมี learner หลายตัว
+
+NUM_STATES = 3 ** 9
+NUM_ACTIONS = 9
+CELL_DIGITS = str.maketrans('_XO', '012')
+
+
+_tracker_lock = threading.Lock()
+
+
+def _attach_untracked(name):
+    """
+    Attach to an existing block without registering it with the resource tracker
+
+    Before Python 3.13 every attach registers the block, so the attaching
+    process's tracker unlinks it at exit even though the process does not
+    own it. Unregistering afterwards is not an option either: spawned
+    workers share the owner's tracker, and their unregister would drop
+    the owner's registration.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13
+        pass
+    with _tracker_lock:
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+def state_index(state):
+    """แปลง state ของ QLearningAgent (tuple ของสตริงแต่ละแถว) เป็นเลขแถว"""
+    return int(''.join(state).translate(CELL_DIGITS), 3)
+
+
+def action_index(action):
+    return action[0] * 3 + action[1]
+
+
+class SharedQTable:
+    """
+    Tic-Tac-Toe Q-table in multiprocessing.shared_memory
+
+    Create it once in the parent process and pass it to worker processes
+    (Process args / Pool initializer); the workers attach to the same block.
+    Other processes may attach by name with SharedQTable.attach(name) as
+    read-only servers.
+
+    Args:
+        name: shared memory block name (None = generated)
+        stripes: number of write locks
+        snapshot_path: .npy file used by snapshot() / load_snapshot()
+        snapshot_interval: seconds between maybe_snapshot() saves
+        context: multiprocessing context of the worker processes (locks)
+    """
+
+    def __init__(self, name=None, stripes=64, snapshot_path='q_table.npy', snapshot_interval=30.0,
+                 context=None):
+        size = NUM_STATES * NUM_ACTIONS * 8
+        self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self.name = self.shm.name
+        self.locks = [(context or multiprocessing).Lock() for _ in range(stripes)]
+        self.snapshot_path = snapshot_path
+        self.snapshot_interval = snapshot_interval
+        self.owner_pid = os.getpid()  # process ลูกที่ fork มาไม่ใช่เจ้าของ
+        self._attach_array()
+        self.values.fill(0.0)
+        self.load_snapshot()
+
+    @classmethod
+    def attach(cls, name, snapshot_path='q_table.npy'):
+        """เชื่อมต่อกับตารางที่มีอยู่แล้วแบบอ่านอย่างเดียว (ไม่มีล็อก)"""
+        table = cls.__new__(cls)
+        table.__setstate__({'name': name, 'locks': None, 'snapshot_path': snapshot_path,
+                            'snapshot_interval': None})
+        return table
+
+    def _attach_array(self):
+        self.values = np.ndarray((NUM_STATES, NUM_ACTIONS), dtype=np.float64, buffer=self.shm.buf)
+        self._last_snapshot = time.time()
+
+    # ส่งข้อมูลเฉพาะชื่อ block และล็อกเมื่อส่งไปยัง process ลูก
+    def __getstate__(self):
+        return {'name': self.name, 'locks': self.locks, 'snapshot_path': self.snapshot_path,
+                'snapshot_interval': self.snapshot_interval}
+
+    def __setstate__(self, data):
+        self.name = data['name']
+        self.locks = data['locks']
+        self.snapshot_path = data['snapshot_path']
+        self.snapshot_interval = data['snapshot_interval']
+        self.owner_pid = None
+        # process ที่ attach ไม่ได้เป็นเจ้าของ จึงไม่ให้ resource tracker ลบ block
+        self.shm = _attach_untracked(self.name)
+        self._attach_array()
+
+    def row(self, state):
+        """ค่า Q ของทุกช่องในสถานะนี้ (view บน shared memory, ไม่คัดลอก)"""
+        return self.values[state_index(state)]
+
+    def get(self, state, action):
+        return self.values[state_index(state), action_index(action)]
+
+    def _lock(self, index):
+        if self.locks is None:
+            raise RuntimeError("Shared Q-table attached read-only")
+        return self.locks[index % len(self.locks)]
+
+    def set(self, state, action, value):
+        index = state_index(state)
+        with self._lock(index):
+            self.values[index, action_index(action)] = value
+
+    def add(self, state, action, delta):
+        """เพิ่มค่าแบบ atomic (อ่าน-แก้-เขียนภายใต้ล็อกของแถว)"""
+        index = state_index(state)
+        with self._lock(index):
+            self.values[index, action_index(action)] += delta
+
+    def add_many(self, cells, deltas):
+        """
+        Add deltas to many entries at once
+
+        Args:
+            cells: unique flat indices (state * NUM_ACTIONS + action)
+        """
+        if self.locks is None:
+            raise RuntimeError("Shared Q-table attached read-only")
+        stripes = np.unique((cells // NUM_ACTIONS) % len(self.locks))
+        # จองล็อกตามลำดับเสมอเพื่อป้องกัน deadlock ระหว่าง learner
+        for stripe in stripes:
+            self.locks[stripe].acquire()
+        try:
+            self.values.reshape(-1)[cells] += deltas
+        finally:
+            for stripe in stripes:
+                self.locks[stripe].release()
+
+    def import_q_values(self, q_values):
+        """นำเข้า Q-table แบบ dict เดิมของ QLearningAgent (q_values.pkl)"""
+        count = 0
+        for state_str, actions in q_values.items():
+            state = ast.literal_eval(state_str)
+            for action_str, value in actions.items():
+                self.set(state, ast.literal_eval(action_str), value)
+                count += 1
+        return count
+
+    def snapshot(self, path=None):
+        """บันทึกตารางลงไฟล์แบบ atomic (เขียนไฟล์ชั่วคราวแล้ว rename)"""
+        path = path or self.snapshot_path
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with timer('qtable.snapshot'), open(tmp, 'wb') as f:
+                np.save(f, self.values)
+                incr('qtable.bytes_written', f.tell())
+            os.replace(tmp, path)
+            self._last_snapshot = time.time()
+        except Exception as e:
+            print(f"Error saving Q-table snapshot: {e}")
+
+    def maybe_snapshot(self):
+        """บันทึกเมื่อครบ snapshot_interval (เฉพาะ process เจ้าของตาราง)"""
+        if self.owner_pid == os.getpid() and time.time() - self._last_snapshot >= self.snapshot_interval:
+            self.snapshot()
+
+    def load_snapshot(self, path=None):
+        path = path or self.snapshot_path
+        if os.path.exists(path):
+            try:
+                self.values[:] = np.load(path)
+                print(f"Loaded Q-table snapshot from {path}")
+            except Exception as e:
+                print(f"Error loading Q-table snapshot: {e}")
+
+    def close(self):
+        """ปิดการเชื่อมต่อ (เจ้าของตารางจะลบ block ด้วย)"""
+        self.values = None
+        self.shm.close()
+        if self.owner_pid == os.getpid():
+            self.shm.unlink()
+
+
+def _demo_worker(table, worker, updates):
+    for i in range(updates):
+        table.add(('___', '_X_', '___'), (i % 3, 0), 1.0)
+
+
+# ทดสอบ Shared Q-table
+if __name__ == "__main__":
+    import tempfile
+
+    table = SharedQTable(snapshot_path=os.path.join(tempfile.mkdtemp(), 'q_table.npy'))
+    workers = [multiprocessing.Process(target=_demo_worker, args=(table, i, 3000)) for i in range(4)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+
+    reader = SharedQTable.attach(table.name)
+    print(f"Row seen by reader: {reader.row(('___', '_X_', '___'))[:7:3]} (expected 4000 each)")
+    reader.close()
+
+    table.snapshot()
+    table.close()
+    print("Test complete.")
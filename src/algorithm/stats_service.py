@@ -0,0 +1,289 @@
+import atexit
+import fcntl
+import json
+import os
+import threading
+import time
+
+from algorithm.instrumentation import incr, instrumented, timer
+
+# สถิติของเกมในหน่วยความจำ แทนการเขียน game_stats.json ใหม่ทุกครั้งที่จบเกม
+#
+# - แต่ละ thread นับในตัวนับของตัวเอง (ไม่ต้องล็อก) แล้วรวมกันตอนอ่าน
+# - บันทึกลงไฟล์ JSON รูปแบบเดิมตามรอบเวลา โดยเขียนเฉพาะส่วนที่เพิ่มขึ้น (delta)
+#   ภายใต้ file lock จึงใช้ไฟล์เดียวกันได้หลาย worker process
+# - เก็บสถิติย้อนหลังแบบ rolling window เป็นช่วงละ bucket_seconds
+
+OUTCOMES = {'win': 'player_wins', 'lose': 'ai_wins', 'draw': 'draws'}
+# ผลจากมุมมองของ AI ใน ai_mode_stats (ผู้เล่นชนะ = AI แพ้)
+MODE_OUTCOMES = {'win': 'losses', 'lose': 'wins', 'draw': 'draws'}
+
+
+def stats_filename(game_type=None):
+    """ไฟล์สถิติของเกม (game_stats.json สำหรับหน้าหลัก)"""
+    return f"{game_type.lower()}_stats.json" if game_type else "game_stats.json"
+
+
+def empty_stats():
+    return {"total_games": 0, "player_wins": 0, "ai_wins": 0, "draws": 0}
+
+
+def apply_counts(stats, counts):
+    """
+    Add (ai_mode, result) -> count to a stats dict in the JSON layout
+
+    ai_mode_stats and win_rate are kept when the layout already has them
+    (game_stats.json) and ai_mode_stats is added once a game has a mode.
+    """
+    for (ai_mode, result), count in counts.items():
+        stats["total_games"] = stats.get("total_games", 0) + count
+        stats[OUTCOMES[result]] = stats.get(OUTCOMES[result], 0) + count
+        if ai_mode is not None:
+            mode = stats.setdefault("ai_mode_stats", {}).setdefault(ai_mode, {"wins": 0, "losses": 0, "draws": 0})
+            mode[MODE_OUTCOMES[result]] += count
+    if "win_rate" in stats or "ai_mode_stats" in stats:
+        total = stats.get("total_games", 0)
+        stats["win_rate"] = round(stats.get("player_wins", 0) / total * 100) if total else 0
+    return stats
+
+
+class StatsAggregator:
+    """
+    Sharded in-memory game statistics with interval flushes
+
+    Args:
+        directory: directory of the *_stats.json files
+        flush_interval: seconds between background flushes (None = manual flush())
+        cache_ttl: seconds a get_stats() snapshot is reused
+        bucket_seconds / window_buckets: rolling window resolution and length
+    """
+
+    def __init__(self, directory='statistics', flush_interval=5.0, cache_ttl=1.0,
+                 bucket_seconds=60, window_buckets=1440):
+        self.directory = directory
+        self.cache_ttl = cache_ttl
+        self.bucket_seconds = bucket_seconds
+        self.window_buckets = window_buckets
+        self._local = threading.local()
+        self._shards = []  # (totals, windows) ของทุก thread
+        self._flushed = {}  # id(totals) -> ค่าที่บันทึกลงไฟล์ไปแล้ว
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # flush ทีละครั้ง (thread เบื้องหลังกับ close)
+        self._base = {}  # game_type -> สถิติจากไฟล์ ณ การ flush ล่าสุด
+        self._snapshots = {}  # game_type -> (time, stats)
+        self._stop = threading.Event()
+        self._thread = None
+        if flush_interval:
+            self._thread = threading.Thread(target=self._flush_loop, args=(flush_interval,), daemon=True)
+            self._thread.start()
+        atexit.register(self.close)
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = ({}, {})
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def record_game(self, game_type=None, result='draw', ai_mode=None):
+        """
+        Count one finished game
+
+        Args:
+            game_type: e.g. 'TicTacToe' (None = main page, game_stats.json)
+            result: 'win', 'lose' or 'draw' from the player's point of view
+            ai_mode: AI mode name (e.g. 'Minimax') for ai_mode_stats
+        """
+        if result not in OUTCOMES:
+            raise ValueError(f"Unknown game result: {result}")
+        totals, windows = self._shard()
+        key = (game_type, ai_mode, result)
+        totals[key] = totals.get(key, 0) + 1
+        bucket = int(time.time() // self.bucket_seconds)
+        key = (bucket, game_type, ai_mode, result)
+        windows[key] = windows.get(key, 0) + 1
+        incr('stats.games')
+
+    def _merged_totals(self):
+        """รวมตัวนับของทุก thread (dict.copy ทำงานแบบ atomic ภายใต้ GIL)"""
+        with self._lock:
+            shards = list(self._shards)
+        return [(totals, totals.copy()) for totals, _ in shards]
+
+    def _load(self, game_type):
+        path = os.path.join(self.directory, stats_filename(game_type))
+        if os.path.exists(path):
+            try:
+                with open(path) as f:
+                    return json.load(f)
+            except Exception as e:
+                print(f"Error loading stats: {e}")
+        return empty_stats()
+
+    @instrumented('stats.get_stats')
+    def get_stats(self, game_type=None):
+        """สถิติในรูปแบบ JSON เดิม (ค่าในไฟล์ + ส่วนที่ยังไม่บันทึก) จาก snapshot ที่ cache ไว้"""
+        now = time.time()
+        cached = self._snapshots.get(game_type)
+        if cached is not None and now - cached[0] < self.cache_ttl:
+            incr('stats.cache_hits')
+            return cached[1]
+
+        with self._lock:
+            if game_type not in self._base:
+                self._base[game_type] = self._load(game_type)
+            stats = json.loads(json.dumps(self._base[game_type]))
+            flushed = dict(self._flushed)
+        pending = {}
+        for totals, current in self._merged_totals():
+            done = flushed.get(id(totals), {})
+            for (game, ai_mode, result), count in current.items():
+                count -= done.get((game, ai_mode, result), 0)
+                if game == game_type and count:
+                    pending[(ai_mode, result)] = pending.get((ai_mode, result), 0) + count
+        stats = apply_counts(stats, pending)
+        self._snapshots[game_type] = (now, stats)
+        return stats
+
+    def get_window_stats(self, game_type=None, seconds=3600, ai_mode=None):
+        """
+        Statistics of the last `seconds` (rolling window, this process only)
+
+        Returns:
+            {'total_games', 'player_wins', 'ai_wins', 'draws', 'ai_mode_stats'}
+        """
+        since = int((time.time() - seconds) // self.bucket_seconds) + 1
+        counts = {}
+        with self._lock:
+            shards = list(self._shards)
+        for _, windows in shards:
+            for (bucket, game, mode, result), count in windows.copy().items():
+                if bucket >= since and game == game_type and (ai_mode is None or mode == ai_mode):
+                    counts[(mode, result)] = counts.get((mode, result), 0) + count
+        return apply_counts(dict(empty_stats(), ai_mode_stats={}), counts)
+
+    @instrumented('stats.flush')
+    def flush(self):
+        """บันทึกส่วนที่เพิ่มขึ้นตั้งแต่การ flush ครั้งก่อนลงไฟล์ JSON ของแต่ละเกม"""
+        with self._flush_lock:
+            self._flush()
+
+    def _flush(self):
+        deltas = {}  # game_type -> {(ai_mode, result): count}
+        updates = []
+        for totals, current in self._merged_totals():
+            with self._lock:
+                done = dict(self._flushed.get(id(totals), {}))
+            for (game, ai_mode, result), count in current.items():
+                count -= done.get((game, ai_mode, result), 0)
+                if count:
+                    counts = deltas.setdefault(game, {})
+                    counts[(ai_mode, result)] = counts.get((ai_mode, result), 0) + count
+            updates.append((totals, current))
+
+        for game_type, counts in deltas.items():
+            stats = self._write_delta(game_type, counts)
+            if stats is None:
+                continue  # ลองใหม่ในรอบถัดไป (ยังไม่นับว่าบันทึกแล้ว)
+            with self._lock:
+                self._base[game_type] = stats
+                for totals, current in updates:
+                    done = self._flushed.setdefault(id(totals), {})
+                    for key, count in current.items():
+                        if key[0] == game_type:
+                            done[key] = count
+        # รับค่าที่ worker อื่นบันทึกไว้ สำหรับเกมที่ไม่มีอะไรต้องเขียน
+        for game_type in list(self._base):
+            if game_type not in deltas:
+                stats = self._load(game_type)
+                with self._lock:
+                    self._base[game_type] = stats
+        self._snapshots.clear()
+        self._prune_windows()
+
+    def _write_delta(self, game_type, counts):
+        """อ่าน-บวก-เขียนไฟล์ภายใต้ file lock แล้วแทนที่ไฟล์แบบ atomic"""
+        path = os.path.join(self.directory, stats_filename(game_type))
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with timer('stats.write'), open(path + '.lock', 'w') as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                stats = apply_counts(self._load(game_type), counts)
+                tmp = f"{path}.{os.getpid()}.tmp"
+                with open(tmp, 'w') as f:
+                    json.dump(stats, f, indent=2)
+                os.replace(tmp, path)
+            return stats
+        except Exception as e:
+            print(f"Error saving stats: {e}")
+            return None
+
+    def _prune_windows(self):
+        oldest = int(time.time() // self.bucket_seconds) - self.window_buckets
+        with self._lock:
+            shards = list(self._shards)
+        for _, windows in shards:
+            for key in [key for key in windows.copy() if key[0] < oldest]:
+                windows.pop(key, None)
+
+    def _flush_loop(self, interval):
+        while not self._stop.wait(interval):
+            self.flush()
+
+    def close(self):
+        """หยุด thread เบื้องหลังและบันทึกค่าที่เหลือ"""
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+        self.flush()
+
+
+_aggregator = None
+
+
+def get_aggregator(**kwargs):
+    """StatsAggregator ร่วมของ process (สร้างเมื่อใช้ครั้งแรก)"""
+    global _aggregator
+    if _aggregator is None:
+        _aggregator = StatsAggregator(**kwargs)
+    return _aggregator
+
+
+# ทดสอบ Stats aggregator
+if __name__ == "__main__":
+    import random
+    import tempfile
+
+    directory = tempfile.mkdtemp()
+    with open(os.path.join(directory, 'game_stats.json'), 'w') as f:
+        json.dump({"total_games": 41, "player_wins": 5, "ai_wins": 13, "draws": 23,
+                   "ai_mode_stats": {"Minimax": {"wins": 5, "losses": 0, "draws": 11}}, "win_rate": 12}, f)
+
+    stats = StatsAggregator(directory, flush_interval=0.2)
+
+    def play(games):
+        for _ in range(games):
+            stats.record_game(None, random.choice(['win', 'lose', 'draw']),
+                              random.choice(['Minimax', 'Pattern Recognition']))
+            stats.record_game('TicTacToe', random.choice(['win', 'lose', 'draw']))
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=play, args=(25000,)) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    print(f"Recorded 200000 games in {elapsed:.2f}s ({elapsed / 200000 * 1e6:.2f} us per game)")
+
+    start = time.perf_counter()
+    for _ in range(10000):
+        snapshot = stats.get_stats()
+    print(f"get_stats: {(time.perf_counter() - start) / 10000 * 1e6:.2f} us per call, total {snapshot['total_games']}")
+    print(f"Last hour (TicTacToe): {stats.get_window_stats('TicTacToe')['total_games']} games")
+
+    stats.close()
+    with open(os.path.join(directory, 'game_stats.json')) as f:
+        print(f"Flushed file: total {json.load(f)['total_games']} (expected 100041)")
+    print("Test complete.")
@@ -0,0 +1,23 @@
+import pytest
+
+from algorithm.alphazero import PUCTSearch, create_network
+from algorithm.game_rules import get_game_state_class
+
+
+def test_search_rejects_zero_simulations():
+    network = create_network('TicTacToe')
+    with pytest.raises(ValueError):
+        PUCTSearch(network, simulations=0)
+    with pytest.raises(ValueError):
+        PUCTSearch(network, batch_size=0)
+    search = PUCTSearch(network, simulations=16)
+    with pytest.raises(ValueError):
+        search.search(get_game_state_class('TicTacToe')(), simulations=0)
+
+
+def test_search_visits_sum_to_one_and_pick_a_legal_move():
+    network = create_network('TicTacToe')
+    state = get_game_state_class('TicTacToe')()
+    visits, move = PUCTSearch(network, simulations=1).search(state)
+    assert visits.sum() == pytest.approx(1.0)
+    assert move in state.legal_moves()
@@ -0,0 +1,69 @@
+import numpy as np
+
+from algorithm.cfr import FNV_OFFSET, CFRPokerAgent, CFRSolver, InfoSetTable, LimitHoldemAbstraction
+
+
+def _by_key(table):
+    filled = np.flatnonzero(table.keys)
+    return {int(table.keys[i]): (table.regrets[i].tolist(), table.strategy_sum[i].tolist()) for i in filled}
+
+
+def test_training_is_unaffected_by_table_growth():
+    abstraction = LimitHoldemAbstraction(buckets=4, streets=2, max_raises=2, strength_samples=4)
+    growing = CFRSolver(abstraction, InfoSetTable(capacity_bits=4), seed=11)
+    fixed = CFRSolver(abstraction, InfoSetTable(capacity_bits=16), seed=11)
+    growing.run(200, deal_batch=50)
+    fixed.run(200, deal_batch=50)
+
+    assert len(growing.table.keys) > 16
+    assert len(fixed.table.keys) == 1 << 16
+    assert _by_key(growing.table) == _by_key(fixed.table)
+
+
+def test_table_growth_keeps_every_key():
+    table = InfoSetTable(capacity_bits=2)
+    keys = [(i * 0x9e3779b97f4a7c15) & ((1 << 64) - 1) or 1 for i in range(1, 200)]
+    for key in keys:
+        slot = table.slot(key)
+        table.regrets[slot] = [key % 7, key % 11, key % 13]
+        table.strategy_sum[slot] = [1.0, 2.0, float(key % 5)]
+
+    assert len(table.keys) == 512 and table.size == len(keys)
+    for key in keys:
+        slot = table.slot(key, insert=False)
+        assert table.regrets[slot].tolist() == [key % 7, key % 11, key % 13]
+        assert table.strategy_sum[slot].tolist() == [1.0, 2.0, float(key % 5)]
+    assert table.slot(12345, insert=False) == -1
+
+
+def test_regret_matching_returns_a_distribution():
+    table = InfoSetTable(capacity_bits=4)
+    slot = table.slot(42)
+    table.regrets[slot] = [3.0, -1.0, 1.0]
+    assert table.current_strategy(slot, (True, True, True)) == [0.75, 0.0, 0.25]
+    # การกระทำที่ทำไม่ได้ได้ความน่าจะเป็น 0 แม้ regret เป็นบวก
+    assert table.current_strategy(slot, (False, True, True)) == [0.0, 0.0, 1.0]
+    table.regrets[slot] = [-2.0, -1.0, 0.0]
+    assert table.current_strategy(slot, (False, True, True)) == [0.0, 0.5, 0.5]
+    # ไม่เคยพบ info set: กลยุทธ์เฉลี่ยเป็น uniform
+    assert table.average_strategy(-1, (True, True, False)) == [0.5, 0.5, 0.0]
+
+
+def test_converges_to_never_folding_without_information(tmp_path):
+    # bucket เดียว: ไม่มีผู้เล่นรู้อะไรเกี่ยวกับไพ่ showdown มีค่าคาดหมาย 0
+    # การหมอบเสียเงินที่ลงไปแล้ว ส่วนการ call/raise มีค่า 0 ดังนั้น equilibrium คือไม่หมอบเลย
+    abstraction = LimitHoldemAbstraction(buckets=1, streets=1, max_raises=1, strength_samples=1)
+    solver = CFRSolver(abstraction, InfoSetTable(capacity_bits=6), seed=3)
+    solver.run(3000)
+    solver.table.save(str(tmp_path), {'abstraction': abstraction.config()})
+
+    agent = CFRPokerAgent(str(tmp_path), seed=0)
+    assert agent.abstraction.config() == abstraction.config()
+    # ('cr' แทบไม่เกิดขึ้นเพราะ small blind raise เสมอ จึงไม่ใช้ตรวจ)
+    for history in ('', 'r'):
+        strategy = agent.strategy([0], history)
+        assert abs(sum(strategy) - 1.0) < 1e-6
+        assert strategy[0] < 0.05, history
+    # big blind ไม่ต้องจ่ายเพิ่มหลัง limp: ทำได้แค่ check หรือ raise
+    assert agent.strategy([0], 'c')[0] == 0.0
+    assert solver.table.slot(FNV_OFFSET, insert=False) == -1
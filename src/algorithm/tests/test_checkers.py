@@ -0,0 +1,45 @@
+import pytest
+
+from algorithm.checkers import CheckersState, apply_move, get_valid_moves
+
+
+def _perft(state, depth):
+    if depth == 0:
+        return 1
+    nodes = 0
+    for move in state.legal_moves():
+        state.play(move)
+        nodes += _perft(state, depth - 1)
+        state.undo()
+    return nodes
+
+
+def test_perft_from_the_opening():
+    # ค่าอ้างอิงของ checkers กติกาอเมริกัน (บังคับกิน)
+    state = CheckersState()
+    assert [_perft(state, depth) for depth in range(1, 7)] == [7, 49, 302, 1469, 7361, 36768]
+    assert state.to_board() == CheckersState().to_board()
+
+
+def test_api_uses_the_frontend_player_conventions():
+    board = [[0] * 8 for _ in range(8)]
+    board[2][1] = 1  # white
+    board[3][2] = 2  # black
+    # ผู้เล่นเป็นฝั่งขาวโดยปริยาย และต้องกินหมากดำ
+    assert get_valid_moves(board, 2, 1) == {'4,3': {'captured': [[3, 2]]}}
+    result = apply_move(board, 2, 1, 4, 3)
+    assert result['game_over'] and result['winner'] == 'player'
+    assert result['player_turn'] is False
+
+    board = [[0] * 8 for _ in range(8)]
+    board[2][1] = 1
+    board[3][2] = 2
+    board[7][0] = 2
+    board[6][1] = 1
+    result = apply_move(board, 3, 2, 1, 0, player_color='black')
+    assert result['captured'] == [[2, 1]] and not result['game_over']
+
+    with pytest.raises(ValueError):
+        get_valid_moves(board, 2, 1, player_color='red')
+    with pytest.raises(ValueError):
+        apply_move(board, 2, 1, 3, 0)
@@ -0,0 +1,65 @@
+import pytest
+
+from algorithm.chess_engine import START_FEN, ChessAgent, ChessState, apply_move
+
+# ค่าอ้างอิงจาก chessprogramming.org/Perft_Results
+PERFT_POSITIONS = [
+    (START_FEN, [20, 400, 8902]),
+    # Kiwipete: castling, en passant, promotion และ pin
+    ('r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1', [48, 2039]),
+    ('8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1', [14, 191, 2812]),
+    ('r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1', [6, 264, 9467]),
+    ('rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8', [44, 1486, 62379]),
+]
+
+
+@pytest.mark.parametrize('fen, counts', PERFT_POSITIONS)
+def test_perft(fen, counts):
+    state = ChessState.from_fen(fen)
+    before = state.hash_key()
+    assert [state.perft(depth) for depth in range(1, len(counts) + 1)] == counts
+    # play/undo ต้องคืนตำแหน่งเดิม
+    assert state.hash_key() == before
+
+
+def test_apply_move_rejects_illegal_moves():
+    state = ChessState()
+    with pytest.raises(ValueError):
+        apply_move(state, 6, 4, 3, 4)
+
+
+def _square(name):
+    return 8 - int(name[1]), ord(name[0]) - ord('a')
+
+
+def test_api_uses_the_frontend_player_conventions():
+    # fool's mate: ผู้เล่นฝั่งดำชนะ
+    state = ChessState()
+    for move in ('f2f3', 'e7e5', 'g2g4'):
+        result = apply_move(state, *_square(move[:2]), *_square(move[2:]), player_color='black')
+        assert not result['game_over']
+    assert result['player_turn'] is True
+    result = apply_move(state, *_square('d8'), *_square('h4'), player_color='black')
+    assert result['game_over'] and result['check']
+    assert result['winner'] == 'player' and result['player_turn'] is False
+
+    # ผู้เล่นฝั่งขาว (ค่าเริ่มต้น) แพ้ในตำแหน่งเดียวกัน
+    state = ChessState('rnb1kbnr/pppp1ppp/8/4p3/6Pq/5P2/PPPPP2P/RNBQKBNR w KQkq - 1 3')
+    assert state.winner() == -1
+    state = ChessState()
+    for move in ('f2f3', 'e7e5', 'g2g4'):
+        result = apply_move(state, *_square(move[:2]), *_square(move[2:]))
+    assert result['player_turn'] is False
+    assert apply_move(state, *_square('d8'), *_square('h4'))['winner'] == 'ai'
+
+    with pytest.raises(ValueError):
+        apply_move(ChessState(), *_square('e2'), *_square('e4'), player_color='red')
+
+
+def test_agent_moves_the_other_color_of_a_bare_board():
+    agent = ChessAgent(time_limit=0.2)
+    board = ChessState().to_board()
+    move = agent.choose_action(board, player_color='black')
+    assert move['from'][0] in (6, 7)  # ฝั่งขาวเดินก่อนจากแถวล่าง
+    move = agent.choose_action(board)
+    assert move['from'][0] in (0, 1)
@@ -0,0 +1,51 @@
+import random
+
+from algorithm.connect_four import CELLS, ConnectFourSolver, ConnectFourState
+
+
+def _brute_force(state):
+    """negamax แบบไม่ตัดกิ่ง: คะแนนตามแบบของ solver (ชนะเร็วได้คะแนนมาก)"""
+    best = None
+    for move in state.legal_moves():
+        played = state.moves_played
+        state.play(move)
+        if state.winner() is None:
+            score = -_brute_force(state)
+        elif state.winner() == 0:
+            score = 0
+        else:
+            score = (CELLS + 1 - played) // 2
+        state.undo()
+        if best is None or score > best:
+            best = score
+    return best
+
+
+def _late_position(rng, stones):
+    # เล่นสุ่มจนมีหมาก `stones` ตัวโดยเกมยังไม่จบ
+    while True:
+        state = ConnectFourState()
+        while state.winner() is None and state.moves_played < stones:
+            state.play(rng.choice(state.legal_moves()))
+        if state.winner() is None:
+            return state
+
+
+def test_solver_matches_brute_force_on_late_positions():
+    rng = random.Random(5)
+    solver = ConnectFourSolver(table_bits=12)
+    for _ in range(12):
+        state = _late_position(rng, stones=rng.randint(30, 33))
+        expected = _brute_force(state.copy())
+        assert solver.solve(state) == expected
+
+        move, score = solver.best_move(state, time_limit=None)
+        assert score == expected
+        state.play(move)
+        child = 0 if state.winner() == 0 else -solver.solve(state) if state.winner() is None \
+            else (CELLS + 1 - (state.moves_played - 1)) // 2
+        assert child == expected
+
+
+def test_solve_reports_timeout():
+    assert ConnectFourSolver().solve(ConnectFourState(), time_limit=0.001) is None
@@ -0,0 +1,48 @@
+import random
+
+from algorithm.checkers import CheckersState
+from algorithm.game_log import FLAG_TRUNCATED, MAX_MOVES, GameLogReader, GameLogWriter, player_hash
+
+
+def _random_checkers_game(rng, plies):
+    state = CheckersState()
+    moves = []
+    while len(moves) < plies and state.winner() is None:
+        move = rng.choice(state.legal_moves())
+        moves.append(move)
+        state.play(move)
+    return moves
+
+
+def test_round_trip_across_segments(tmp_path):
+    rng = random.Random(5)
+    writer = GameLogWriter(str(tmp_path), segment_records=3, flush_records=2, flush_interval=3600)
+    logged = []
+    for i in range(7):
+        moves = [divmod(cell, 3) for cell in rng.sample(range(9), 5)]
+        writer.log_game('TicTacToe', moves, i % 3 - 1, ai_mode=2, player_id=f"p{i}", ai_side=-1)
+        logged.append(('TicTacToe', moves, i % 3 - 1))
+    checkers_moves = _random_checkers_game(rng, 30)
+    writer.log_game('Checkers', checkers_moves, 0)
+    logged.append(('Checkers', checkers_moves, 0))
+    writer.close()
+
+    reader = GameLogReader(str(tmp_path))
+    assert len(reader.segments()) > 1
+    assert len(reader) == len(logged)
+    games = list(reader.games())
+    assert [(name, moves, result) for name, moves, result, _ in games] == logged
+    assert [int(record['player']) for _, _, _, record in games[:2]] == [player_hash('p0'), player_hash('p1')]
+    assert all(record['ai_mode'] == 2 and record['ai_side'] == -1 for _, _, _, record in games[:7])
+    assert [len(moves) for _, moves, _, _ in reader.games('Checkers')] == [len(checkers_moves)]
+
+
+def test_long_games_are_truncated(tmp_path):
+    writer = GameLogWriter(str(tmp_path))
+    writer.log_game('TicTacToe', bytes(range(9)) * 12, 1, packed=True)
+    writer.close()
+
+    (batch,) = GameLogReader(str(tmp_path)).batches()
+    assert batch['flags'][0] == FLAG_TRUNCATED
+    assert batch['length'][0] == 108
+    assert bytes(batch['moves'][0]) == (bytes(range(9)) * 12)[:MAX_MOVES]
@@ -0,0 +1,47 @@
+import os
+
+import numpy as np
+
+from algorithm.genetic_algorithm import GeneticAlgorithm
+from algorithm.island_model import IslandModel
+
+
+def center_simulator(strategy, rng):
+    # ชนะเมื่อน้ำหนักของช่องกลางสูงสุด (ผลแน่นอน ทดสอบได้เร็ว)
+    return 1 if int(np.argmax(strategy[:9])) == 4 else -1
+
+
+def test_top_strategies_and_receive_migrants():
+    ga = GeneticAlgorithm(population_size=5, load=False)
+    ga.fitness_scores = [0.1, 0.5, -0.2, 0.9, 0.0]
+    top = ga.top_strategies(2)
+    assert [fitness for _, fitness in top] == [0.9, 0.5]
+    assert np.array_equal(top[0][0], ga.population[3])
+    top[0][0][0] = 123.0  # สำเนา: ไม่กระทบประชากรเดิม
+    assert ga.population[3][0] != 123.0
+
+    migrants = [(np.full(10, 7.0), 2.0), (np.full(10, 8.0), 1.5)]
+    ga.receive_migrants(migrants)
+    # แทนที่ตัวที่แย่ที่สุดสองตัว (index 2 และ 4)
+    assert ga.fitness_scores == [0.1, 0.5, 2.0, 0.9, 1.5]
+    assert ga.population[2].tolist() == [7.0] * 10 and ga.population[4].tolist() == [8.0] * 10
+
+
+def test_islands_migrate_checkpoint_and_resume(tmp_path):
+    checkpoint_dir = str(tmp_path / 'islands')
+    model = IslandModel(islands=2, population_size=10, games_per_strategy=1, migration_interval=1,
+                        migrants=2, checkpoint_dir=checkpoint_dir, checkpoint_interval=2,
+                        simulator=center_simulator)
+    strategy, fitness = model.run(generations=4, report_every=0)
+
+    assert sorted(os.listdir(checkpoint_dir)) == ['island_00.pkl', 'island_01.pkl']
+    assert {(island, generation) for island, generation, _, _ in model.history} == \
+        {(island, generation) for island in (0, 1) for generation in range(1, 5)}
+    assert fitness == 1 and int(np.argmax(strategy[:9])) == 4
+
+    resumed = IslandModel(islands=2, population_size=10, games_per_strategy=1, migration_interval=1,
+                          migrants=2, checkpoint_dir=checkpoint_dir, checkpoint_interval=2,
+                          simulator=center_simulator)
+    resumed.run(generations=3, report_every=0)
+    assert max(generation for _, generation, _, _ in resumed.history) == 7
+    assert min(generation for _, generation, _, _ in resumed.history) == 5
@@ -0,0 +1,67 @@
+from algorithm.game_rules import get_game_state_class
+from algorithm.mcts import MCTS
+
+
+def _check_tree(node, state):
+    """ทุก node: การเดินของลูก + untried ต้องเท่ากับการเดินที่ถูกต้องพอดี (ไม่หายและไม่ซ้ำ)"""
+    count = 1
+    children = node.children or ()
+    if node.untried_actions is not None:
+        actions = [child.action for child in children] + list(node.untried_actions)
+        assert sorted(actions) == sorted(state.legal_moves())
+    for child in children:
+        assert child.parent is node
+        state.play(child.action)
+        count += _check_tree(child, state)
+        state.undo()
+    return count
+
+
+def test_node_cap_prunes_back_to_untried_actions():
+    mcts = MCTS(game_type='ConnectFour', adaptive=False, max_nodes=300)
+    state = get_game_state_class('ConnectFour')()
+    move = mcts.search(state, time_limit=60.0, max_iterations=3000)
+
+    assert move in state.legal_moves()
+    assert mcts.last_search_info['iterations'] == 3000
+    assert mcts.node_count <= mcts.max_nodes
+    assert _check_tree(mcts.root, state.copy()) == mcts.node_count
+
+    # ค้นหาต่อจากต้นไม้เดิมหลังเดิน ยังอยู่ภายใต้ขีดจำกัด
+    state.play(move)
+    reply = mcts.search(state, time_limit=60.0, max_iterations=1000)
+    assert reply in state.legal_moves()
+    assert mcts.node_count <= mcts.max_nodes
+    assert _check_tree(mcts.root, state.copy()) == mcts.node_count
+
+
+def test_iteration_budget_is_a_hard_bound_without_adaptive():
+    state = get_game_state_class('ConnectFour')()
+    mcts = MCTS(game_type='ConnectFour', adaptive=False)
+    mcts.search(state, time_limit=60.0, max_iterations=200)
+    assert mcts.last_search_info['iterations'] == 200
+    assert not mcts.last_search_info['extended']
+
+
+def test_search_reuses_the_subtree_after_both_sides_move():
+    mcts = MCTS(game_type='ConnectFour', adaptive=False)
+    state = get_game_state_class('ConnectFour')()
+    move = mcts.search(state, time_limit=60.0, max_iterations=2000)
+    child = next(node for node in mcts.root.children if node.action == move)
+    reply = max(child.children, key=lambda node: node.visits)
+    visits = reply.visits
+
+    # ตำแหน่งหลังการเดินของเราและการตอบของฝ่ายตรงข้าม: ใช้ต้นไม้ย่อยเดิมต่อ
+    state.play(move)
+    state.play(reply.action)
+    mcts.search(state, time_limit=60.0, max_iterations=500)
+    assert mcts.root is reply and reply.parent is None
+    assert mcts.last_search_info['reused_visits'] == visits
+    assert mcts.root.visits == visits + 500
+    _check_tree(mcts.root, state.copy())
+
+    # ตำแหน่งที่ไม่อยู่ในต้นไม้: เริ่มใหม่
+    other = get_game_state_class('ConnectFour')()
+    other.play(0)
+    mcts.search(other, time_limit=60.0, max_iterations=100)
+    assert mcts.last_search_info['reused_visits'] == 0
@@ -0,0 +1,77 @@
+import random
+
+from algorithm import instrumentation
+from algorithm.game_rules import TicTacToeState
+from algorithm.minimax import MinimaxAgent
+
+
+def _from_child(score):
+    # คะแนนชนะ/แพ้ขึ้นกับ ply: มองจากตำแหน่งแม่จะห่างออกไปอีกหนึ่ง ply
+    if score > 0:
+        return -(score - 1)
+    if score < 0:
+        return -(score + 1)
+    return 0
+
+
+class _NoTable:
+    """Transposition table ที่ไม่เก็บอะไรเลย (เทียบผลเมื่อไม่มี TT)"""
+
+    def clear(self):
+        pass
+
+    def probe(self, key):
+        return None
+
+    def store(self, key, depth, score, flag, move):
+        pass
+
+
+def _positions(count, seed):
+    rng = random.Random(seed)
+    positions = [TicTacToeState()]
+    while len(positions) < count:
+        state = TicTacToeState()
+        for _ in range(rng.randint(1, 6)):
+            state.play(rng.choice(state.legal_moves()))
+            if state.winner() is not None:
+                break
+        if state.winner() is None and len(state.legal_moves()) > 1:
+            positions.append(state)
+    return positions
+
+
+def _result(agent, state):
+    move = agent.search(state.copy(), time_limit=60.0)
+    return move, agent.last_search_info['score'], agent.nodes
+
+
+def test_transposition_table_is_hit_and_keeps_the_result():
+    instrumentation.reset()
+    instrumentation.enable()
+    try:
+        with_table = MinimaxAgent(time_limit=60.0)
+        without_table = MinimaxAgent(time_limit=60.0)
+        without_table.tt = _NoTable()
+        for state in _positions(20, seed=4):
+            move, score, _ = _result(with_table, state)
+            _, expected, _ = _result(without_table, state)
+            assert score == expected
+            # การเดินที่เลือกต้องได้คะแนนเท่ากับค่าที่ค้นได้จริง
+            child = state.copy()
+            child.play(move)
+            if child.winner() is None and len(child.legal_moves()) > 1:
+                without_table.search(child, time_limit=60.0)
+                assert _from_child(without_table.last_search_info['score']) == score
+        assert instrumentation.snapshot()['counters']['minimax.tt_hits'] > 0
+        # กระดานเปล่า: TT ตัด transposition ออก จึงใช้ node น้อยกว่ามาก
+        empty = TicTacToeState()
+        plain = MinimaxAgent(time_limit=60.0)
+        plain.tt = _NoTable()
+        _, score, nodes = _result(MinimaxAgent(time_limit=60.0), empty)
+        _, expected, plain_nodes = _result(plain, empty)
+        assert score == expected == 0
+        assert nodes * 2 < plain_nodes
+    finally:
+        instrumentation.disable()
+        instrumentation.reset()
@@ -0,0 +1,72 @@
+import os
+import pickle
+
+import numpy as np
+import pytest
+
+from algorithm.model_registry import HotSwapAgent, ModelRegistry, load_agent, publish_agent
+
+EMPTY = [[None] * 3 for _ in range(3)]
+
+
+def write_strategy(directory, values):
+    path = os.path.join(directory, 'best_genetic_strategy.pkl')
+    with open(path, 'wb') as f:
+        pickle.dump(np.array(values, dtype=float), f)
+    return path
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    # ไฟล์โมเดลใน working directory ต้องไม่ถูกใช้แทนไฟล์ของเวอร์ชัน
+    monkeypatch.chdir(tmp_path)
+    write_strategy(tmp_path, [0.0] * 2 + [9.0] + [0.0] * 7)
+    os.makedirs(tmp_path / 'artifacts')
+    return ModelRegistry(str(tmp_path / 'registry'))
+
+
+def publish_strategy(registry, tmp_path, values):
+    write_strategy(tmp_path / 'artifacts', values)
+    return publish_agent(registry, 'genetic', str(tmp_path / 'artifacts'))
+
+
+def test_load_agent_uses_version_artifact(registry, tmp_path):
+    version = publish_strategy(registry, tmp_path, [1.0] + [0.0] * 9)
+    agent = load_agent('genetic', registry.version_dir('genetic', version))
+    assert agent.best_strategy.tolist() == [1.0] + [0.0] * 9
+    assert agent.choose_action(EMPTY) == (0, 0)
+
+
+def test_load_agent_raises_for_missing_file(registry, tmp_path):
+    other = tmp_path / 'artifacts' / 'other.pkl'
+    other.write_bytes(b'')
+    version = registry.publish('genetic', [str(other)])
+    with pytest.raises(FileNotFoundError):
+        load_agent('genetic', registry.version_dir('genetic', version))
+
+
+def test_corrupt_version_is_not_swapped_in(registry, tmp_path):
+    publish_strategy(registry, tmp_path, [1.0] + [0.0] * 9)
+    served = HotSwapAgent(registry, 'genetic', poll_interval=None)
+    assert served.version == 1
+
+    (tmp_path / 'artifacts' / 'best_genetic_strategy.pkl').write_bytes(b'not a pickle')
+    publish_agent(registry, 'genetic', str(tmp_path / 'artifacts'))
+    assert registry.current_version('genetic') == 2
+
+    assert served.check() is False
+    assert served.version == 1
+    assert served.choose_action(EMPTY) == (0, 0)
+
+
+def test_rollback_restores_previous_instance(registry, tmp_path):
+    publish_strategy(registry, tmp_path, [1.0] + [0.0] * 9)
+    served = HotSwapAgent(registry, 'genetic', poll_interval=None)
+    first = served.agent
+    publish_strategy(registry, tmp_path, [0.0] * 8 + [5.0, 0.0])
+    assert served.check() is True
+    assert served.choose_action(EMPTY) == (2, 2)
+
+    served.rollback()
+    assert served.version == 1
+    assert served.agent is first
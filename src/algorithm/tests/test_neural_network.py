@@ -0,0 +1,58 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from algorithm.neural_network import NeuralNetworkAgent, reference_boards
+
+
+@pytest.fixture(scope='module')
+def boards():
+    return reference_boards()
+
+
+@pytest.mark.parametrize('mode, threshold', [('int8', 0.97), ('float16', 0.999)])
+def test_quantized_moves_agree_with_float64(boards, mode, threshold):
+    np.random.seed(0)
+    agent = NeuralNetworkAgent(load=False)
+    agent.quantize(mode)
+    result = agent.quantized_accuracy(boards)
+    assert result['mode'] == mode and result['boards'] == len(boards)
+    assert result['agreement'] >= threshold
+    assert result['bytes'] < result['float_bytes']
+    # choose_action ใช้น้ำหนัก quantized และเลือกเฉพาะช่องว่าง
+    move = agent.greedy_action(boards[1])
+    assert boards[1][move[0]][move[1]] is None
+
+
+def _assert_quantized_from_current_weights(agent):
+    current = agent.quantized
+    expected = agent.quantize(current['mode'])  # quantize ใหม่จากน้ำหนัก float ปัจจุบัน
+    for key in ('input_hidden', 'hidden_output', 'bias_hidden', 'bias_output'):
+        assert np.array_equal(current[key], expected[key])
+
+
+def test_load_and_training_requantize(tmp_path):
+    np.random.seed(1)
+    agent = NeuralNetworkAgent(load=False)
+    agent.quantize('int8')
+    before = agent.quantized['input_hidden'].copy()
+
+    other = NeuralNetworkAgent(load=False)
+    path = tmp_path / 'nn_weights.pkl'
+    with open(path, 'wb') as f:
+        pickle.dump({'input_hidden': other.weights_input_hidden, 'hidden_output': other.weights_hidden_output,
+                     'bias_hidden': other.bias_hidden, 'bias_output': other.bias_output}, f)
+    agent.load_model(str(path), strict=True)
+    assert agent.quantized['mode'] == 'int8'
+    assert not np.array_equal(agent.quantized['input_hidden'], before)
+    _assert_quantized_from_current_weights(agent)
+
+    agent.quantize('float16')
+    before = agent.quantized['hidden_output'].copy()
+    agent.learning_rate = 0.5
+    boards = np.random.choice([-1, 0, 1], size=(32, 9))
+    agent.train_on_batch(boards, np.random.randint(0, 9, 32), np.ones(32))
+    assert agent.quantized['mode'] == 'float16'
+    assert not np.array_equal(agent.quantized['hidden_output'], before)
+    _assert_quantized_from_current_weights(agent)
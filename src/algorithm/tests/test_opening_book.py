@@ -0,0 +1,57 @@
+from algorithm.game_rules import TicTacToeState
+from algorithm.opening_book import OpeningBook, OpeningBookAgent
+
+
+class _Fallback:
+    """agent สำรองที่จำได้ว่าถูกเรียกกี่ครั้ง"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def choose_action(self, board, *args, **kwargs):
+        self.calls += 1
+        return (2, 2)
+
+
+def _play(moves):
+    state = TicTacToeState()
+    for move in moves:
+        state.play(move)
+    return state
+
+
+def test_lookup_matches_after_a_transposition(tmp_path):
+    book = OpeningBook('TicTacToe', path=str(tmp_path / 'book.pkl'))
+    # ตำแหน่งเดียวกันที่มาจากลำดับการเดินต่างกัน
+    first = _play([(0, 0), (1, 1), (0, 2)])
+    transposed = _play([(0, 2), (1, 1), (0, 0)])
+    assert first.hash_key() == transposed.hash_key()
+    assert book.lookup(transposed) is None
+
+    book.add(first, (0, 1))
+    assert book.lookup(transposed) == (0, 1)
+
+    # ตารางที่เรียนจากเกมก็ใช้ key เดียวกัน
+    for _ in range(2):
+        book.learn_from_game([(1, 1), (0, 0), (2, 2), (0, 2), (0, 1)], winner=1)
+    assert book.lookup(_play([(2, 2), (0, 2), (1, 1), (0, 0)])) == (0, 1)
+    # การเดินของฝ่ายที่แพ้ไม่ถูกเรียน
+    assert book.lookup(_play([(2, 2), (0, 2), (1, 1)])) is None
+
+    book.save()
+    reloaded = OpeningBook('TicTacToe', path=str(tmp_path / 'book.pkl'))
+    assert reloaded.lookup(transposed) == (0, 1)
+
+
+def test_agent_answers_transposed_board_from_the_book(tmp_path):
+    book = OpeningBook('TicTacToe', path=str(tmp_path / 'book.pkl'))
+    book.add(_play([(0, 0), (1, 1), (0, 2)]), (0, 1))
+    fallback = _Fallback()
+    agent = OpeningBookAgent(fallback, book, to_move='O')
+
+    board = _play([(0, 2), (1, 1), (0, 0)]).to_board()
+    assert agent.choose_action(board) == (0, 1)
+    assert fallback.calls == 0
+    # ตำแหน่งที่ไม่อยู่ใน book ส่งต่อให้ agent เดิม
+    assert agent.choose_action(_play([(0, 0)]).to_board()) == (2, 2)
+    assert fallback.calls == 1
@@ -0,0 +1,72 @@
+import os
+import random
+
+from algorithm.pattern_recognition import SYMMETRIES, BoardIndex, ProfileCache
+
+
+def test_profile_cache_evicts_to_store_and_reloads(tmp_path):
+    cache = ProfileCache(str(tmp_path), max_entries=2)
+    for player_id in ('a', 'b', 'c'):
+        cache[player_id] = {'games': player_id}
+
+    assert cache.stats()['entries'] == 2
+    assert cache.evictions == 1
+    assert os.path.exists(os.path.join(str(tmp_path), 'a.json'))
+    assert cache['a'] == {'games': 'a'}
+    assert len(cache) == 3
+    assert set(cache) == {'a', 'b', 'c'}
+
+
+def test_profile_cache_len_does_not_list_the_store(tmp_path, monkeypatch):
+    ProfileCache(str(tmp_path))  # สร้างไดเรกทอรี
+    (tmp_path / 'old%2Fplayer.json').write_text('{}')
+    cache = ProfileCache(str(tmp_path), max_entries=1)
+    cache['new'] = {}
+    cache['newer'] = {}
+
+    def listdir(path):
+        raise AssertionError('os.listdir called')
+
+    monkeypatch.setattr(os, 'listdir', listdir)
+    assert len(cache) == 3
+    assert set(cache) == {'old/player', 'new', 'newer'}
+    del cache['old/player']
+    del cache['new']
+    assert len(cache) == 1
+    assert list(cache) == ['newer']
+
+
+def _hamming(a, b):
+    # ระยะของ mask X และ mask O แยกกัน: X กับ O ต่างกัน 2, ช่องว่างกับหมากต่างกัน 1
+    return sum((x == 'X') != (y == 'X') for x, y in zip(a, b)) + sum((x == 'O') != (y == 'O') for x, y in zip(a, b))
+
+
+def _transform(board_str, perm):
+    # ช่อง c ของกระดานผลลัพธ์มาจากช่อง perm[c]
+    return ''.join(board_str[perm[c]] for c in range(9))
+
+
+def test_board_index_distances_match_brute_force():
+    rng = random.Random(7)
+    boards = {''.join(rng.choice('XO_') for _ in range(9)): {'moves': {'0,0': 1.0}} for _ in range(40)}
+    index = BoardIndex(boards)
+    for _ in range(20):
+        query = ''.join(rng.choice('XO_') for _ in range(9))
+        distances, _ = index.query(query, k=len(boards), symmetric=False)
+        assert sorted(distances.tolist()) == sorted(_hamming(query, b) for b in boards)
+
+        distances, _ = index.query(query, k=len(boards))
+        expected = [min(_hamming(_transform(query, perm), b) for perm in SYMMETRIES) for b in boards]
+        assert sorted(distances.tolist()) == sorted(expected)
+
+
+def test_board_index_maps_moves_back_to_the_query_orientation():
+    # กระดานที่ไม่สมมาตร: มีสมมาตรเดียวที่ระยะเป็น 0
+    index = BoardIndex({'XO_______': {'moves': {'1,2': 1.0}}})
+    # หมุน/พลิกกระดาน: การเดินที่แนะนำต้องหมุนตามด้วย
+    for perm in SYMMETRIES:
+        query = ''.join('XO_______'[perm[c]] for c in range(9))
+        distances, weights = index.query(query, k=1)
+        assert distances.tolist() == [0]
+        assert int(perm[int(weights[0].argmax())]) == 5
+    assert BoardIndex({}).query('_________')[0].size == 0
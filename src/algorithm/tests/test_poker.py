@@ -0,0 +1,80 @@
+import itertools
+import random
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from algorithm.poker import EquityCalculator, get_evaluator, parse_card
+
+
+def _five_card_value(cards):
+    """ค่ามือ 5 ใบแบบตรงไปตรงมา: (category, rank ที่ใช้ตัดสิน)"""
+    ranks = sorted((card >> 2 for card in cards), reverse=True)
+    flush = len({card & 3 for card in cards}) == 1
+    unique = sorted(set(ranks), reverse=True)
+    straight = None
+    if len(unique) == 5 and unique[0] - unique[4] == 4:
+        straight = unique[0]
+    elif unique == [12, 3, 2, 1, 0]:
+        straight = 3
+    # เรียงตามจำนวนใบก่อน แล้วตาม rank
+    groups = sorted(Counter(ranks).items(), key=lambda item: (item[1], item[0]), reverse=True)
+    shape = [count for _, count in groups]
+    order = [rank for rank, _ in groups]
+    if straight is not None and flush:
+        return (8, [straight])
+    if shape == [4, 1]:
+        return (7, order)
+    if shape == [3, 2]:
+        return (6, order)
+    if flush:
+        return (5, ranks)
+    if straight is not None:
+        return (4, [straight])
+    if shape == [3, 1, 1]:
+        return (3, order)
+    if shape == [2, 2, 1]:
+        return (2, order)
+    if shape == [2, 1, 1, 1]:
+        return (1, order)
+    return (0, ranks)
+
+
+def _brute_force(cards):
+    return max(_five_card_value(hand) for hand in itertools.combinations(cards, 5))
+
+
+def test_evaluator_matches_brute_force():
+    evaluator = get_evaluator()
+    rng = random.Random(3)
+    for size in (5, 6, 7):
+        hands = [rng.sample(range(52), size) for _ in range(300)]
+        values = evaluator.evaluate_batch(np.array(hands))
+        expected = [_brute_force(hand) for hand in hands]
+        for hand, value, brute in zip(hands, values, expected):
+            assert int(value) == evaluator.evaluate(hand)
+            assert value >> 20 == brute[0]
+        # ลำดับของมือต้องตรงกับการเทียบแบบ brute force ทุกคู่
+        for i in range(len(hands) - 1):
+            assert (values[i] > values[i + 1]) == (expected[i] > expected[i + 1])
+            assert (values[i] == values[i + 1]) == (expected[i] == expected[i + 1])
+
+
+def test_evaluator_finds_every_flush_and_straight():
+    evaluator = get_evaluator()
+    royal = [parse_card(c) for c in ['Ah', 'Kh', 'Qh', 'Jh', 'Th', '2c', '3d']]
+    wheel_flush = [parse_card(c) for c in ['Ad', '2d', '3d', '4d', '5d', 'Kc', 'Ks']]
+    wheel = [parse_card(c) for c in ['Ad', '2c', '3d', '4h', '5s', 'Kc', 'Ks']]
+    for hand, category in ((royal, 'Straight Flush'), (wheel_flush, 'Straight Flush'), (wheel, 'Straight')):
+        assert evaluator.category(evaluator.evaluate(hand)) == category
+        assert evaluator.category(int(evaluator.evaluate_batch(np.array([hand]))[0])) == category
+
+
+def test_equity_rejects_missing_opponents():
+    calculator = EquityCalculator(seed=0)
+    with pytest.raises(ValueError):
+        calculator.equity(['As', 'Ad'], [], num_opponents=0)
+    with pytest.raises(ValueError):
+        calculator.equity(['As', 'Ad'], [], num_opponents=24)
+    assert 0.8 < calculator.equity(['As', 'Ad'], [], num_opponents=1, samples=5000) < 0.9
@@ -0,0 +1,54 @@
+import os
+import subprocess
+import sys
+
+import algorithm
+from algorithm.q_learning import TD_TABLE_SNAPSHOT, QLearningAgent
+
+SRC = os.path.dirname(os.path.dirname(os.path.abspath(algorithm.__file__)))
+
+
+def test_private_td_table_is_snapshotted_and_released(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    agent = QLearningAgent(trace_decay=0.8)
+    name = agent.shared_table.name
+    board = [[None] * 3 for _ in range(3)]
+    agent.record_move(board, (1, 1))
+    agent.learn_from_game(1.0)
+    value = agent._get_q_value(agent._board_to_state(board), (1, 1))
+    assert value > 0
+
+    agent.close()
+    assert not os.path.exists(f"/dev/shm/{name}")
+    assert os.path.exists(tmp_path / TD_TABLE_SNAPSHOT)
+
+    # agent ใหม่โหลด snapshot ของตัวเอง
+    agent = QLearningAgent(trace_decay=0.8)
+    assert agent._get_q_value(agent._board_to_state(board), (1, 1)) == value
+    agent.close()
+
+
+def test_shared_table_passed_in_is_not_closed(tmp_path, monkeypatch):
+    from algorithm.shared_q_table import SharedQTable
+
+    monkeypatch.chdir(tmp_path)
+    table = SharedQTable()
+    try:
+        agent = QLearningAgent(shared_table=table, trace_decay=0.8)
+        agent.close()
+        assert agent.shared_table is table
+        assert os.path.exists(f"/dev/shm/{table.name}")
+    finally:
+        table.close()
+
+
+def test_private_table_released_at_exit(tmp_path):
+    env = dict(os.environ, PYTHONPATH=SRC)
+    code = ("from algorithm.q_learning import QLearningAgent\n"
+            "agent = QLearningAgent(trace_decay=0.8)\n"
+            "print(agent.shared_table.name)\n")
+    result = subprocess.run([sys.executable, '-c', code], cwd=tmp_path, env=env,
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert 'leaked' not in result.stderr
+    assert not os.path.exists(f"/dev/shm/{result.stdout.strip()}")
@@ -0,0 +1,81 @@
+import pytest
+
+from algorithm import result_cache
+from algorithm.result_cache import CachedAgent
+
+
+class CountingAgent:
+    """agent ที่เลือกช่องว่างแรกและนับจำนวนครั้งที่ถูกเรียก"""
+
+    exploration_rate = 0.0
+
+    def __init__(self):
+        self.calls = 0
+        self.updates = 0
+
+    def greedy_action(self, board):
+        self.calls += 1
+        return next((i, j) for i in range(3) for j in range(3) if board[i][j] is None)
+
+    choose_action = greedy_action
+
+    def learn_from_game(self, reward):
+        self.updates += 1
+
+
+def _board(*filled):
+    board = [[None] * 3 for _ in range(3)]
+    for i, j in filled:
+        board[i][j] = 'X'
+    return board
+
+
+def test_hits_misses_and_lru_eviction():
+    agent = CountingAgent()
+    cached = CachedAgent(agent, version=1, max_entries=2)
+    boards = [_board(), _board((0, 0)), _board((0, 0), (0, 1))]
+    assert cached.choose_action(boards[0]) == (0, 0)
+    assert cached.choose_action(boards[0]) == (0, 0)
+    assert (cached.hits, cached.misses, agent.calls) == (1, 1, 1)
+
+    cached.choose_action(boards[1])
+    cached.choose_action(boards[0])  # boards[0] ใช้ล่าสุด: boards[1] จะถูกไล่ออก
+    cached.choose_action(boards[2])
+    assert cached.evictions == 1
+    calls = agent.calls
+    assert cached.choose_action(boards[0]) == (0, 0) and agent.calls == calls
+    assert cached.choose_action(boards[1]) == (0, 1) and agent.calls == calls + 1
+
+
+def test_ttl_expiry(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(result_cache.time, 'time', lambda: now[0])
+    agent = CountingAgent()
+    cached = CachedAgent(agent, version=1, ttl=5.0)
+    cached.choose_action(_board())
+    now[0] += 4.0
+    cached.choose_action(_board())
+    assert agent.calls == 1
+    now[0] += 2.0
+    cached.choose_action(_board())
+    assert agent.calls == 2
+
+
+def test_version_change_and_training_clear_the_cache():
+    agent = CountingAgent()
+    cached = CachedAgent(agent, version=lambda: agent.updates)
+    cached.choose_action(_board())
+    cached.choose_action(_board((1, 1)))
+    agent.updates += 1  # โมเดลเปลี่ยนนอก wrapper: version ใหม่ทำให้ผลเก่าใช้ไม่ได้
+    cached.choose_action(_board())
+    assert agent.calls == 3 and cached.stats()['entries'] == 1
+
+    fixed = CachedAgent(agent, version=1)
+    fixed.choose_action(_board())
+    fixed.learn_from_game(1.0)  # ฝึกผ่าน wrapper: ล้าง cache
+    assert fixed.stats()['entries'] == 0 and agent.updates == 2
+
+
+def test_plain_agent_needs_a_version():
+    with pytest.raises(ValueError):
+        CachedAgent(CountingAgent())
@@ -0,0 +1,73 @@
+import numpy as np
+
+from algorithm.game_rules import TicTacToeState
+from algorithm.genetic_algorithm import GeneticAlgorithm
+from algorithm.selfplay import AgentLearner, decode_chunk, encode_trajectory
+
+# X ชนะในคอลัมน์ซ้าย: X 0, O 1, X 3, O 4, X 6
+X_WINS = [0, 1, 3, 4, 6]
+
+
+def final_board(moves):
+    state = TicTacToeState()
+    for index in moves:
+        state.play(state.index_move(index))
+    return state.to_board()
+
+
+def test_trajectory_round_trip():
+    payload = encode_trajectory('TicTacToe', X_WINS, 1) + encode_trajectory('TicTacToe', [4, 0], 0)
+    games = decode_chunk(payload)
+    assert [(game, winner, moves.tolist()) for game, winner, moves in games] == \
+        [('TicTacToe', 1, X_WINS), ('TicTacToe', 0, [4, 0])]
+
+
+def test_genetic_learns_from_engine_final_board(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    agent = GeneticAlgorithm(population_size=4)
+    calls = []
+    agent.learn_from_game = lambda board, move, result: calls.append((board, move, result))
+
+    AgentLearner(agent)([('TicTacToe', 1, np.array(X_WINS, dtype=np.uint8))])
+
+    board, move, result = calls[0]
+    assert board == final_board(X_WINS)
+    assert [row[0] for row in board] == ['X', 'X', 'X']
+    assert move == (2, 0)
+    assert result == 1.0
+
+
+class RecordingDQN:
+    """แทน DeepQNetwork (ต้องใช้ TensorFlow) ด้วยเมธอดชุดเดียวกันที่ AgentLearner เรียก"""
+
+    def __init__(self):
+        self.memory = []
+        self.rewards = []
+
+    def reset_for_new_game(self):
+        pass
+
+    def _board_to_state(self, board):
+        return [[1 if cell == 'X' else -1 if cell == 'O' else 0 for cell in row] for row in board]
+
+    def record_move(self, board, action):
+        raise AssertionError("record_move does not fill the replay memory")
+
+    def record_memory(self, state, action, reward, next_state, done):
+        self.memory.append((state, action, reward, next_state, done))
+
+    def learn_from_game(self, reward):
+        self.rewards.append(reward)
+
+
+def test_dqn_receives_transitions():
+    agent = RecordingDQN()
+    AgentLearner(agent)([('TicTacToe', 1, np.array(X_WINS, dtype=np.uint8))])
+
+    assert [action for _, action, _, _, _ in agent.memory] == [(0, 0), (1, 0), (2, 0)]
+    assert [(reward, done) for _, _, reward, _, done in agent.memory] == \
+        [(0.0, False), (0.0, False), (1.0, True)]
+    # next_state คือกระดานในตาถัดไปของ agent (หลังฝ่ายตรงข้ามเดิน)
+    assert agent.memory[0][3] == agent._board_to_state(final_board(X_WINS[:2]))
+    assert agent.memory[2][3] == agent._board_to_state(final_board(X_WINS))
+    assert agent.rewards == [1.0]
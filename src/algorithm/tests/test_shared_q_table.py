@@ -0,0 +1,82 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+import numpy as np
+
+import algorithm
+from algorithm.shared_q_table import NUM_ACTIONS, SharedQTable, state_index
+
+SRC = os.path.dirname(os.path.dirname(os.path.abspath(algorithm.__file__)))
+STATE = ('X__', '_O_', '___')
+
+
+def run_python(tmp_path, code):
+    # เขียนเป็นไฟล์: process แบบ spawn ต้อง import __main__ ได้
+    script = tmp_path / 'script.py'
+    script.write_text(textwrap.dedent(code))
+    env = dict(os.environ, PYTHONPATH=SRC)
+    return subprocess.run([sys.executable, str(script)], env=env, capture_output=True, text=True, timeout=60)
+
+
+def test_add_and_snapshot(tmp_path):
+    table = SharedQTable(snapshot_path=str(tmp_path / 'q_table.npy'))
+    try:
+        table.add(STATE, (0, 1), 0.5)
+        row = state_index(STATE) * NUM_ACTIONS
+        table.add_many(np.array([row + 1, row + 8]), np.array([0.25, -1.0]))
+        assert table.get(STATE, (0, 1)) == 0.75
+        assert table.get(STATE, (2, 2)) == -1.0
+        table.snapshot()
+        table.set(STATE, (0, 1), 0.0)
+        table.load_snapshot()
+        assert table.get(STATE, (0, 1)) == 0.75
+    finally:
+        table.close()
+
+
+def test_independent_reader_does_not_unlink_owner_block(tmp_path):
+    table = SharedQTable()
+    try:
+        table.set(STATE, (0, 1), 2.0)
+        result = run_python(tmp_path, f"""
+            from algorithm.shared_q_table import NUM_ACTIONS, SharedQTable, state_index
+            reader = SharedQTable.attach({table.name!r})
+            print(reader.get({STATE!r}, (0, 1)))
+            reader.close()
+        """)
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip() == '2.0'
+        assert 'leaked' not in result.stderr
+        assert os.path.exists(f"/dev/shm/{table.name}")
+        assert table.get(STATE, (0, 1)) == 2.0
+    finally:
+        table.close()
+
+
+def test_spawned_workers_keep_owner_registration(tmp_path):
+    # worker แบบ spawn ใช้ resource tracker ร่วมกับเจ้าของ: การ attach ต้องไม่ลบการลงทะเบียนของเจ้าของ
+    result = run_python(tmp_path, """
+        import multiprocessing
+        from algorithm.shared_q_table import NUM_ACTIONS, SharedQTable, state_index
+
+        def worker(table):
+            table.add(('___', '___', '___'), (1, 1), 1.0)
+            table.close()
+
+        if __name__ == '__main__':
+            context = multiprocessing.get_context('spawn')
+            table = SharedQTable(context=context)
+            processes = [context.Process(target=worker, args=(table,)) for _ in range(2)]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+            print(table.get(('___', '___', '___'), (1, 1)))
+            table.close()
+    """)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == '2.0'
+    assert 'KeyError' not in result.stderr
+    assert 'leaked' not in result.stderr
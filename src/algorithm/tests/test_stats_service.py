@@ -0,0 +1,58 @@
+import json
+import threading
+
+from algorithm.stats_service import StatsAggregator, stats_filename
+
+
+def _read(directory, game_type=None):
+    with open(directory / stats_filename(game_type)) as f:
+        return json.load(f)
+
+
+def test_flush_writes_only_the_delta(tmp_path):
+    (tmp_path / stats_filename()).write_text(json.dumps(
+        {"total_games": 10, "player_wins": 4, "ai_wins": 5, "draws": 1, "win_rate": 40, "ai_mode_stats": {}}))
+    # สอง worker เขียนไฟล์เดียวกัน
+    first = StatsAggregator(str(tmp_path), flush_interval=None, cache_ttl=0)
+    second = StatsAggregator(str(tmp_path), flush_interval=None, cache_ttl=0)
+
+    def play(aggregator, result, games):
+        for _ in range(games):
+            aggregator.record_game(None, result, 'Minimax')
+
+    threads = [threading.Thread(target=play, args=(first, 'win', 50)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    play(second, 'lose', 30)
+    assert first.get_stats()['total_games'] == 210
+
+    first.flush()
+    second.flush()
+    first.flush()  # ไม่มีอะไรเพิ่ม: ต้องไม่นับซ้ำ
+    stats = _read(tmp_path)
+    assert (stats['total_games'], stats['player_wins'], stats['ai_wins'], stats['draws']) == (240, 204, 35, 1)
+    assert stats['ai_mode_stats']['Minimax'] == {'wins': 30, 'losses': 200, 'draws': 0}
+    assert stats['win_rate'] == 85
+
+    play(second, 'draw', 2)
+    second.flush()
+    assert _read(tmp_path)['draws'] == 3
+    # worker แรกเห็นค่าที่ worker อื่นบันทึกหลัง flush
+    first.flush()
+    assert first.get_stats()['total_games'] == 242
+    first.close()
+    second.close()
+
+
+def test_per_game_files_and_window(tmp_path):
+    aggregator = StatsAggregator(str(tmp_path), flush_interval=None, cache_ttl=0)
+    aggregator.record_game('TicTacToe', 'win')
+    aggregator.record_game('Checkers', 'draw', 'MCTS')
+    aggregator.close()
+
+    assert _read(tmp_path, 'TicTacToe') == {"total_games": 1, "player_wins": 1, "ai_wins": 0, "draws": 0}
+    assert _read(tmp_path, 'Checkers')['ai_mode_stats'] == {'MCTS': {'wins': 0, 'losses': 0, 'draws': 1}}
+    assert aggregator.get_window_stats('Checkers', ai_mode='MCTS')['draws'] == 1
+    assert aggregator.get_window_stats('TicTacToe', ai_mode='MCTS')['total_games'] == 0
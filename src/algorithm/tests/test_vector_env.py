@@ -0,0 +1,120 @@
+import numpy as np
+import pytest
+
+from algorithm.connect_four import ConnectFourState
+from algorithm.game_rules import TicTacToeState
+from algorithm.vector_env import (VectorSelfPlay, VectorTicTacToe, make_vector_env, random_policy,
+                                  train_on_episodes)
+
+
+@pytest.mark.parametrize('game_type, state_class', [('TicTacToe', TicTacToeState),
+                                                     ('ConnectFour', ConnectFourState)])
+def test_vectorized_games_match_the_engine(game_type, state_class):
+    np.random.seed(0)
+    episodes = VectorSelfPlay(make_vector_env(game_type, 16), random_policy).run(games=100)
+    assert len(episodes) >= 100
+    features = make_vector_env(game_type, 1)
+    for winner, boards, actions, final_board in episodes:
+        state = state_class()
+        for board, action in zip(boards, actions):
+            features.boards[0] = board
+            assert features.encode()[0].tolist() == state.encode()
+            state.play(state.index_move(int(action)))
+        assert state.winner() == winner
+        # final_board เป็นมุมมองของฝ่ายที่เดินก่อน (+1): ฝ่ายแรกมีหมากเท่าหรือมากกว่าหนึ่งตัว
+        assert np.count_nonzero(final_board) == len(actions)
+        assert final_board.sum() == len(actions) % 2
+
+
+def _episodes():
+    np.random.seed(1)
+    return VectorSelfPlay(VectorTicTacToe(8), random_policy).run(games=20)
+
+
+class RecordingDQN:
+    """แทน DeepQNetwork: เก็บ transition และจำนวนครั้งที่ replay_batch ถูกเรียก"""
+
+    def __init__(self):
+        self.memory = []
+        self.replayed = []
+
+    def replay_batch(self, batch_size=256):
+        self.replayed.append(batch_size)
+
+
+def test_dqn_transitions_reward_only_the_last_two_moves():
+    episodes = _episodes()
+    agent = RecordingDQN()
+    train_on_episodes(agent, episodes, batch_size=32)
+    assert agent.replayed == [32]
+    assert len(agent.memory) == sum(len(actions) for _, _, actions, _ in episodes)
+
+    position = 0
+    for winner, boards, actions, final_board in episodes:
+        length = len(actions)
+        for t in range(length):
+            state, action, reward, next_state, done = agent.memory[position + t]
+            assert action == actions[t]
+            assert np.array_equal(state[..., 0], boards[t])
+            mover = 1 if t % 2 == 0 else -1
+            # ฝ่ายที่เดินเป็นคนสุดท้ายของแต่ละฝั่ง: จบเกม ได้ผลของเกม และ next_state เป็นกระดานสุดท้าย
+            assert done == (t >= length - 2)
+            if done:
+                assert reward == winner * mover
+                assert np.array_equal(next_state[..., 0], final_board * mover)
+            else:
+                assert reward == 0.0
+                assert np.array_equal(next_state[..., 0], boards[t + 2])
+        position += length
+
+
+def test_network_agent_gets_every_move_with_the_mover_reward():
+    class Recorder:
+        def train_on_batch(self, boards, move_indices, rewards):
+            self.batch = (boards, move_indices, rewards)
+
+    episodes = _episodes()
+    agent = Recorder()
+    train_on_episodes(agent, episodes)
+    boards, moves, rewards = agent.batch
+    assert len(boards) == len(moves) == len(rewards) == sum(len(a) for _, _, a, _ in episodes)
+    expected = np.concatenate([[winner * (1 if t % 2 == 0 else -1) for t in range(len(actions))]
+                               for winner, _, actions, _ in episodes])
+    assert np.array_equal(rewards, expected)
+    with pytest.raises(TypeError):
+        train_on_episodes(object(), episodes)
+
+
+class StubModel:
+    """model แทน Keras: Q-value = ค่าคงที่ต่อ action และบันทึกการ fit"""
+
+    def __init__(self, q_values):
+        self.q_values = np.asarray(q_values, dtype=np.float32)
+        self.fitted = []
+
+    def predict(self, states, verbose=0):
+        return np.tile(self.q_values, (len(states), 1))
+
+    def fit(self, states, targets, epochs=1, verbose=0):
+        self.fitted.append((states, targets))
+
+
+def test_deep_q_network_batched_paths_with_a_stub_model():
+    pytest.importorskip('tensorflow')
+    from algorithm.deep_q_network import DeepQNetwork
+
+    agent = DeepQNetwork(load=False)
+    agent.model = StubModel(np.arange(9))
+    boards = np.zeros((3, 3, 3))
+    boards[0, 2, 2] = 1  # ช่อง 8 ไม่ว่าง: เลือกช่อง 7 แทน
+    assert agent.choose_actions(boards, epsilon=0.0).tolist() == [7, 8, 8]
+    explored = agent.choose_actions(boards, epsilon=1.0)
+    assert explored[0] != 8
+
+    train_on_episodes(agent, _episodes(), batch_size=16)
+    (states, targets), = agent.model.fitted
+    assert states.shape == (16, 3, 3, 1) and targets.shape == (16, 9)
+    # ทุก target: done = reward, ไม่ done = reward + gamma * max Q (= 8)
+    changed = targets != np.arange(9)
+    assert (changed.sum(axis=1) <= 1).all()
+    assert set(np.round(targets[changed], 4).tolist()) <= {-1.0, 0.0, 1.0, round(agent.gamma * 8, 4)}
@@ -0,0 +1,309 @@
+import numpy as np
+
+from algorithm.instrumentation import incr, instrumented, timer
+
+# Vectorized environments: N เกมเดินพร้อมกันเป็นอาร์เรย์ (N, H, W)
+#
+# การตรวจการเดินที่ทำได้ ตรวจการจบเกม และเริ่มเกมใหม่อัตโนมัติ ทำด้วย NumPy ทั้งหมด
+# agent จึงเลือกการเดินของทุกเกมด้วย forward pass ครั้งเดียว (choose_actions)
+# ผู้เล่นแทนด้วย +1 (ฝ่ายที่เดินก่อน / 'X' / 'red') และ -1 เหมือน game_rules
+
+
+def _lines(height, width, length):
+    """index (แบบ flat) ของทุกแนวยาว length ช่องในแนวนอน แนวตั้ง และแนวทแยง"""
+    lines = []
+    for row in range(height):
+        for col in range(width):
+            for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                cells = [(row + dr * k, col + dc * k) for k in range(length)]
+                if all(0 <= r < height and 0 <= c < width for r, c in cells):
+                    lines.append([r * width + c for r, c in cells])
+    return np.array(lines, dtype=np.intp)
+
+
+def _lines_through(lines, cells):
+    """แนวที่ผ่านแต่ละช่อง (เติมด้วยแนวแรกซ้ำให้ทุกช่องมีจำนวนเท่ากัน)"""
+    through = [[line for line in lines if cell in line] for cell in range(cells)]
+    size = max(len(group) for group in through)
+    return np.array([group + [group[0]] * (size - len(group)) for group in through], dtype=np.intp)
+
+
+class VectorEnv:
+    """
+    N games of the same type stepped in lockstep
+
+    Finished games are reset automatically inside step(); their final
+    boards are kept in final_boards for the caller.
+
+    Args:
+        num_envs: number of games
+    """
+    HEIGHT = None
+    WIDTH = None
+    ACTION_SIZE = None
+    WIN_LENGTH = None
+    LINES = None
+    LINES_THROUGH = None
+    # ลำดับช่องของ GameState.encode() (สำหรับ network ของ AlphaZero)
+    ENCODE_ORDER = None
+
+    def __init__(self, num_envs):
+        self.num_envs = num_envs
+        self.boards = np.zeros((num_envs, self.HEIGHT, self.WIDTH), dtype=np.int8)
+        self.to_move = np.ones(num_envs, dtype=np.int8)
+        self.moves = np.zeros(num_envs, dtype=np.int16)
+        self.final_boards = self.boards[:0].copy()
+        self._index = np.arange(num_envs)
+
+    def reset(self, envs=None):
+        """เริ่มเกมใหม่ (envs: index หรือ mask ของเกมที่ต้องการ, None = ทุกเกม)"""
+        if envs is None:
+            envs = slice(None)
+        self.boards[envs] = 0
+        self.to_move[envs] = 1
+        self.moves[envs] = 0
+
+    def legal_mask(self):
+        """(N, ACTION_SIZE) bool: การเดินที่ทำได้ของแต่ละเกม"""
+        raise NotImplementedError
+
+    def _cells(self, actions):
+        """ช่อง (แบบ flat) ที่การเดินแต่ละเกมวางหมากลงไป"""
+        raise NotImplementedError
+
+    def observation(self):
+        """กระดานจากมุมมองของฝ่ายที่จะเดิน: 1 = หมากของตัวเอง, -1 = ของฝ่ายตรงข้าม"""
+        return self.boards * self.to_move[:, None, None]
+
+    def encode(self):
+        """(N, 2 * cells) features แบบเดียวกับ GameState.encode()"""
+        flat = self.observation().reshape(self.num_envs, -1)[:, self.ENCODE_ORDER]
+        return np.concatenate([flat == 1, flat == -1], axis=1).astype(np.float64)
+
+    @instrumented('vector_env.step')
+    def step(self, actions):
+        """
+        Play one move in every game
+
+        Args:
+            actions: (N,) action indices (0 .. ACTION_SIZE - 1)
+
+        Returns:
+            (rewards, dones, winners): reward for the player who moved
+            (1 win, 0 otherwise), finished mask, and +1 / -1 / 0 for
+            finished games (0 also for games still running)
+        """
+        actions = np.asarray(actions, dtype=np.intp)
+        if not self.legal_mask()[self._index, actions].all():
+            raise ValueError("Illegal action in vectorized step")
+        cells = self._cells(actions)
+        flat = self.boards.reshape(self.num_envs, -1)
+        player = self.to_move
+        flat[self._index, cells] = player
+
+        # ตรวจเฉพาะแนวที่ผ่านช่องที่เพิ่งเดิน
+        lines = self.LINES_THROUGH[cells]
+        totals = flat[self._index[:, None, None], lines].sum(axis=2, dtype=np.int16)
+        won = (totals == self.WIN_LENGTH * player[:, None]).any(axis=1)
+        self.moves += 1
+        dones = won | (self.moves == self.HEIGHT * self.WIDTH)
+        winners = np.where(won, player, 0).astype(np.int8)
+        self.to_move = -player
+
+        self.final_boards = self.boards[dones].copy()
+        if dones.any():
+            self.reset(dones)
+            incr('vector_env.games', int(dones.sum()))
+        return won.astype(np.float32), dones, winners
+
+
+class VectorTicTacToe(VectorEnv):
+    """N Tic-Tac-Toe games (action = row * 3 + col)"""
+    HEIGHT = 3
+    WIDTH = 3
+    ACTION_SIZE = 9
+    WIN_LENGTH = 3
+    LINES = _lines(3, 3, 3)
+    LINES_THROUGH = _lines_through(LINES.tolist(), 9)
+    ENCODE_ORDER = np.arange(9)
+
+    def legal_mask(self):
+        return self.boards.reshape(self.num_envs, -1) == 0
+
+    def _cells(self, actions):
+        return actions
+
+
+class VectorConnectFour(VectorEnv):
+    """N Connect Four games (action = column, row 0 is the top row as in to_board())"""
+    HEIGHT = 6
+    WIDTH = 7
+    ACTION_SIZE = 7
+    WIN_LENGTH = 4
+    LINES = _lines(6, 7, 4)
+    LINES_THROUGH = _lines_through(LINES.tolist(), 42)
+    # encode() ของ ConnectFourState เรียงตามคอลัมน์ จากแถวล่างขึ้นบน
+    ENCODE_ORDER = np.array([(6 - 1 - height) * 7 + col for col in range(7) for height in range(6)])
+
+    def __init__(self, num_envs):
+        super().__init__(num_envs)
+        self.heights = np.zeros((num_envs, self.WIDTH), dtype=np.int8)
+
+    def reset(self, envs=None):
+        super().reset(envs)
+        self.heights[slice(None) if envs is None else envs] = 0
+
+    def legal_mask(self):
+        return self.heights < self.HEIGHT
+
+    def _cells(self, actions):
+        rows = self.HEIGHT - 1 - self.heights[self._index, actions]
+        self.heights[self._index, actions] += 1
+        return rows * self.WIDTH + actions
+
+
+VECTOR_ENVS = {
+    'TicTacToe': VectorTicTacToe,
+    'ConnectFour': VectorConnectFour,
+}
+
+
+def make_vector_env(game_type, num_envs):
+    if game_type not in VECTOR_ENVS:
+        raise ValueError(f"Unsupported game type for vectorized self-play: {game_type}")
+    return VECTOR_ENVS[game_type](num_envs)
+
+
+def random_policy(env):
+    """การเดินแบบสุ่มที่ถูกกฎของทุกเกม"""
+    legal = env.legal_mask()
+    return np.where(legal, np.random.random(legal.shape), -1).argmax(axis=1)
+
+
+def agent_policy(agent, **kwargs):
+    """policy จาก agent ที่มี choose_actions(boards) (NeuralNetworkAgent, DeepQNetwork)"""
+    return lambda env: agent.choose_actions(env.observation(), **kwargs)
+
+
+def network_policy(network, temperature=1.0):
+    """policy จาก PolicyValueNetwork ของ AlphaZero (สุ่มตาม prior, temperature 0 = เลือกค่าสูงสุด)"""
+    def policy(env):
+        priors, _ = network.predict(env.encode())
+        priors = np.where(env.legal_mask(), priors, 0.0)
+        if not temperature:
+            return priors.argmax(axis=1)
+        priors = priors ** (1.0 / temperature)
+        cumulative = priors.cumsum(axis=1)
+        draws = np.random.random(len(priors)) * cumulative[:, -1]
+        return (cumulative < draws[:, None]).sum(axis=1)
+    return policy
+
+
+class VectorSelfPlay:
+    """
+    Collects finished self-play games from a VectorEnv
+
+    Each episode is (winner, boards, actions, final_board): boards are the
+    positions before every move from the mover's point of view (T, H, W),
+    actions the moves played (T,) and final_board the last position
+    (+1 = first player).
+
+    Args:
+        env: VectorEnv
+        policy: function(env) -> (N,) actions for the player to move in every game
+    """
+
+    def __init__(self, env, policy):
+        self.env = env
+        self.policy = policy
+        cells = env.HEIGHT * env.WIDTH
+        self._boards = np.zeros((env.num_envs, cells, env.HEIGHT, env.WIDTH), dtype=np.int8)
+        self._actions = np.zeros((env.num_envs, cells), dtype=np.int16)
+        self.games = 0
+        self.steps = 0
+
+    @instrumented('vector_env.run')
+    def run(self, steps=None, games=None):
+        """
+        Step all games until `steps` lockstep moves or `games` finished games
+
+        Returns:
+            list of episodes
+        """
+        if steps is None and games is None:
+            raise ValueError("run() needs steps or games")
+        env = self.env
+        episodes = []
+        step = 0
+        while (steps is None or step < steps) and (games is None or len(episodes) < games):
+            observation = env.observation()
+            with timer('vector_env.policy'):
+                actions = np.asarray(self.policy(env))
+            self._boards[env._index, env.moves] = observation
+            self._actions[env._index, env.moves] = actions
+            lengths = env.moves + 1
+            _, dones, winners = env.step(actions)
+            for n, final_board in zip(np.flatnonzero(dones), env.final_boards):
+                length = lengths[n]
+                episodes.append((int(winners[n]), self._boards[n, :length].copy(),
+                                 self._actions[n, :length].copy(), final_board))
+            step += 1
+        self.steps += step
+        self.games += len(episodes)
+        return episodes
+
+
+def episode_rewards(winner, length):
+    """ผลของเกมจากมุมมองของผู้เดินแต่ละตา (T,)"""
+    movers = np.where(np.arange(length) % 2 == 0, 1, -1)
+    return (winner * movers).astype(np.float32)
+
+
+@instrumented('vector_env.train')
+def train_on_episodes(agent, episodes, batch_size=256):
+    """
+    Feed finished games to an agent in batches
+
+    - NeuralNetworkAgent: train_on_batch over every move of every game
+    - DeepQNetwork: (state, action, reward, next_state, done) transitions for
+      both sides, where next_state is the mover's next turn, then replay_batch
+    """
+    if not episodes:
+        return
+    if hasattr(agent, 'train_on_batch'):
+        boards = np.concatenate([boards for _, boards, _, _ in episodes])
+        actions = np.concatenate([actions for _, _, actions, _ in episodes])
+        rewards = np.concatenate([episode_rewards(winner, len(actions)) for winner, _, actions, _ in episodes])
+        agent.train_on_batch(boards, actions, rewards)
+    elif hasattr(agent, 'replay_batch'):
+        for winner, boards, actions, final_board in episodes:
+            rewards = episode_rewards(winner, len(actions))
+            states = boards[..., np.newaxis].astype(np.float32)
+            for t in range(len(actions)):
+                done = t + 2 >= len(actions)
+                if done:
+                    mover = 1 if t % 2 == 0 else -1
+                    next_state = (final_board * mover)[..., np.newaxis].astype(np.float32)
+                else:
+                    next_state = states[t + 2]
+                agent.memory.append((states[t], int(actions[t]), float(rewards[t]) if done else 0.0,
+                                     next_state, done))
+        agent.replay_batch(min(batch_size, len(agent.memory)))
+    else:
+        raise TypeError(f"{type(agent).__name__} does not support batched training")
+
+
+# ทดสอบ Vectorized self-play
+if __name__ == "__main__":
+    import time
+
+    from algorithm.neural_network import NeuralNetworkAgent
+    agent = NeuralNetworkAgent()
+    for num_envs in (1, 16, 256):
+        selfplay = VectorSelfPlay(VectorTicTacToe(num_envs), agent_policy(agent))
+        start = time.perf_counter()
+        episodes = selfplay.run(steps=max(200, 20000 // num_envs))
+        elapsed = time.perf_counter() - start
+        print(f"N={num_envs}: {len(episodes) / elapsed:.0f} games/s")
+    train_on_episodes(agent, episodes)
+    print("Test complete.")